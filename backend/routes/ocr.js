@@ -6,6 +6,12 @@
  *
  * Endpoints:
  * - POST /api/ocr/scan-mrz - Upload passport image and extract MRZ data
+ * - POST /api/ocr/scan-mrz/batch - Upload many passport images in one request
+ * - POST /api/ocr/scan-mrz/jobs - Queue a scan, answer with a job ID straight away
+ * - POST /api/ocr/scan-mrz/batch/jobs - Queue a batch scan (bulk priority)
+ * - GET /api/ocr/jobs/:jobId - Poll a scan job
+ * - GET /api/ocr/jobs/:jobId/events - Server-sent events stream of a scan job
+ * - DELETE /api/ocr/jobs/:jobId - Cancel a queued scan job
  * - GET /api/ocr/health - Check OCR service status
  */
 
@@ -336,7 +342,8 @@ router.post('/scan-mrz', upload.single('file'), async (req, res) => {
       const response = await fetch(`${OCR_SERVICE_URL}/scan-mrz`, {
         method: 'POST',
         body: formData,
-        headers: formData.getHeaders(),
+        // The OCR service rate-limits per client; all requests reach it from this process
+        headers: { ...formData.getHeaders(), 'X-Client-Id': req.ip },
         signal: controller.signal
       });
 
@@ -348,6 +355,11 @@ router.post('/scan-mrz', upload.single('file'), async (req, res) => {
       if (!response.ok) {
         console.warn(`[OCR] Python service returned error: ${response.status}`, data);
 
+        const retryAfter = response.headers.get('retry-after');
+        if (retryAfter) {
+          res.set('Retry-After', retryAfter);
+        }
+
         // Return error with fallback suggestion
         return res.status(response.status).json({
           success: false,
@@ -421,6 +433,331 @@ router.post('/scan-mrz', upload.single('file'), async (req, res) => {
   }
 });
 
+/**
+ * Batch Scan MRZ - Upload many passport images and extract MRZ data
+ * POST /api/ocr/scan-mrz/batch
+ *
+ * Used by the corporate-voucher flow. One request to the Python service
+ * recognises all images together, which is much faster than calling
+ * /scan-mrz per file.
+ *
+ * Request:
+ * - multipart/form-data
+ * - files: passport images (JPG, PNG, max 10MB each, max 50 files)
+ *
+ * Response:
+ * {
+ *   success: true,
+ *   results: [ { success, passportNumber, ..., error }, ... ],  // upload order
+ *   source: "python-ocr",
+ *   processingTime: 5230
+ * }
+ */
+router.post('/scan-mrz/batch', upload.array('files', 50), async (req, res) => {
+  const startTime = Date.now();
+
+  try {
+    if (!req.files || req.files.length === 0) {
+      return res.status(400).json({
+        success: false,
+        error: 'No image files uploaded',
+        message: 'Please upload one or more passport images (JPG or PNG)'
+      });
+    }
+
+    console.log(`[OCR] Batch scanning ${req.files.length} passport images`);
+
+    const formData = new FormData();
+    req.files.forEach(file => {
+      formData.append('files', file.buffer, {
+        filename: file.originalname,
+        contentType: file.mimetype
+      });
+    });
+
+    // Allow the batch proportionally more time than a single scan
+    const batchTimeout = OCR_TIMEOUT * Math.max(1, Math.ceil(req.files.length / 4));
+    const controller = new AbortController();
+    const timeout = setTimeout(() => controller.abort(), batchTimeout);
+
+    try {
+      const response = await fetch(`${OCR_SERVICE_URL}/scan-mrz/batch`, {
+        method: 'POST',
+        body: formData,
+        // The OCR service rate-limits per client; all requests reach it from this process
+        headers: { ...formData.getHeaders(), 'X-Client-Id': req.ip },
+        signal: controller.signal
+      });
+
+      clearTimeout(timeout);
+
+      const data = await response.json();
+
+      if (!response.ok) {
+        console.warn(`[OCR] Python service returned error for batch: ${response.status}`, data);
+
+        const retryAfter = response.headers.get('retry-after');
+        if (retryAfter) {
+          res.set('Retry-After', retryAfter);
+        }
+
+        return res.status(response.status).json({
+          success: false,
+          error: data.error || 'OCR batch processing failed',
+          source: 'python-ocr'
+        });
+      }
+
+      const processingTime = Date.now() - startTime;
+      const succeeded = data.results.filter(result => result.success).length;
+      console.log(`[OCR] Batch scan complete: ${succeeded}/${data.results.length} successful (${processingTime}ms)`);
+
+      res.json({
+        success: true,
+        results: data.results,
+        source: 'python-ocr',
+        processingTime: processingTime,
+        ocrProcessingTime: data.processingTime
+      });
+
+    } catch (fetchError) {
+      clearTimeout(timeout);
+
+      console.error('[OCR] Python service unavailable for batch:', fetchError.message);
+
+      return res.status(503).json({
+        success: false,
+        error: 'OCR service temporarily unavailable',
+        message: fetchError.name === 'AbortError'
+          ? `OCR batch processing timeout (>${batchTimeout/1000}s)`
+          : 'Python OCR service not responding',
+        serviceUrl: OCR_SERVICE_URL
+      });
+    }
+
+  } catch (error) {
+    console.error('[OCR] Unexpected batch error:', error);
+
+    return serverError(res, error, 'Internal server error');
+  }
+});
+
+// ============================================================================
+// SCAN JOBS
+// The upload is answered with a job ID as soon as the OCR service has queued
+// it, so no socket is held open for the scan itself. The browser then polls
+// the job or listens on its event stream.
+// ============================================================================
+
+const OCR_JOB_TIMEOUT = parseInt(process.env.OCR_JOB_TIMEOUT || '10000'); // Submitting, polling, cancelling
+
+/**
+ * Forward a request to the OCR service's job API and relay its JSON answer
+ */
+async function forwardJobRequest(res, path, options = {}) {
+  const controller = new AbortController();
+  const timeout = setTimeout(() => controller.abort(), OCR_JOB_TIMEOUT);
+
+  try {
+    const response = await fetch(`${OCR_SERVICE_URL}${path}`, { ...options, signal: controller.signal });
+    clearTimeout(timeout);
+
+    const data = await response.json();
+
+    for (const header of ['retry-after', 'location']) {
+      const value = response.headers.get(header);
+      if (value) {
+        res.set(header, header === 'location' ? `/api/ocr${value}` : value);
+      }
+    }
+
+    if (!response.ok) {
+      console.warn(`[OCR] Python service returned error for ${path}: ${response.status}`, data);
+      return res.status(response.status).json({
+        success: false,
+        error: data.error || 'OCR job request failed',
+        source: 'python-ocr'
+      });
+    }
+
+    return res.status(response.status).json(data);
+
+  } catch (fetchError) {
+    clearTimeout(timeout);
+
+    console.error(`[OCR] Python service unavailable for ${path}:`, fetchError.message);
+
+    return res.status(503).json({
+      success: false,
+      error: 'OCR service temporarily unavailable',
+      fallback: 'client-tesseract',
+      serviceUrl: OCR_SERVICE_URL
+    });
+  }
+}
+
+/**
+ * Priority query string for the OCR service ("counter" or "bulk"; the service validates it)
+ */
+function priorityQuery(req) {
+  return req.query.priority ? `?priority=${encodeURIComponent(req.query.priority)}` : '';
+}
+
+/**
+ * Queue Scan - Upload a passport image, get a job ID back
+ * POST /api/ocr/scan-mrz/jobs[?priority=counter|bulk]
+ *
+ * Request: multipart/form-data with file (as /scan-mrz)
+ *
+ * Response (202):
+ * { jobId: "...", kind: "scan", priority: "counter", status: "queued", createdAt, updatedAt, result: null }
+ *
+ * The finished job's result is the Python /scan-mrz response.
+ */
+router.post('/scan-mrz/jobs', upload.single('file'), async (req, res) => {
+  try {
+    if (!req.file) {
+      return res.status(400).json({
+        success: false,
+        error: 'No image file uploaded',
+        message: 'Please upload a passport image (JPG or PNG)'
+      });
+    }
+
+    const formData = new FormData();
+    formData.append('file', req.file.buffer, {
+      filename: req.file.originalname,
+      contentType: req.file.mimetype
+    });
+
+    return await forwardJobRequest(res, `/scan-mrz/jobs${priorityQuery(req)}`, {
+      method: 'POST',
+      body: formData,
+      // The OCR service rate-limits per client; all requests reach it from this process
+      headers: { ...formData.getHeaders(), 'X-Client-Id': req.ip }
+    });
+
+  } catch (error) {
+    console.error('[OCR] Unexpected job submit error:', error);
+
+    return serverError(res, error, 'Internal server error');
+  }
+});
+
+/**
+ * Queue Batch Scan - Upload many passport images, get a job ID back
+ * POST /api/ocr/scan-mrz/batch/jobs[?priority=bulk|counter]
+ *
+ * Request: multipart/form-data with files (as /scan-mrz/batch)
+ *
+ * Batch jobs default to bulk priority: counter scans submitted later still
+ * run first. The finished job's result is the Python /scan-mrz/batch response.
+ */
+router.post('/scan-mrz/batch/jobs', upload.array('files', 50), async (req, res) => {
+  try {
+    if (!req.files || req.files.length === 0) {
+      return res.status(400).json({
+        success: false,
+        error: 'No image files uploaded',
+        message: 'Please upload one or more passport images (JPG or PNG)'
+      });
+    }
+
+    const formData = new FormData();
+    req.files.forEach(file => {
+      formData.append('files', file.buffer, {
+        filename: file.originalname,
+        contentType: file.mimetype
+      });
+    });
+
+    return await forwardJobRequest(res, `/scan-mrz/batch/jobs${priorityQuery(req)}`, {
+      method: 'POST',
+      body: formData,
+      headers: { ...formData.getHeaders(), 'X-Client-Id': req.ip }
+    });
+
+  } catch (error) {
+    console.error('[OCR] Unexpected batch job submit error:', error);
+
+    return serverError(res, error, 'Internal server error');
+  }
+});
+
+/**
+ * Poll Scan Job
+ * GET /api/ocr/jobs/:jobId
+ *
+ * Response: { jobId, status: "queued" | "running" | "done" | "failed" | "cancelled", result, error, ... }
+ *
+ * Poll at least every few seconds: a queued job nobody polls is cancelled.
+ */
+router.get('/jobs/:jobId', (req, res) => {
+  return forwardJobRequest(res, `/jobs/${encodeURIComponent(req.params.jobId)}`);
+});
+
+/**
+ * Cancel Scan Job (only while it is queued)
+ * DELETE /api/ocr/jobs/:jobId
+ */
+router.delete('/jobs/:jobId', (req, res) => {
+  return forwardJobRequest(res, `/jobs/${encodeURIComponent(req.params.jobId)}`, { method: 'DELETE' });
+});
+
+/**
+ * Scan Job Events - Server-sent events stream, relayed as it arrives
+ * GET /api/ocr/jobs/:jobId/events
+ *
+ * One "status" event per status change; the stream ends after the finished
+ * job's event, which carries the result. Closing the stream stops the relay.
+ */
+router.get('/jobs/:jobId/events', async (req, res) => {
+  const controller = new AbortController();
+  req.on('close', () => controller.abort());
+
+  try {
+    const response = await fetch(`${OCR_SERVICE_URL}/jobs/${encodeURIComponent(req.params.jobId)}/events`, {
+      signal: controller.signal
+    });
+
+    if (!response.ok) {
+      const data = await response.json();
+      return res.status(response.status).json({
+        success: false,
+        error: data.error || 'OCR job not found',
+        source: 'python-ocr'
+      });
+    }
+
+    res.set({
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    response.body.on('data', chunk => res.write(chunk));
+    response.body.on('end', () => res.end());
+    response.body.on('error', () => res.end());
+
+  } catch (fetchError) {
+    if (fetchError.name === 'AbortError') {
+      return; // Browser went away
+    }
+
+    console.error('[OCR] Python service unavailable for job events:', fetchError.message);
+
+    if (!res.headersSent) {
+      return res.status(503).json({
+        success: false,
+        error: 'OCR service temporarily unavailable',
+        serviceUrl: OCR_SERVICE_URL
+      });
+    }
+    res.end();
+  }
+});
+
 /**
  * Test endpoint - Verify file upload works (development only)
  * POST /api/ocr/test-upload
@@ -0,0 +1,161 @@
+"""
+WebSocket Fan-Out Benchmark with Fake Slow Clients
+
+Broadcasts scan messages to N fake WebSocket clients, one of which is
+stalled (its send never completes, like a frozen browser tab on a dead
+Wi-Fi link), and measures how long the healthy clients wait for each
+message. Compares the old sequential broadcast (await each client in
+turn) with com_bridge.broadcast_to_clients.
+
+Expected: with the old loop every healthy client waits for the stalled
+one; with per-client queues the healthy clients' latency stays flat as N
+grows, and the stalled client is dropped once its queue overflows.
+Exits with status 1 if that is not the case.
+
+Usage (from python-com-bridge/):
+    python -m benchmarks.bench_broadcast [--clients 10 100 1000] [--messages 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import com_bridge  # noqa: E402
+
+# The legacy loop has no timeout; a "stalled" client blocks it this long per send
+LEGACY_STALL_SECONDS = 0.5
+
+SCAN = {
+    'success': True, 'type': 'mrz', 'passportNumber': 'N1234567', 'surname': 'SMITH',
+    'givenName': 'JOHN ROBERT', 'nationality': 'American', 'nationalityCode': 'USA',
+    'dateOfBirth': '1985-03-15', 'sex': 'Male', 'dateOfExpiry': '2030-12-31',
+}
+
+
+class FakeWebSocket:
+    """Stand-in for a websockets connection that records delivery times."""
+
+    def __init__(self, name: str, stall: float = 0.0):
+        self.remote_address = (name, 0)
+        self.stall = stall
+        self.received = []
+        self.closed = False
+
+    async def send(self, payload: str):
+        if self.stall:
+            await asyncio.sleep(self.stall)
+        self.received.append((time.perf_counter(), payload))
+
+    async def close(self, code: int = 1000, reason: str = ''):
+        self.closed = True
+
+
+async def legacy_broadcast(clients: list, message: dict):
+    """The previous broadcast_to_clients: one client at a time."""
+    message_json = json.dumps(message)
+    for client in clients:
+        await client.send(message_json)
+
+
+def latencies(clients: list, sent_at: dict) -> list:
+    """Delivery delays (payloads are decoded only now, outside the timed path)."""
+    seqs = {}
+    delays = []
+    for client in clients:
+        for at, payload in client.received:
+            if payload not in seqs:
+                seqs[payload] = json.loads(payload)['seq']
+            delays.append(at - sent_at[seqs[payload]])
+    return delays
+
+
+async def run_legacy(n: int, messages: int) -> dict:
+    stalled = FakeWebSocket('stalled', stall=LEGACY_STALL_SECONDS)
+    healthy = [FakeWebSocket(f'client-{i}') for i in range(n - 1)]
+    clients = [stalled] + healthy  # Worst case: stalled client first in the set
+
+    sent_at = {}
+    for seq in range(messages):
+        sent_at[seq] = time.perf_counter()
+        await legacy_broadcast(clients, dict(SCAN, seq=seq))
+
+    values = sorted(latencies(healthy, sent_at))
+    return {'p50': values[len(values) // 2], 'max': values[-1], 'dropped': False}
+
+
+async def run_queued(n: int, messages: int) -> dict:
+    com_bridge.connected_clients.clear()
+
+    stalled = FakeWebSocket('stalled', stall=3600)
+    healthy = [FakeWebSocket(f'client-{i}') for i in range(n - 1)]
+    for websocket in [stalled] + healthy:
+        com_bridge.connected_clients[websocket] = com_bridge.ClientConnection(websocket)
+
+    sent_at = {}
+    for seq in range(messages):
+        sent_at[seq] = time.perf_counter()
+        await com_bridge.broadcast_to_clients(dict(SCAN, seq=seq))
+        await asyncio.sleep(0.01)  # Scans arrive spaced out in reality
+
+    # Let the sender tasks finish delivering
+    deadline = time.perf_counter() + 5
+    while time.perf_counter() < deadline and any(len(c.received) < messages for c in healthy):
+        await asyncio.sleep(0.01)
+
+    values = sorted(latencies(healthy, sent_at))
+    dropped = stalled not in com_bridge.connected_clients
+
+    for client in list(com_bridge.connected_clients.values()):
+        await client.close()
+    com_bridge.connected_clients.clear()
+
+    return {
+        'p50': values[len(values) // 2],
+        'max': values[-1],
+        'dropped': dropped,
+        'delivered': all(len(c.received) == messages for c in healthy),
+    }
+
+
+async def main_async(args) -> bool:
+    com_bridge.logger.setLevel('WARNING')
+    ok = True
+
+    print(f"{'clients':>8} | {'legacy p50':>11} {'legacy max':>11} | {'queued p50':>11} {'queued max':>11} | stalled dropped")
+    for n in args.clients:
+        legacy = await run_legacy(n, min(args.messages, 3))
+        queued = await run_queued(n, args.messages)
+        print(
+            f"{n:>8} | {legacy['p50'] * 1000:9.1f}ms {legacy['max'] * 1000:9.1f}ms | "
+            f"{queued['p50'] * 1000:9.2f}ms {queued['max'] * 1000:9.2f}ms | {queued['dropped']}"
+        )
+
+        # Healthy clients must never wait for the stalled one
+        if queued['max'] >= LEGACY_STALL_SECONDS / 2 or not queued['delivered']:
+            print(f"FAIL: healthy clients delayed or missing messages with {n} clients")
+            ok = False
+        if args.messages > com_bridge.CONFIG['CLIENT_QUEUE_SIZE'] and not queued['dropped']:
+            print(f"FAIL: stalled client not dropped after {args.messages} messages")
+            ok = False
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 100, 1000], help='Client counts to test')
+    parser.add_argument('--messages', type=int, default=com_bridge.CONFIG['CLIENT_QUEUE_SIZE'] + 8,
+                        help='Messages per run (more than CLIENT_QUEUE_SIZE to trigger the drop)')
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
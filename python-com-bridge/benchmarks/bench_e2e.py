@@ -0,0 +1,236 @@
+"""
+End-to-End Scan-to-WebSocket Load Test (no scanner needed)
+
+Starts the bridge's WebSocket server on a free local port, connects N real
+WebSocket clients and replays synthetic MC147 scans (or a capture recorded
+with --capture) through the normal framing, parsing and broadcast path.
+Measures the time from the last byte of a scan leaving the "scanner" to
+each client receiving the parsed message.
+
+By default the bytes are fed in-process through a ReplayPort. With --pty
+(Linux/macOS) they are written to a pseudo-terminal instead and read by a
+regular ScannerPort, so the SerialReader thread is part of the measurement.
+
+Exits with status 1 if any client misses a scan or p99 latency exceeds
+--max-p99-ms.
+
+Usage (from python-com-bridge/):
+    python -m benchmarks.bench_e2e [--clients 10 100 300] [--scans 100] [--interval 0.05]
+    python -m benchmarks.bench_e2e --pty
+    python -m benchmarks.bench_e2e --capture scans.jsonl --speed 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import websockets  # noqa: E402
+
+import com_bridge  # noqa: E402
+from com_bridge import FRAME_MRZ, FrameDecoder  # noqa: E402
+
+SCANNER_ID = 'bench'
+
+
+def frame_key(frame) -> str:
+    """What a client can match a frame by: passport number or barcode value."""
+    if frame.kind == FRAME_MRZ:
+        return frame.text[44:53].replace('<', '')
+    return frame.text
+
+
+def message_key(message: dict) -> str:
+    return message['passportNumber'] if message['type'] == 'mrz' else message['value']
+
+
+def scan_events(args) -> list:
+    """The (seconds since start, bytes) reads to send, cut to whole scans."""
+    if args.capture:
+        return com_bridge.read_capture(args.capture)
+
+    events = []
+    decoder = FrameDecoder()
+    scans = 0
+    for t, data in com_bridge.synthetic_scan_events(args.interval, com_bridge.CONFIG['BAUD_RATE'], seed=9600):
+        events.append((t, data))
+        scans += len(decoder.feed(data))
+        if scans >= args.scans:
+            return events
+    return events
+
+
+class Timer:
+    """Records when the last byte of each scan was handed to the bridge."""
+
+    def __init__(self):
+        self.decoder = FrameDecoder()
+        self.sent_at = {}
+
+    def sent(self, data: bytes):
+        now = time.perf_counter()
+        for frame in self.decoder.feed(data):
+            self.sent_at[frame_key(frame)] = now
+
+
+class TimedReplayPort(com_bridge.ReplayPort):
+    """ReplayPort over a fixed event list that timestamps every scan it delivers."""
+
+    def __init__(self, events: list, timer: Timer, speed: float):
+        super().__init__(SCANNER_ID, 'synthetic', com_bridge.CONFIG['BAUD_RATE'])
+        self._events = events
+        self.timer = timer
+        self.speed = speed
+        self.loop_replay = False
+
+    def events(self):
+        return self._events
+
+    def deliver(self, queue, data):
+        super().deliver(queue, data)
+        self.timer.sent(data)
+
+
+async def write_to_pty(master_fd: int, events: list, timer: Timer, speed: float):
+    """Play events into the master side of a pty, like a scanner on the wire."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for t, data in events:
+        delay = start + t / speed - loop.time() if speed else 0
+        await asyncio.sleep(max(delay, 0))
+        os.write(master_fd, data)
+        timer.sent(data)
+
+
+def open_pty_port(port: str, baud_rate: int):
+    """open_serial_port without DTR/RTS: a pty has no modem control lines."""
+    import serial
+    return serial.Serial(port=port, baudrate=baud_rate, timeout=com_bridge.CONFIG['READ_TIMEOUT'])
+
+
+async def client(uri: str, expected: int, received: list, ready: asyncio.Event, done: asyncio.Event):
+    async with websockets.connect(uri, max_size=None) as websocket:
+        await websocket.recv()  # welcome message
+        ready.set()
+        count = 0
+        while count < expected:
+            message = json.loads(await websocket.recv())
+            if message.get('type') in ('mrz', 'barcode'):
+                received.append((time.perf_counter(), message_key(message)))
+                count += 1
+    done.set()
+
+
+async def run(n: int, events: list, expected: int, args) -> dict:
+    com_bridge.connected_clients.clear()
+    com_bridge.scanner_ports.clear()
+
+    server = await com_bridge.serve(com_bridge.handle_websocket, '127.0.0.1', 0)
+    uri = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/?scanner={SCANNER_ID}"
+
+    received = [[] for _ in range(n)]
+    ready = [asyncio.Event() for _ in range(n)]
+    done = [asyncio.Event() for _ in range(n)]
+    clients = [asyncio.create_task(client(uri, expected, received[i], ready[i], done[i])) for i in range(n)]
+    await asyncio.wait_for(asyncio.gather(*(r.wait() for r in ready)), timeout=30)
+
+    timer = Timer()
+    pty_writer = None
+    if args.pty:
+        import pty
+        import tty
+        master, slave = pty.openpty()
+        tty.setraw(slave)
+        com_bridge.open_serial_port = open_pty_port
+        port = com_bridge.ScannerPort(SCANNER_ID, os.ttyname(slave), com_bridge.CONFIG['BAUD_RATE'])
+    else:
+        port = TimedReplayPort(events, timer, args.speed)
+
+    com_bridge.scanner_ports[SCANNER_ID] = port
+    port_task = asyncio.create_task(port.run())
+    if args.pty:
+        await asyncio.sleep(0.5)  # let the reader thread open the slave side
+        pty_writer = asyncio.create_task(write_to_pty(master, events, timer, args.speed))
+
+    started = time.perf_counter()
+    span = events[-1][0] / args.speed if args.speed else 0
+    try:
+        await asyncio.wait_for(asyncio.gather(*(d.wait() for d in done)), timeout=span + 30)
+    except asyncio.TimeoutError:
+        pass
+    finished = time.perf_counter()
+
+    for task in clients + [port_task] + ([pty_writer] if pty_writer else []):
+        task.cancel()
+    await asyncio.gather(*clients, port_task, return_exceptions=True)
+    server.close()
+    await server.wait_closed()
+    if args.pty:
+        os.close(master)
+        os.close(slave)
+
+    delays = sorted(
+        at - timer.sent_at[key]
+        for per_client in received for at, key in per_client if key in timer.sent_at
+    )
+    delivered = sum(len(r) for r in received)
+    pct = lambda q: delays[min(len(delays) - 1, int(q * len(delays)))] * 1000 if delays else float('nan')  # noqa: E731
+    return {
+        'delivered': delivered,
+        'expected': n * expected,
+        'p50': pct(0.50),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+        'max': delays[-1] * 1000 if delays else float('nan'),
+        'rate': delivered / (finished - started),
+    }
+
+
+async def main_async(args) -> bool:
+    com_bridge.logger.setLevel('WARNING')
+    logging.getLogger('websockets').setLevel('WARNING')
+    events = scan_events(args)
+    decoder = FrameDecoder()
+    expected = sum(len(decoder.feed(data)) for _, data in events)
+
+    source = args.capture or f"{expected} synthetic scans, one every {args.interval * 1000:.0f} ms"
+    print(f"Source: {source}; speed {args.speed or 'unthrottled'}; via {'pty + SerialReader' if args.pty else 'ReplayPort'}")
+    print(f"{'clients':>8} | {'delivered':>13} | {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} | {'msgs/s':>8}")
+    print("-" * 78)
+
+    ok = True
+    for n in args.clients:
+        r = await run(n, events, expected, args)
+        print(f"{n:>8} | {r['delivered']:>6}/{r['expected']:<6} | {r['p50']:6.1f}ms {r['p95']:6.1f}ms "
+              f"{r['p99']:6.1f}ms {r['max']:6.1f}ms | {r['rate']:8.0f}")
+        if r['delivered'] != r['expected']:
+            print(f"FAIL: {r['expected'] - r['delivered']} messages missing with {n} clients")
+            ok = False
+        if r['p99'] > args.max_p99_ms:
+            print(f"FAIL: p99 {r['p99']:.1f} ms above {args.max_p99_ms} ms with {n} clients")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 100, 300], help='Client counts to test')
+    parser.add_argument('--scans', type=int, default=100, help='Synthetic scans per run')
+    parser.add_argument('--interval', type=float, default=0.05, help='Seconds between synthetic scans')
+    parser.add_argument('--capture', help='Replay this capture file instead of synthetic scans')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed factor (0 = unthrottled)')
+    parser.add_argument('--pty', action='store_true', help='Feed bytes through a pty and the SerialReader thread')
+    parser.add_argument('--max-p99-ms', type=float, default=250.0, help='Fail above this p99 latency')
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
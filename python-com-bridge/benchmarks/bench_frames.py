@@ -0,0 +1,176 @@
+"""
+Scanner Frame Decoder Fuzz and Throughput Check
+
+Builds byte streams the way the MC147 sends them (MRZ lines of passports,
+ID cards and visas separated by CR/LF, SITA STX/ETX frames around MRZs and
+barcodes, UTF-8 QR payloads, ACK noise), splits them at random points and feeds the pieces to
+com_bridge.FrameDecoder. Every split must produce exactly the frames the
+stream contains. Then measures decoder throughput against the old
+string-rebuild buffering for 1-byte, 64-byte and 4 KB reads.
+
+Exits with status 1 if any split loses, merges or corrupts a frame.
+
+Usage (from python-com-bridge/):
+    python -m benchmarks.bench_frames [--messages 2000] [--splits 100] [--seed 147]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import com_bridge  # noqa: E402
+from com_bridge import FRAME_ETX, FRAME_MRZ, Frame, FrameDecoder  # noqa: E402
+from icao_mrz import FORMATS, TD3  # noqa: E402
+
+STX = b'\x02'
+ETX = b'\x03'
+ACK = b'\x06'
+UPPER_DIGITS = string.ascii_uppercase + string.digits
+
+
+def random_mrz(rng: random.Random) -> list:
+    """
+    MRZ lines of a random layout, mostly TD3 (framing only cares about the
+    first line and the length, so the lines after it are random).
+    """
+    fmt = TD3 if rng.random() < 0.6 else rng.choice(list(FORMATS.values()))
+    surname = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 12)))
+    given = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 10)))
+    line1 = f"{fmt.codes[0]}<{rng.choice(['USA', 'PNG', 'AUS'])}{surname}<<{given}".ljust(fmt.width, '<')[:fmt.width]
+    rest = [''.join(rng.choice(UPPER_DIGITS + '<') for _ in range(fmt.width)) for _ in range(fmt.lines - 1)]
+    return [line.encode('ascii') for line in [line1] + rest]
+
+
+def random_message(rng: random.Random):
+    """One scanner message as sent on the wire, and the frame it must decode to."""
+    kind = rng.choice(('mrz_lines', 'mrz_sita', 'barcode', 'qr_utf8'))
+
+    if kind == 'mrz_lines':
+        lines = random_mrz(rng)
+        eol = rng.choice((b'\r\n', b'\r', b'\n'))
+        return b''.join(line + eol for line in lines), Frame(FRAME_MRZ, b''.join(lines))
+    if kind == 'mrz_sita':
+        lines = random_mrz(rng)
+        return STX + b''.join(line + b'\r' for line in lines) + ETX, Frame(FRAME_MRZ, b''.join(lines))
+    if kind == 'barcode':
+        value = ''.join(rng.choice(UPPER_DIGITS) for _ in range(rng.randint(6, 40))).encode('ascii')
+        noise = ACK if rng.random() < 0.3 else b''
+        return noise + STX + value + ETX, Frame(FRAME_ETX, value)
+
+    value = f"GP-{rng.randint(1000, 9999)}-Zürich-€{rng.randint(0, 99)}".encode('utf-8')
+    return STX + value + ETX, Frame(FRAME_ETX, value)
+
+
+def split_randomly(stream: bytes, rng: random.Random, max_chunk: int):
+    """Cut a stream into chunks of 1..max_chunk bytes."""
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(1, max_chunk)
+        yield stream[pos:pos + size]
+        pos += size
+
+
+def fixed_chunks(stream: bytes, size: int):
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def decode(chunks) -> list:
+    decoder = FrameDecoder()
+    frames = []
+    for chunk in chunks:
+        frames.extend(decoder.feed(chunk))
+    return frames
+
+
+def legacy_decode(chunks) -> list:
+    """The previous process_serial_stream buffering (string rebuild on every read)."""
+    frames = []
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode('utf-8', errors='ignore')
+        cleaned = buffer.replace('\r', '').replace('\n', '').replace('\x03', '').replace('\x02', '')
+        if cleaned.startswith('P<') and len(cleaned) >= 88:
+            frames.append(cleaned[:88])
+            buffer = ""
+        elif '\x03' in buffer:
+            frames.append(buffer)
+            buffer = ""
+    return frames
+
+
+def fuzz(rng: random.Random, messages: int, splits: int) -> bool:
+    wire, expected = zip(*(random_message(rng) for _ in range(messages)))
+    stream = b''.join(wire)
+    expected = list(expected)
+
+    failures = 0
+    for i in range(splits):
+        max_chunk = rng.choice((1, 2, 7, 64, 512, 4096))
+        got = decode(split_randomly(stream, rng, max_chunk))
+        if got != expected:
+            failures += 1
+            first_bad = next((n for n, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+            print(f"  split {i} (chunks <= {max_chunk} B): {len(got)} frames, expected {len(expected)}; "
+                  f"first difference at frame {first_bad}")
+
+    # Unterminated barcode (keyboard-style scanner without ETX) comes out on flush
+    decoder = FrameDecoder()
+    decoder.feed(b'ABC')
+    decoder.feed(b'123')
+    if decoder.flush() != Frame(com_bridge.FRAME_PARTIAL, b'ABC123') or decoder.pending:
+        failures += 1
+        print("  idle flush of an unterminated barcode failed")
+
+    legacy_frames = len(legacy_decode(split_randomly(stream, random.Random(0), 64)))
+    print(f"Fuzz: {messages} messages ({len(stream)} bytes), {splits} random splits: "
+          f"{splits - failures}/{splits} exact "
+          f"(old buffering with 64 B reads: {legacy_frames}/{messages} frames)")
+    return failures == 0
+
+
+def throughput(rng: random.Random, messages: int):
+    wire = [random_message(rng)[0] for _ in range(messages)]
+    stream = b''.join(wire)
+    # One long QR payload read a byte at a time: the case the string rebuild is quadratic in
+    long_qr = STX + ''.join(rng.choice(UPPER_DIGITS) for _ in range(3000)).encode('ascii') + ETX
+
+    # The old buffering is cheaper per byte only because it throws away whatever
+    # follows the first frame in a read; compare the frame counts with the expected one
+    print(f"\nThroughput ({messages} frames expected per stream)")
+    print(f"{'input':>24} | {'decoder':>10} {'frames':>7} | {'old':>10} {'frames':>7}")
+    print("-" * 70)
+    cases = [(f"stream, {size} B reads", fixed_chunks(stream, size)) for size in (1, 64, 4096)]
+    cases.append(("3 KB QR, 1 B reads", fixed_chunks(long_qr, 1)))
+
+    for label, chunks in cases:
+        total = sum(len(c) for c in chunks)
+        start = time.perf_counter()
+        new_frames = len(decode(chunks))
+        new_rate = total / (time.perf_counter() - start) / 1e6
+        start = time.perf_counter()
+        old_frames = len(legacy_decode(chunks))
+        old_rate = total / (time.perf_counter() - start) / 1e6
+        print(f"{label:>24} | {new_rate:7.2f}MB/s {new_frames:>7} | {old_rate:7.2f}MB/s {old_frames:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000, help='Messages per stream')
+    parser.add_argument('--splits', type=int, default=100, help='Random splits to check')
+    parser.add_argument('--seed', type=int, default=147, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ok = fuzz(rng, args.messages, args.splits)
+    throughput(rng, args.messages)
+
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,21 +9,29 @@ This service translates that data for web application consumption.
 
 Usage:
     python com_bridge.py
+    python com_bridge.py --scanner desk1=COM29 --scanner desk2=COM30   # hub mode
+    python com_bridge.py --capture scans.jsonl                         # record raw bytes
+    python com_bridge.py --replay scans.jsonl --replay-speed 10        # no hardware
+    python com_bridge.py --synthetic                                   # fake scanner
 
 Requirements:
-    pip install pyserial websockets
+    pip install -r requirements.txt   (pyserial, websockets, ../python-mrz)
 
 Author: GreenPay Team
 """
 
+import argparse
 import asyncio
 import json
 import logging
+import random
 import re
 import sys
+import threading
 import time
 from datetime import datetime
-from typing import Optional, Dict, Any, Set
+from typing import Optional, Dict, Any, Iterable, Iterator, List, NamedTuple, Set, Tuple
+from urllib.parse import parse_qs, urlparse
 
 try:
     import serial
@@ -42,6 +50,15 @@ except ImportError:
         print("ERROR: websockets not installed. Run: pip install websockets")
         sys.exit(1)
 
+try:
+    from icao_mrz import (
+        FORMATS, LENGTHS, LINE_WIDTHS, MRVB, NATIONALITIES, TD1, TD3, MRZFormat, check_digit, format_for_line,
+    )
+    from icao_mrz import parse as parse_fields
+except ImportError:
+    print("ERROR: icao_mrz not installed. Run: pip install -r requirements.txt")
+    sys.exit(1)
+
 # Configuration
 CONFIG = {
     'COM_PORT': 'COM29',           # PrehKeyTec Virtual COM Port
@@ -50,8 +67,29 @@ CONFIG = {
     'WEBSOCKET_PORT': 8765,
     'LOG_LEVEL': 'INFO',
     'RECONNECT_DELAY': 5,          # Seconds between COM port reconnect attempts
+    'READ_TIMEOUT': 1,             # Seconds a blocked serial read waits (reader thread only)
+    'IDLE_TIMEOUT': 0.2,           # Seconds without new bytes before partial data is processed
+    'CLIENT_QUEUE_SIZE': 32,       # Unsent messages per WebSocket client before it is dropped
+    'SEND_TIMEOUT': 5,             # Seconds one WebSocket send may take before the client is dropped
+
+    # Hub mode: several scanners in one process, scanner ID -> COM port.
+    # Empty = single scanner on COM_PORT. Also settable with --scanner ID=PORT.
+    'SCANNERS': {},
+
+    # Capture and replay (testing without hardware)
+    'CAPTURE_FILE': None,          # Record raw scanner bytes with timestamps to this file
+    'REPLAY_SPEED': 1.0,           # Replay speed factor (10 = ten times faster, 0 = no delays)
+    'REPLAY_LOOP': False,          # Restart a replay when it reaches the end of the capture
+    'SYNTHETIC_INTERVAL': 2.0,     # Seconds between scans of the synthetic scanner
 }
 
+# Port names that replace a COM port with a replay source
+REPLAY_PREFIX = 'replay:'          # replay:<capture file>
+SYNTHETIC_PORT = 'synthetic'       # endless generated scans
+
+# Scanner ID used when running a single scanner (no hub configuration)
+DEFAULT_SCANNER_ID = 'default'
+
 # Logging setup
 logging.basicConfig(
     level=getattr(logging, CONFIG['LOG_LEVEL']),
@@ -60,102 +98,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Connected WebSocket clients
-connected_clients: Set = set()
+# Connected WebSocket clients (websocket -> ClientConnection)
+connected_clients: Dict[Any, 'ClientConnection'] = {}
 
-# Country code to nationality mapping (subset for common codes)
-COUNTRY_CODES = {
-    'PNG': 'Papua New Guinean', 'AUS': 'Australian', 'USA': 'American',
-    'GBR': 'British', 'NZL': 'New Zealander', 'FJI': 'Fijian',
-    'IDN': 'Indonesian', 'MYS': 'Malaysian', 'SGP': 'Singaporean',
-    'PHL': 'Filipino', 'JPN': 'Japanese', 'CHN': 'Chinese',
-    'IND': 'Indian', 'DEU': 'German', 'FRA': 'French',
-}
+# Running scanners (scanner ID -> ScannerPort)
+scanner_ports: Dict[str, 'ScannerPort'] = {}
 
+# Raw byte recorder (--capture), shared by all scanners
+capture_writer: Optional['CaptureWriter'] = None
 
-def parse_mrz(mrz_text: str) -> Optional[Dict[str, Any]]:
+# An MRZ inside a longer message: document code, filler or letter, issuing
+# state, then MRZ characters for at least the shortest layout
+MRZ_PATTERN = re.compile(r'(?=([PVIAC][A-Z<]{4}[A-Z0-9<]{%d,}))' % (LENGTHS[0] - 5))
+
+# Countries of the synthetic scanner's documents
+SYNTHETIC_COUNTRIES = ('PNG', 'AUS', 'USA', 'GBR', 'NZL', 'FJI', 'IDN', 'MYS',
+                       'SGP', 'PHL', 'JPN', 'CHN', 'IND', 'DEU', 'FRA')
+
+
+def mrz_format(cleaned: str) -> Optional[MRZFormat]:
     """
-    Parse MRZ text (88 characters, 2 lines of 44) into passport data.
+    Layout of a joined MRZ (no line breaks), or None.
 
-    ICAO 9303 TD3 Format:
-    Line 1: P<ISSUINGCOUNTRYSURNAME<<GIVENNAMES<<<<<<<<<<<<<<<<<<<<
-    Line 2: PASSPORTNUMBER<NATIONALITY<DOBYYMMDDSEXEXPIRYYYMMDD<<<<<<<<<<<<<CHECKDIGITS
+    The first line must look like one of that layout (icao_mrz.format_for_line)
+    and the text must be at least as long as the MRZ. A layout of exactly
+    the text's length wins (a TD1 card also starts like a TD2 one); longer
+    text is read as the MRZ followed by trailer.
+    """
+    fitting = [fmt for fmt in FORMATS.values()
+               if len(cleaned) >= fmt.length and format_for_line(cleaned[:fmt.width]) is fmt]
+    for fmt in fitting:
+        if fmt.length == len(cleaned):
+            return fmt
+    return fitting[0] if fitting else None
+
+
+def parse_mrz(mrz_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse MRZ text into document data.
+
+    ICAO 9303 layouts (fields per layout come from icao_mrz):
+    TD3 passport      2 x 44  P<ISSUINGCOUNTRYSURNAME<<GIVENNAMES<<<<<<<<<<<<<<<<<<<<
+                              PASSPORTNUMBER<NATIONALITY<DOBYYMMDDSEXEXPIRYYYMMDD<<<<<<<<<<<<<CHECKDIGITS
+    TD1 ID card       3 x 30  document number and optional data / dates and nationality / names
+    TD2 ID card       2 x 36  as TD3, shorter lines
+    MRV-A, MRV-B visa 2 x 44, 2 x 36
     """
     # Clean input
     cleaned = mrz_text.replace('\n', '').replace('\r', '').replace(' ', '').upper()
 
-    # Validate length
-    if len(cleaned) < 88:
-        logger.warning(f"MRZ too short: {len(cleaned)} chars (need 88)")
+    # Validate length and layout
+    if len(cleaned) < LENGTHS[0]:
+        logger.warning(f"MRZ too short: {len(cleaned)} chars (need {' / '.join(map(str, LENGTHS))})")
         return None
 
-    # Take first 88 characters
-    cleaned = cleaned[:88]
-
-    # Validate format
-    if not cleaned.startswith('P<'):
-        logger.warning(f"Invalid MRZ format: doesn't start with 'P<'")
+    fmt = mrz_format(cleaned)
+    if fmt is None:
+        logger.warning(f"Invalid MRZ format: {cleaned[:5]!r} starts no known MRZ layout")
         return None
 
-    # Split into lines
-    line1 = cleaned[:44]
-    line2 = cleaned[44:88]
+    # Take the MRZ's characters
+    cleaned = cleaned[:fmt.length]
 
     try:
-        # Parse Line 1: Document type, issuing country, names
-        doc_type = line1[0:2]
-        issuing_country = line1[2:5]
-
-        # Names section (split by <<)
-        names_section = line1[5:]
-        names = names_section.split('<<')
-        surname = names[0].replace('<', ' ').strip()
-        given_name = ' '.join(names[1:]).replace('<', ' ').strip()
-
-        # Parse Line 2: Passport number, nationality, DOB, sex, expiry
-        passport_number = line2[0:9].replace('<', '').strip()
-        passport_check = line2[9:10]
-
-        nationality_code = line2[10:13]
-        nationality = COUNTRY_CODES.get(nationality_code, nationality_code)
-
-        # Date of Birth (YYMMDD)
-        dob_raw = line2[13:19]
-        dob_check = line2[19:20]
-        dob_year = int(dob_raw[0:2])
-        # Year conversion: >current year's YY = 1900s, else 2000s
-        current_yy = datetime.now().year % 100
-        dob_year = 1900 + dob_year if dob_year > current_yy else 2000 + dob_year
-        dob = f"{dob_year}-{dob_raw[2:4]}-{dob_raw[4:6]}"
-
-        # Sex
-        sex_code = line2[20:21]
-        sex = 'Male' if sex_code == 'M' else 'Female' if sex_code == 'F' else 'Other'
-
-        # Expiry date (YYMMDD)
-        expiry_raw = line2[21:27]
-        expiry_check = line2[27:28]
-        expiry_year = int(expiry_raw[0:2])
-        # Expiry dates are typically future, so >50 = 1900s, else 2000s
-        expiry_year = 1900 + expiry_year if expiry_year > 50 else 2000 + expiry_year
-        expiry = f"{expiry_year}-{expiry_raw[2:4]}-{expiry_raw[4:6]}"
-
-        # Personal number (optional)
-        personal_number = line2[28:42].replace('<', '').strip()
+        # Same fields and date pivot as the OCR service (icao_mrz.parse)
+        fields = parse_fields(cleaned, fmt)
+        sex = fields['sex']
 
         return {
             'success': True,
             'type': 'mrz',
-            'passportNumber': passport_number,
-            'surname': surname,
-            'givenName': given_name,
-            'nationality': nationality,
-            'nationalityCode': nationality_code,
-            'dateOfBirth': dob,
-            'sex': sex,
-            'dateOfExpiry': expiry,
-            'issuingCountry': issuing_country,
-            'personalNumber': personal_number if personal_number else None,
+            **fields,
+            'nationality': NATIONALITIES.get(fields['nationality'], fields['nationality']),
+            'nationalityCode': fields['nationality'],
+            'sex': 'Male' if sex == 'M' else 'Female' if sex == 'F' else 'Other',
             'raw': cleaned,
             'timestamp': datetime.now().isoformat(),
         }
@@ -175,7 +191,8 @@ def parse_sita_message(data: str) -> Optional[Dict[str, Any]]:
     - ETX (0x03) end
     - Optional checksum
 
-    For MRZ reading, the message contains the 88-character MRZ string.
+    For MRZ reading, the message contains the MRZ string (88 characters for
+    passports, 72 or 90 for ID cards and visas).
     """
     # Remove SITA framing characters
     cleaned = data.strip()
@@ -184,14 +201,13 @@ def parse_sita_message(data: str) -> Optional[Dict[str, Any]]:
     cleaned = cleaned.replace('\x02', '').replace('\x03', '')
     cleaned = cleaned.replace('\x06', '').replace('\x15', '')
 
-    # Look for MRZ pattern (starts with P<)
-    mrz_match = re.search(r'P<[A-Z0-9<]{86}', cleaned)
-    if mrz_match:
-        mrz_text = mrz_match.group(0)
-        return parse_mrz(mrz_text)
+    # Look for an MRZ run (document code, then MRZ characters only)
+    for mrz_match in MRZ_PATTERN.finditer(cleaned):
+        if mrz_format(mrz_match.group(1)):
+            return parse_mrz(mrz_match.group(1))
 
     # Check if the whole message is MRZ
-    if cleaned.startswith('P<') and len(cleaned) >= 88:
+    if mrz_format(cleaned):
         return parse_mrz(cleaned)
 
     # If not MRZ, return as simple barcode/QR data
@@ -206,39 +222,303 @@ def parse_sita_message(data: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-async def broadcast_to_clients(message: Dict[str, Any]):
-    """Broadcast message to all connected WebSocket clients."""
+# Scanner framing bytes
+STX = 0x02
+ETX = 0x03
+FRAME_DELIMITERS = re.compile(rb'[\x02\x03]')
+# CR/LF separate MRZ lines; ACK/NAK are SITA handshake bytes. None are payload.
+NON_PAYLOAD_BYTES = b'\r\n\x06\x15'
+MRZ_LENGTH = TD3.length  # Passport MRZ, recognised by P< before its first line break arrives
+
+# Frame kinds produced by FrameDecoder
+FRAME_MRZ = 'mrz'          # a whole MRZ (complete as soon as its characters arrive)
+FRAME_ETX = 'etx'          # payload terminated by ETX
+FRAME_PARTIAL = 'partial'  # unterminated payload flushed on idle, STX or size limit
+
+
+class Frame(NamedTuple):
+    """One complete scanner message: payload bytes without framing or CR/LF."""
+    kind: str
+    payload: bytes
+
+    @property
+    def text(self) -> str:
+        """
+        Payload as text.
+
+        Scanners send ASCII, QR codes may carry UTF-8. Anything else is
+        decoded as Latin-1 (one character per byte) so no byte is lost.
+        """
+        try:
+            return self.payload.decode('utf-8')
+        except UnicodeDecodeError:
+            logger.warning(f"Frame is not valid UTF-8, decoding as Latin-1: {self.payload!r}")
+            return self.payload.decode('latin-1')
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for scanner byte streams.
+
+    Bytes are fed as they arrive from the port, split at arbitrary points.
+    Each byte is looked at once: STX/ETX delimit SITA frames, CR/LF and
+    ACK/NAK are dropped, and an MRZ is complete as soon as all its
+    characters are in, whether or not an ETX follows. The first line tells
+    how many that is: at its line break, a payload shaped like the first
+    line of an MRZ layout (icao_mrz.format_for_line) expects 90 (TD1),
+    72 (TD2, MRV-B) or 88 (TD3, MRV-A) characters; a payload starting with
+    P< expects 88 even without line breaks. Frames are decoded to text only
+    when complete, so a multi-byte character split across reads survives.
+
+    Example:
+        >>> decoder = FrameDecoder()
+        >>> decoder.feed(b'\x02ABC')
+        []
+        >>> decoder.feed(b'123\x03')
+        [Frame(kind='etx', payload=b'ABC123')]
+    """
+
+    # A payload this long without a delimiter is not a scan; flush it
+    MAX_FRAME_BYTES = 4096
+
+    def __init__(self):
+        self._payload = bytearray()
+        self._in_stx = False
+        # After an MRZ inside an STX frame, the rest up to ETX is trailer (checksum etc.)
+        self._skip_to_etx = False
+        # MRZ length announced by the payload's first line (0 = not known yet)
+        self._mrz_length = 0
+
+    @property
+    def pending(self) -> bool:
+        """True while an unterminated frame is buffered."""
+        return bool(self._payload) or self._skip_to_etx
+
+    def feed(self, data: bytes) -> List[Frame]:
+        """Consume bytes and return the frames they complete (usually none or one)."""
+        frames: List[Frame] = []
+        start = 0
+
+        for match in FRAME_DELIMITERS.finditer(data):
+            end = match.start()
+            self._append(data[start:end], frames)
+            start = end + 1
+
+            if data[end] == STX:
+                # STX opens a new frame; unterminated data before it stands alone
+                self._take(FRAME_PARTIAL, frames)
+                self._in_stx = True
+            else:
+                if not self._skip_to_etx:
+                    self._take(FRAME_ETX, frames)
+                self._in_stx = False
+            self._skip_to_etx = False
+
+        self._append(data[start:], frames)
+        return frames
+
+    def flush(self) -> Optional[Frame]:
+        """Return buffered unterminated data as a frame (call when the port goes idle)."""
+        frames: List[Frame] = []
+        self._take(FRAME_PARTIAL, frames)
+        self._in_stx = False
+        self._skip_to_etx = False
+        return frames[0] if frames else None
+
+    def _append(self, segment: bytes, frames: List[Frame]):
+        if not segment or self._skip_to_etx:
+            return
+
+        payload = self._payload
+        parts = segment.splitlines()
+        # Parts followed by a line break (all but an unfinished last line)
+        ended = len(parts) if segment[-1] in b'\r\n' else len(parts) - 1
+        for i, part in enumerate(parts):
+            payload += part.translate(None, NON_PAYLOAD_BYTES)
+
+            while True:
+                length = self._mrz_length or (MRZ_LENGTH if payload.startswith(b'P<') else 0)
+                if not length or len(payload) < length:
+                    break
+                frames.append(Frame(FRAME_MRZ, bytes(payload[:length])))
+                del payload[:length]
+                self._mrz_length = 0
+                if self._in_stx:
+                    payload.clear()
+                    self._skip_to_etx = True
+                    return
+
+            if i < ended and not self._mrz_length and len(payload) in LINE_WIDTHS:
+                # End of the payload's first line: does it start an MRZ?
+                fmt = format_for_line(payload.decode('latin-1'))
+                self._mrz_length = fmt.length if fmt else 0
+
+        if len(payload) > self.MAX_FRAME_BYTES:
+            logger.warning(f"No frame delimiter in {len(payload)} bytes, flushing")
+            self._take(FRAME_PARTIAL, frames)
+
+    def _take(self, kind: str, frames: List[Frame]):
+        self._mrz_length = 0
+        if self._payload:
+            frames.append(Frame(kind, bytes(self._payload)))
+            self._payload.clear()
+
+
+class ClientConnection:
+    """
+    A connected WebSocket client with a bounded outbound queue.
+
+    Messages are queued without waiting and sent by the client's own
+    sender task, so a slow or half-dead browser tab never delays other
+    clients. A send that takes longer than SEND_TIMEOUT, or a queue that
+    overflows CLIENT_QUEUE_SIZE, drops the client.
+
+    subscriptions holds the scanner IDs the client receives scans from
+    (None = all scanners).
+    """
+
+    def __init__(self, websocket, subscriptions: Optional[Set[str]] = None):
+        self.websocket = websocket
+        self.subscriptions = subscriptions
+        self.address = getattr(websocket, 'remote_address', None)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CONFIG['CLIENT_QUEUE_SIZE'])
+        self.closed = False
+        self._timed_out = False
+        self._sender = asyncio.create_task(self._send_loop())
+
+    def send(self, payload: str) -> bool:
+        """Queue an already serialised message. Returns False if the queue is full."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _send_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            payload = await self.queue.get()
+
+            # A timer that cancels this task is much cheaper than wait_for(),
+            # which wraps every send in a new task
+            timer = loop.call_later(CONFIG['SEND_TIMEOUT'], self._send_timed_out)
+            try:
+                await self.websocket.send(payload)
+            except asyncio.CancelledError:
+                if self._timed_out:
+                    self.drop(f"send timed out after {CONFIG['SEND_TIMEOUT']}s")
+                    return
+                raise
+            except websockets.exceptions.ConnectionClosed:
+                self.closed = True
+                return
+            except Exception as e:
+                self.drop(f"send failed: {e}")
+                return
+            finally:
+                timer.cancel()
+
+    def _send_timed_out(self):
+        self._timed_out = True
+        self._sender.cancel()
+
+    def drop(self, reason: str):
+        """Disconnect a client that cannot keep up."""
+        if self.closed:
+            return
+        self.closed = True
+        connected_clients.pop(self.websocket, None)
+        logger.warning(f"Dropping client {self.address}: {reason}")
+
+        if asyncio.current_task() is not self._sender:
+            self._sender.cancel()
+        # Closing waits for the close handshake; never block the caller on it
+        asyncio.create_task(self._close_websocket())
+
+    async def _close_websocket(self):
+        try:
+            await self.websocket.close(code=1013, reason='Client too slow')
+        except Exception:
+            pass
+
+    def wants(self, scanner_id: Optional[str]) -> bool:
+        """True if messages from this scanner (None = service-wide) go to this client."""
+        return scanner_id is None or self.subscriptions is None or scanner_id in self.subscriptions
+
+    async def close(self):
+        """Stop sending (client disconnected normally)."""
+        self.closed = True
+        self._sender.cancel()
+
+
+async def broadcast_to_clients(message: Dict[str, Any], scanner_id: Optional[str] = None):
+    """
+    Broadcast message to the connected WebSocket clients.
+
+    The message is serialised once and queued for every client subscribed
+    to scanner_id (all clients if scanner_id is None); sending happens
+    concurrently in each client's sender task, so the broadcast itself
+    never waits on a client.
+    """
     if not connected_clients:
         logger.debug("No clients connected, skipping broadcast")
         return
 
     message_json = json.dumps(message)
-    disconnected = set()
+    recipients = 0
 
-    for client in connected_clients:
-        try:
-            await client.send(message_json)
-            logger.info(f"Sent to client: {message.get('type', 'unknown')}")
-        except websockets.exceptions.ConnectionClosed:
-            disconnected.add(client)
-        except Exception as e:
-            logger.error(f"Error sending to client: {e}")
-            disconnected.add(client)
+    for client in list(connected_clients.values()):
+        if not client.wants(scanner_id):
+            continue
+        if client.send(message_json):
+            recipients += 1
+        else:
+            client.drop(f"outbound queue full ({CONFIG['CLIENT_QUEUE_SIZE']} messages)")
 
-    # Remove disconnected clients
-    for client in disconnected:
-        connected_clients.discard(client)
+    logger.info(f"Broadcast {message.get('type', 'unknown')} to {recipients} client(s)")
+
+
+def parse_subscriptions(value: Any) -> Optional[Set[str]]:
+    """
+    Scanner IDs from a subscribe command or ?scanner= query value.
+
+    Accepts a list or a comma-separated string; 'all', '*' or empty
+    means every scanner (None).
+    """
+    if value is None:
+        return None
+    items = value if isinstance(value, list) else str(value).split(',')
+    ids = {str(item).strip() for item in items if str(item).strip()}
+    if not ids or ids & {'all', '*'}:
+        return None
+    return ids
+
+
+def scanners_status(client: 'ClientConnection') -> List[Dict[str, Any]]:
+    """Health of the scanners a client is subscribed to."""
+    return [port.status() for scanner_id, port in scanner_ports.items() if client.wants(scanner_id)]
 
 
 async def handle_websocket(websocket, path=None):
-    """Handle WebSocket client connection."""
-    connected_clients.add(websocket)
+    """
+    Handle WebSocket client connection.
+
+    Clients receive scans from every scanner unless they subscribe, either
+    with ws://host:8765/?scanner=desk1,desk2 or with the subscribe command.
+    """
+    # websockets < 13 passes the request path; newer versions expose it on the connection
+    path = path or getattr(getattr(websocket, 'request', None), 'path', None) or getattr(websocket, 'path', '')
+    query = parse_qs(urlparse(path or '').query)
+    client = ClientConnection(websocket, parse_subscriptions(query.get('scanner')))
+    connected_clients[websocket] = client
     client_addr = websocket.remote_address
     logger.info(f"Client connected: {client_addr}")
 
     try:
         # Send welcome message
-        await websocket.send(json.dumps({
+        client.send(json.dumps({
             'type': 'connected',
             'message': 'PrehKeyTec COM Bridge connected',
             'timestamp': datetime.now().isoformat(),
@@ -254,17 +534,30 @@ async def handle_websocket(websocket, path=None):
                 cmd = data.get('command')
 
                 if cmd == 'ping':
-                    await websocket.send(json.dumps({
+                    client.send(json.dumps({
                         'type': 'pong',
                         'timestamp': datetime.now().isoformat(),
                     }))
                 elif cmd == 'status':
-                    await websocket.send(json.dumps({
+                    scanners = scanners_status(client)
+                    client.send(json.dumps({
                         'type': 'status',
-                        'comPort': CONFIG['COM_PORT'],
+                        'comPort': scanners[0]['port'] if scanners else None,
+                        'scanners': scanners,
+                        'subscriptions': sorted(client.subscriptions) if client.subscriptions else 'all',
                         'clientsConnected': len(connected_clients),
                         'timestamp': datetime.now().isoformat(),
                     }))
+                elif cmd == 'subscribe':
+                    requested = parse_subscriptions(data.get('scanners'))
+                    unknown = sorted(requested - set(scanner_ports)) if requested else []
+                    client.subscriptions = requested
+                    client.send(json.dumps({
+                        'type': 'subscribed',
+                        'subscriptions': sorted(requested) if requested else 'all',
+                        'unknownScanners': unknown,
+                        'timestamp': datetime.now().isoformat(),
+                    }))
 
             except json.JSONDecodeError:
                 pass
@@ -274,7 +567,8 @@ async def handle_websocket(websocket, path=None):
     except Exception as e:
         logger.error(f"WebSocket handler error: {e}", exc_info=True)
     finally:
-        connected_clients.discard(websocket)
+        connected_clients.pop(websocket, None)
+        await client.close()
         logger.info(f"Client disconnected: {client_addr}")
 
 
@@ -287,133 +581,458 @@ def list_com_ports():
     return ports
 
 
-async def read_com_port():
+def open_serial_port(port: str, baud_rate: int):
     """
-    Read data from COM port and broadcast to WebSocket clients.
+    Open and initialise the scanner's serial port (blocking).
 
-    Handles reconnection if the port becomes unavailable.
+    Run in an executor: opening a (virtual) COM port can block for seconds
+    while the driver is busy.
     """
-    ser = None
-    buffer = ""
-    last_data_time = time.time()
+    # List available ports for debugging
+    list_com_ports()
+
+    ser = serial.Serial(
+        port=port,
+        baudrate=baud_rate,
+        bytesize=serial.EIGHTBITS,
+        parity=serial.PARITY_NONE,
+        stopbits=serial.STOPBITS_ONE,
+        timeout=CONFIG['READ_TIMEOUT'],
+        rtscts=False,
+        dsrdtr=False,
+    )
 
-    while True:
+    # IMPORTANT: Set DTR and RTS active to enable data output
+    # Per PrehKeyTec manual: "DTR and RTS must be set active to initialize
+    # communication and enable data output"
+    ser.dtr = True
+    ser.rts = True
+    logger.info("DTR and RTS set to active (required for PrehKeyTec)")
+    return ser
+
+
+class SerialReader:
+    """
+    Reads a serial port on a background thread and feeds an asyncio queue.
+
+    pyserial is blocking. The thread blocks in ser.read() until bytes
+    arrive, so data reaches the event loop as soon as the scanner sends
+    it, and nothing polls while the kiosk is idle. Each queue item is a
+    bytes chunk; a SerialException is put on the queue instead if the port
+    fails, and the thread exits.
+    """
+
+    def __init__(self, ser, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.ser = ser
+        self.loop = loop
+        self.queue = queue
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"serial-{ser.port}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread (wakes a blocked read) and wait for it."""
+        self._stopped.set()
         try:
-            # Open COM port
-            if ser is None or not ser.is_open:
-                logger.info(f"Opening COM port {CONFIG['COM_PORT']} at {CONFIG['BAUD_RATE']} baud...")
-
-                # List available ports for debugging
-                list_com_ports()
-
-                ser = serial.Serial(
-                    port=CONFIG['COM_PORT'],
-                    baudrate=CONFIG['BAUD_RATE'],
-                    bytesize=serial.EIGHTBITS,
-                    parity=serial.PARITY_NONE,
-                    stopbits=serial.STOPBITS_ONE,
-                    timeout=1,  # 1 second read timeout
-                    rtscts=False,
-                    dsrdtr=False,
-                )
-
-                # IMPORTANT: Set DTR and RTS active to enable data output
-                # Per PrehKeyTec manual: "DTR and RTS must be set active to initialize
-                # communication and enable data output"
-                ser.dtr = True
-                ser.rts = True
-                logger.info("DTR and RTS set to active (required for PrehKeyTec)")
-                logger.info(f"COM port {CONFIG['COM_PORT']} opened successfully")
+            self.ser.cancel_read()
+        except Exception:
+            pass
+        self._thread.join(timeout=CONFIG['READ_TIMEOUT'] + 1)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                # Block for the first byte, then take whatever else has arrived
+                data = self.ser.read(1)
+                if data and self.ser.in_waiting:
+                    data += self.ser.read(self.ser.in_waiting)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    self.loop.call_soon_threadsafe(self.queue.put_nowait, e)
+                return
+
+            if data:
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, data)
+
+
+class ScannerPort:
+    """
+    One scanner on one serial port: reader thread, framing state and
+    reconnect loop.
+
+    In hub mode the bridge runs one ScannerPort per configured scanner, all
+    on the same event loop. Each port costs one blocked reader thread and
+    one task, so one process serves a whole bank of desks. Every message
+    from a port carries its scannerId.
+    """
+
+    def __init__(self, scanner_id: str, port: str, baud_rate: int):
+        self.scanner_id = scanner_id
+        self.port = port
+        self.baud_rate = baud_rate
+
+        # Health, reported by the status command
+        self.connected = False
+        self.last_error: Optional[str] = None
+        self.connected_since: Optional[str] = None
+        self.last_scan_at: Optional[str] = None
+        self.scans = 0
+        self.reconnects = 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'scannerId': self.scanner_id,
+            'port': self.port,
+            'connected': self.connected,
+            'connectedSince': self.connected_since,
+            'lastScanAt': self.last_scan_at,
+            'scans': self.scans,
+            'reconnects': self.reconnects,
+            'lastError': self.last_error,
+        }
+
+    async def broadcast(self, message: Dict[str, Any]):
+        """Tag a message with this scanner and send it to its subscribers."""
+        message['scannerId'] = self.scanner_id
+        await broadcast_to_clients(message, self.scanner_id)
+
+    async def publish_scan(self, parsed: Dict[str, Any]):
+        self.scans += 1
+        self.last_scan_at = datetime.now().isoformat()
+        await self.broadcast(parsed)
+
+    async def process_serial_stream(self, queue: asyncio.Queue):
+        """
+        Frame scanner data from the reader queue and broadcast parsed scans.
+
+        Framing is driven by arriving bytes (see FrameDecoder): a complete
+        88-character MRZ or an ETX is handled as soon as it arrives, and
+        partial data is flushed after IDLE_TIMEOUT seconds without new bytes.
+
+        Raises:
+            serial.SerialException: when the reader reports a port failure
+        """
+        decoder = FrameDecoder()
+
+        while True:
+            try:
+                # Without partial data there is nothing to time out: wait for bytes
+                chunk = await asyncio.wait_for(queue.get(), timeout=CONFIG['IDLE_TIMEOUT'] if decoder.pending else None)
+            except asyncio.TimeoutError:
+                # No new data for IDLE_TIMEOUT: process partial data
+                frame = decoder.flush()
+                if frame:
+                    await self.handle_frame(frame)
+                continue
+
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            logger.debug(f"[{self.scanner_id}] Received: {chunk!r}")
+            if capture_writer:
+                capture_writer.write(self.scanner_id, chunk)
+            for frame in decoder.feed(chunk):
+                await self.handle_frame(frame)
+
+    async def handle_frame(self, frame: Frame):
+        """Parse one decoded frame and broadcast the result."""
+        if frame.kind == FRAME_MRZ:
+            parsed = parse_mrz(frame.text)
+            if parsed:
+                logger.info(f"[{self.scanner_id}] Parsed MRZ: {parsed.get('passportNumber', 'unknown')} - {parsed.get('givenName', '')} {parsed.get('surname', '')}")
+        else:
+            parsed = parse_sita_message(frame.text)
+            if parsed:
+                logger.info(f"[{self.scanner_id}] Parsed {parsed.get('type', 'unknown')} ({frame.kind}): {parsed}")
+
+        if parsed:
+            await self.publish_scan(parsed)
+
+    async def run(self):
+        """
+        Read data from the COM port and broadcast to WebSocket clients.
+
+        The port is opened off the event loop and read by a SerialReader
+        thread; framing runs on the event loop as bytes arrive. Handles
+        reconnection if the port becomes unavailable.
+        """
+        while True:
+            close_source = None
+
+            try:
+                queue: asyncio.Queue = asyncio.Queue()
+                close_source = await self.open_source(queue)
+
+                self.connected = True
+                self.connected_since = datetime.now().isoformat()
+                self.last_error = None
 
                 # Notify clients
-                await broadcast_to_clients({
+                await self.broadcast({
                     'type': 'com_connected',
-                    'port': CONFIG['COM_PORT'],
+                    'port': self.port,
+                    'timestamp': datetime.now().isoformat(),
+                })
+
+                await self.process_serial_stream(queue)
+
+            except serial.SerialException as e:
+                logger.error(f"[{self.scanner_id}] COM port error: {e}")
+                self.last_error = str(e)
+
+                # Notify clients
+                await self.broadcast({
+                    'type': 'com_error',
+                    'port': self.port,
+                    'error': str(e),
                     'timestamp': datetime.now().isoformat(),
                 })
 
-            # Read available data
-            if ser.in_waiting > 0:
-                data = ser.read(ser.in_waiting).decode('utf-8', errors='ignore')
-                buffer += data
-                last_data_time = time.time()
-
-                logger.debug(f"Received: {repr(data)}")
-
-                # Clean buffer of control characters for MRZ detection
-                cleaned = buffer.replace('\r', '').replace('\n', '').replace('\x03', '').replace('\x02', '')
-
-                # Check if we have a complete MRZ (88 printable chars starting with P<)
-                if cleaned.startswith('P<') and len(cleaned) >= 88:
-                    # Extract MRZ and parse
-                    mrz_data = cleaned[:88]
-                    parsed = parse_mrz(mrz_data)
-
-                    if parsed:
-                        logger.info(f"Parsed MRZ: {parsed.get('passportNumber', 'unknown')} - {parsed.get('givenName', '')} {parsed.get('surname', '')}")
-                        await broadcast_to_clients(parsed)
-
-                    # Clear buffer after successful MRZ parse
-                    buffer = ""
-
-                # Check for ETX (end of transmission) for non-MRZ data
-                elif '\x03' in buffer:
-                    parsed = parse_sita_message(buffer)
-                    if parsed:
-                        logger.info(f"Parsed {parsed.get('type', 'unknown')}: {parsed}")
-                        await broadcast_to_clients(parsed)
-                    buffer = ""
-
-            # Timeout: if we have partial data and no new data for 200ms, process it
-            elif buffer and (time.time() - last_data_time > 0.2):
-                cleaned = buffer.replace('\r', '').replace('\n', '').strip()
-                if len(cleaned) >= 3:
-                    # Try to parse as MRZ first
-                    if cleaned.startswith('P<') and len(cleaned) >= 88:
-                        parsed = parse_mrz(cleaned[:88])
-                    else:
-                        parsed = parse_sita_message(buffer)
-
-                    if parsed:
-                        logger.info(f"Parsed (timeout): {parsed.get('type', 'unknown')}")
-                        await broadcast_to_clients(parsed)
-                buffer = ""
-
-            # Small delay to prevent busy loop
-            await asyncio.sleep(0.05)
-
-        except serial.SerialException as e:
-            logger.error(f"COM port error: {e}")
-
-            # Notify clients
-            await broadcast_to_clients({
-                'type': 'com_error',
-                'error': str(e),
-                'timestamp': datetime.now().isoformat(),
-            })
-
-            # Close and reconnect
-            if ser:
-                try:
-                    ser.close()
-                except:
-                    pass
-                ser = None
-
-            logger.info(f"Reconnecting in {CONFIG['RECONNECT_DELAY']} seconds...")
-            await asyncio.sleep(CONFIG['RECONNECT_DELAY'])
-
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}", exc_info=True)
-            await asyncio.sleep(1)
+                logger.info(f"[{self.scanner_id}] Reconnecting in {CONFIG['RECONNECT_DELAY']} seconds...")
+                await asyncio.sleep(CONFIG['RECONNECT_DELAY'])
+
+            except Exception as e:
+                logger.error(f"[{self.scanner_id}] Unexpected error: {e}", exc_info=True)
+                self.last_error = str(e)
+                await asyncio.sleep(1)
+
+            finally:
+                if self.connected:
+                    self.reconnects += 1
+                self.connected = False
+
+                # Close and reconnect
+                if close_source:
+                    await close_source()
+
+    async def open_source(self, queue: asyncio.Queue):
+        """
+        Open the COM port and start putting its bytes (or a port exception) on queue.
+
+        Returns:
+            Coroutine function that stops reading and closes the port
+        """
+        loop = asyncio.get_running_loop()
+
+        logger.info(f"[{self.scanner_id}] Opening COM port {self.port} at {self.baud_rate} baud...")
+        ser = await loop.run_in_executor(None, open_serial_port, self.port, self.baud_rate)
+        logger.info(f"[{self.scanner_id}] COM port {self.port} opened successfully")
+
+        reader = SerialReader(ser, loop, queue)
+        reader.start()
+
+        async def close():
+            # Off the event loop: stopping the reader and closing the port can block
+            await loop.run_in_executor(None, reader.stop)
+            try:
+                await loop.run_in_executor(None, ser.close)
+            except Exception:
+                pass
+
+        return close
+
+
+class CaptureWriter:
+    """
+    Records raw scanner bytes to a JSON Lines capture file.
+
+    The first line is a header, every other line one read from a port:
+    {"t": seconds since capture start, "scanner": scanner ID, "hex": bytes}.
+    Lines are flushed as they are written, so a capture survives a crash.
+    Replay it with --replay or a replay:<file> port.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.monotonic()
+        self.file = open(path, 'w', encoding='utf-8')
+        self._write_line({
+            'capture': 'com_bridge',
+            'version': 1,
+            'startedAt': datetime.now().isoformat(),
+            'baudRate': CONFIG['BAUD_RATE'],
+        })
+
+    def write(self, scanner_id: str, data: bytes):
+        self._write_line({
+            't': round(time.monotonic() - self.started, 6),
+            'scanner': scanner_id,
+            'hex': data.hex(),
+        })
+
+    def close(self):
+        self.file.close()
+
+    def _write_line(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+
+def read_capture(path: str, scanner_id: Optional[str] = None) -> List[Tuple[float, bytes]]:
+    """
+    Load the reads recorded by CaptureWriter.
+
+    Args:
+        scanner_id: Only this scanner's reads, if the capture has any for it
+            (a hub capture holds several interleaved scanners); otherwise all
+
+    Returns:
+        (seconds since capture start, bytes) in recorded order
+    """
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    reads = [r for r in records if 'hex' in r]
+
+    if any(r.get('scanner') == scanner_id for r in reads):
+        reads = [r for r in reads if r.get('scanner') == scanner_id]
+
+    return [(float(r['t']), bytes.fromhex(r['hex'])) for r in reads]
+
+
+def synthetic_mrz(rng: random.Random, fmt: MRZFormat) -> List[str]:
+    """A fictitious MRZ of one layout with valid check digits, as its lines."""
+    country = rng.choice(SYNTHETIC_COUNTRIES)
+    surname = rng.choice(['SMITH', 'KAUPA', 'NGUYEN', 'TAUFA', 'BROWN', 'WANG', 'SINGH', 'RAMOS'])
+    given = rng.choice(['JOHN', 'MARIA', 'PETER', 'GRACE', 'DAVID', 'MERE', 'LINH', 'ANA'])
+    values = {
+        'documentCode': fmt.codes[0] + '<',
+        'issuingCountry': country,
+        'names': f"{surname}<<{given}",
+        'passportNumber': rng.choice('ABCNPX') + ''.join(rng.choice('0123456789') for _ in range(7)) + '<',
+        'nationality': country,
+        'dateOfBirth': f"{rng.randint(50, 99):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+        'sex': rng.choice('MF'),
+        'dateOfExpiry': f"{rng.randint(27, 36):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+    }
+
+    chars = ['<'] * fmt.length
+    for field in fmt.fields:
+        value = values.get(field.name, '')[:field.end - field.start]
+        chars[field.start:field.start + len(value)] = value
+    for check in fmt.checks:  # Composite last, over the digits set before it
+        data = ''.join(chars[p] for p in check.positions)
+        if not (check.optional and data.strip('<') == ''):
+            chars[check.check] = str(check_digit(data))
+    return fmt.split(''.join(chars))
+
+
+def synthetic_scan(rng: random.Random) -> List[bytes]:
+    """
+    One fictitious scan as the MC147 sends it, split into its reads.
+
+    Mostly TD3 passport MRZs, some TD1 ID cards and MRV-B visas (CR/LF-
+    terminated lines with valid check digits); every fifth scan or so is an
+    STX/ETX barcode.
+    """
+    kind = rng.random()
+    if kind < 0.2:
+        value = ''.join(rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ0123456789') for _ in range(rng.randint(8, 24)))
+        return [b'\x02' + value.encode('ascii') + b'\x03']
+
+    fmt = TD1 if kind < 0.3 else MRVB if kind < 0.35 else TD3
+    return [line.encode('ascii') + b'\r\n' for line in synthetic_mrz(rng, fmt)]
+
+
+def synthetic_scan_events(interval: float, baud_rate: int, seed: Optional[int] = None) -> Iterator[Tuple[float, bytes]]:
+    """
+    Endless synthetic scans as (seconds since start, bytes) replay events.
+
+    A scan starts every interval seconds; its reads are spaced by the time
+    their bytes take on the wire at baud_rate (10 bits per byte).
+    """
+    rng = random.Random(seed)
+    t = 0.0
+    while True:
+        offset = t
+        for chunk in synthetic_scan(rng):
+            offset += len(chunk) * 10 / baud_rate
+            yield offset, chunk
+        t += interval
+
+
+class ReplayPort(ScannerPort):
+    """
+    A scanner fed from a capture file (replay:<file>) or the synthetic
+    scanner (synthetic) instead of a COM port.
+
+    The bytes go through the same framing, parsing and broadcast as serial
+    data, paced by their recorded timestamps divided by REPLAY_SPEED, so
+    the bridge can be load-tested on a machine without a scanner.
+    """
+
+    def __init__(self, scanner_id: str, port: str, baud_rate: int):
+        super().__init__(scanner_id, port, baud_rate)
+        self.speed = CONFIG['REPLAY_SPEED']
+        self.loop_replay = CONFIG['REPLAY_LOOP']
+
+    def events(self) -> Iterable[Tuple[float, bytes]]:
+        """The (seconds since start, bytes) reads to replay."""
+        if self.port == SYNTHETIC_PORT:
+            return synthetic_scan_events(CONFIG['SYNTHETIC_INTERVAL'], self.baud_rate)
+        return read_capture(self.port[len(REPLAY_PREFIX):], self.scanner_id)
+
+    def deliver(self, queue: asyncio.Queue, data: bytes):
+        """Hand one read to the framing loop, as SerialReader does."""
+        queue.put_nowait(data)
+
+    async def open_source(self, queue: asyncio.Queue):
+        pace = f"{self.speed}x speed" if self.speed else "full speed (no delays)"
+        logger.info(f"[{self.scanner_id}] Replaying {self.port} at {pace}")
+        task = asyncio.create_task(self._replay(queue))
+
+        async def close():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        return close
+
+    async def _replay(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+            for t, data in self.events():
+                if self.speed:
+                    delay = start + t / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    # Still yield, or an endless source would starve the event loop
+                    await asyncio.sleep(0)
+                self.deliver(queue, data)
+
+            if not self.loop_replay:
+                logger.info(f"[{self.scanner_id}] Replay of {self.port} finished")
+                return
+
+
+def create_scanner_port(scanner_id: str, port: str) -> ScannerPort:
+    """ScannerPort for a COM port, or a ReplayPort for replay:<file> / synthetic."""
+    if port == SYNTHETIC_PORT or port.startswith(REPLAY_PREFIX):
+        return ReplayPort(scanner_id, port, CONFIG['BAUD_RATE'])
+    return ScannerPort(scanner_id, port, CONFIG['BAUD_RATE'])
+
+
+def configured_scanners() -> Dict[str, str]:
+    """Scanner ID -> port: CONFIG['SCANNERS'] in hub mode, else the single COM_PORT."""
+    return dict(CONFIG['SCANNERS']) or {DEFAULT_SCANNER_ID: CONFIG['COM_PORT']}
 
 
 async def main():
     """Main entry point."""
+    global capture_writer
+    scanners = configured_scanners()
+
     logger.info("=" * 60)
     logger.info("PrehKeyTec MC147 COM Port Bridge Service")
     logger.info("=" * 60)
-    logger.info(f"COM Port: {CONFIG['COM_PORT']}")
+    for scanner_id, port in scanners.items():
+        logger.info(f"Scanner {scanner_id}: {port}")
     logger.info(f"WebSocket: ws://{CONFIG['WEBSOCKET_HOST']}:{CONFIG['WEBSOCKET_PORT']}")
     logger.info("=" * 60)
 
@@ -425,8 +1044,14 @@ async def main():
     )
     logger.info(f"WebSocket server started on ws://{CONFIG['WEBSOCKET_HOST']}:{CONFIG['WEBSOCKET_PORT']}")
 
-    # Start COM port reader
-    com_task = asyncio.create_task(read_com_port())
+    if CONFIG['CAPTURE_FILE']:
+        capture_writer = CaptureWriter(CONFIG['CAPTURE_FILE'])
+        logger.info(f"Capturing raw scanner bytes to {CONFIG['CAPTURE_FILE']}")
+
+    # Start one reader per COM port
+    for scanner_id, port in scanners.items():
+        scanner_ports[scanner_id] = create_scanner_port(scanner_id, port)
+    com_tasks = [asyncio.create_task(port.run()) for port in scanner_ports.values()]
 
     logger.info("Service running. Press Ctrl+C to stop.")
     logger.info("Connect web app to: ws://localhost:8765")
@@ -434,16 +1059,59 @@ async def main():
     try:
         await asyncio.gather(
             ws_server.wait_closed(),
-            com_task,
+            *com_tasks,
         )
     except asyncio.CancelledError:
         logger.info("Shutting down...")
     finally:
         ws_server.close()
         await ws_server.wait_closed()
+        if capture_writer:
+            capture_writer.close()
+
+
+def parse_args():
+    """Command-line overrides for CONFIG."""
+    parser = argparse.ArgumentParser(description="PrehKeyTec COM Port Bridge Service")
+    parser.add_argument('--port', help=f"COM port of a single scanner (default {CONFIG['COM_PORT']})")
+    parser.add_argument('--scanner', action='append', default=[], metavar='ID=PORT',
+                        help="Hub mode: add a scanner, e.g. --scanner desk1=COM29 --scanner desk2=COM30")
+    parser.add_argument('--websocket-port', type=int, help=f"WebSocket port (default {CONFIG['WEBSOCKET_PORT']})")
+    parser.add_argument('--capture', metavar='FILE', help="Record raw scanner bytes with timestamps to FILE")
+    parser.add_argument('--replay', metavar='FILE', help="Replay a capture instead of reading the COM port")
+    parser.add_argument('--synthetic', action='store_true', help="Generate fake scans instead of reading the COM port")
+    parser.add_argument('--replay-speed', type=float,
+                        help=f"Replay speed factor, 0 = no delays (default {CONFIG['REPLAY_SPEED']})")
+    parser.add_argument('--replay-loop', action='store_true', help="Restart the replay at the end of the capture")
+    parser.add_argument('--synthetic-interval', type=float,
+                        help=f"Seconds between synthetic scans (default {CONFIG['SYNTHETIC_INTERVAL']})")
+    args = parser.parse_args()
+
+    if args.port:
+        CONFIG['COM_PORT'] = args.port
+    if args.replay:
+        CONFIG['COM_PORT'] = REPLAY_PREFIX + args.replay
+    if args.synthetic:
+        CONFIG['COM_PORT'] = SYNTHETIC_PORT
+    if args.capture:
+        CONFIG['CAPTURE_FILE'] = args.capture
+    if args.replay_speed is not None:
+        CONFIG['REPLAY_SPEED'] = args.replay_speed
+    if args.replay_loop:
+        CONFIG['REPLAY_LOOP'] = True
+    if args.synthetic_interval:
+        CONFIG['SYNTHETIC_INTERVAL'] = args.synthetic_interval
+    if args.websocket_port:
+        CONFIG['WEBSOCKET_PORT'] = args.websocket_port
+    for entry in args.scanner:
+        scanner_id, _, port = entry.partition('=')
+        if not scanner_id or not port:
+            parser.error(f"--scanner expects ID=PORT, got {entry!r}")
+        CONFIG['SCANNERS'][scanner_id] = port
 
 
 if __name__ == '__main__':
+    parse_args()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,16 @@
+"""
+ICAO 9303 MRZ layouts, field parsing and country codes shared by the
+GreenPay OCR service and COM bridge.
+
+Pure Python, no dependencies (the COM bridge runs on counter PCs with
+Python 3.8+).
+"""
+from icao_mrz.formats import (
+    ALNUM, ALPHA, CARD_CODES, DOCUMENT_CODES, FILLER, FORMATS, LENGTHS, LINE_WIDTHS, MRVA, MRVB,
+    NUMERIC, PASSPORT_CODES, TD1, TD2, TD3, VISA_CODES, CheckField, Field, MRZFormat,
+    check_digit, detect_format, format_for_line, format_for_width,
+)
+from icao_mrz.countries import COUNTRY_CODES, COUNTRY_NAMES, NATIONALITIES
+from icao_mrz.parser import EXPIRY_YEARS_AHEAD, mrz_date, parse, split_names
+
+__version__ = "1.1.0"
@@ -0,0 +1,314 @@
+"""
+ICAO 9303 Country Codes
+
+Every code an MRZ may carry as issuing state or nationality: the ISO 3166-1
+alpha-3 codes plus the ICAO-specific ones (Germany's single-letter D,
+British nationality classes, UN agencies, other organisations, stateless
+persons and refugees). The table is parsed once at import into plain dicts:
+
+- COUNTRY_CODES: frozenset of the codes
+- COUNTRY_NAMES: code -> country or organisation name
+- NATIONALITIES: code -> nationality as printed on a boarding pass
+
+Codes are looked up as they appear in the MRZ field, with or without the
+filler padding a shorter code ('D' and 'D<<' are both Germany).
+
+Example:
+    >>> NATIONALITIES["PNG"], COUNTRY_NAMES["D<<"]
+    ('Papua New Guinean', 'Germany')
+"""
+from typing import Dict
+
+# code | country | nationality
+_TABLE = """
+AFG|Afghanistan|Afghan
+ALA|Aland Islands|Aland Islander
+ALB|Albania|Albanian
+DZA|Algeria|Algerian
+ASM|American Samoa|American Samoan
+AND|Andorra|Andorran
+AGO|Angola|Angolan
+AIA|Anguilla|Anguillian
+ATA|Antarctica|Antarctic
+ATG|Antigua and Barbuda|Antiguan
+ARG|Argentina|Argentine
+ARM|Armenia|Armenian
+ABW|Aruba|Aruban
+AUS|Australia|Australian
+AUT|Austria|Austrian
+AZE|Azerbaijan|Azerbaijani
+BHS|Bahamas|Bahamian
+BHR|Bahrain|Bahraini
+BGD|Bangladesh|Bangladeshi
+BRB|Barbados|Barbadian
+BLR|Belarus|Belarusian
+BEL|Belgium|Belgian
+BLZ|Belize|Belizean
+BEN|Benin|Beninese
+BMU|Bermuda|Bermudian
+BTN|Bhutan|Bhutanese
+BOL|Bolivia|Bolivian
+BES|Bonaire, Sint Eustatius and Saba|Dutch Caribbean
+BIH|Bosnia and Herzegovina|Bosnian
+BWA|Botswana|Motswana
+BVT|Bouvet Island|Bouvet Islander
+BRA|Brazil|Brazilian
+IOT|British Indian Ocean Territory|British Indian Ocean Territory
+BRN|Brunei Darussalam|Bruneian
+BGR|Bulgaria|Bulgarian
+BFA|Burkina Faso|Burkinabe
+BDI|Burundi|Burundian
+CPV|Cabo Verde|Cabo Verdean
+KHM|Cambodia|Cambodian
+CMR|Cameroon|Cameroonian
+CAN|Canada|Canadian
+CYM|Cayman Islands|Caymanian
+CAF|Central African Republic|Central African
+TCD|Chad|Chadian
+CHL|Chile|Chilean
+CHN|China|Chinese
+CXR|Christmas Island|Christmas Islander
+CCK|Cocos (Keeling) Islands|Cocos Islander
+COL|Colombia|Colombian
+COM|Comoros|Comoran
+COG|Congo|Congolese
+COD|Congo, Democratic Republic of the|Congolese
+COK|Cook Islands|Cook Islander
+CRI|Costa Rica|Costa Rican
+CIV|Cote d'Ivoire|Ivorian
+HRV|Croatia|Croatian
+CUB|Cuba|Cuban
+CUW|Curacao|Curacaoan
+CYP|Cyprus|Cypriot
+CZE|Czechia|Czech
+DNK|Denmark|Danish
+DJI|Djibouti|Djiboutian
+DMA|Dominica|Dominican
+DOM|Dominican Republic|Dominican
+ECU|Ecuador|Ecuadorian
+EGY|Egypt|Egyptian
+SLV|El Salvador|Salvadoran
+GNQ|Equatorial Guinea|Equatorial Guinean
+ERI|Eritrea|Eritrean
+EST|Estonia|Estonian
+SWZ|Eswatini|Swazi
+ETH|Ethiopia|Ethiopian
+FLK|Falkland Islands|Falkland Islander
+FRO|Faroe Islands|Faroese
+FJI|Fiji|Fijian
+FIN|Finland|Finnish
+FRA|France|French
+GUF|French Guiana|French Guianese
+PYF|French Polynesia|French Polynesian
+ATF|French Southern Territories|French Southern Territories
+GAB|Gabon|Gabonese
+GMB|Gambia|Gambian
+GEO|Georgia|Georgian
+DEU|Germany|German
+GHA|Ghana|Ghanaian
+GIB|Gibraltar|Gibraltarian
+GRC|Greece|Greek
+GRL|Greenland|Greenlandic
+GRD|Grenada|Grenadian
+GLP|Guadeloupe|Guadeloupean
+GUM|Guam|Guamanian
+GTM|Guatemala|Guatemalan
+GGY|Guernsey|Guernsey
+GIN|Guinea|Guinean
+GNB|Guinea-Bissau|Bissau-Guinean
+GUY|Guyana|Guyanese
+HTI|Haiti|Haitian
+HMD|Heard Island and McDonald Islands|Heard Island
+VAT|Holy See|Vatican
+HND|Honduras|Honduran
+HKG|Hong Kong|Hong Konger
+HUN|Hungary|Hungarian
+ISL|Iceland|Icelandic
+IND|India|Indian
+IDN|Indonesia|Indonesian
+IRN|Iran|Iranian
+IRQ|Iraq|Iraqi
+IRL|Ireland|Irish
+IMN|Isle of Man|Manx
+ISR|Israel|Israeli
+ITA|Italy|Italian
+JAM|Jamaica|Jamaican
+JPN|Japan|Japanese
+JEY|Jersey|Jersey
+JOR|Jordan|Jordanian
+KAZ|Kazakhstan|Kazakh
+KEN|Kenya|Kenyan
+KIR|Kiribati|I-Kiribati
+PRK|Korea, Democratic People's Republic of|North Korean
+KOR|Korea, Republic of|South Korean
+KWT|Kuwait|Kuwaiti
+KGZ|Kyrgyzstan|Kyrgyz
+LAO|Lao People's Democratic Republic|Lao
+LVA|Latvia|Latvian
+LBN|Lebanon|Lebanese
+LSO|Lesotho|Mosotho
+LBR|Liberia|Liberian
+LBY|Libya|Libyan
+LIE|Liechtenstein|Liechtensteiner
+LTU|Lithuania|Lithuanian
+LUX|Luxembourg|Luxembourgish
+MAC|Macao|Macanese
+MDG|Madagascar|Malagasy
+MWI|Malawi|Malawian
+MYS|Malaysia|Malaysian
+MDV|Maldives|Maldivian
+MLI|Mali|Malian
+MLT|Malta|Maltese
+MHL|Marshall Islands|Marshallese
+MTQ|Martinique|Martiniquais
+MRT|Mauritania|Mauritanian
+MUS|Mauritius|Mauritian
+MYT|Mayotte|Mahoran
+MEX|Mexico|Mexican
+FSM|Micronesia|Micronesian
+MDA|Moldova|Moldovan
+MCO|Monaco|Monegasque
+MNG|Mongolia|Mongolian
+MNE|Montenegro|Montenegrin
+MSR|Montserrat|Montserratian
+MAR|Morocco|Moroccan
+MOZ|Mozambique|Mozambican
+MMR|Myanmar|Myanma
+NAM|Namibia|Namibian
+NRU|Nauru|Nauruan
+NPL|Nepal|Nepali
+NLD|Netherlands|Dutch
+NCL|New Caledonia|New Caledonian
+NZL|New Zealand|New Zealander
+NIC|Nicaragua|Nicaraguan
+NER|Niger|Nigerien
+NGA|Nigeria|Nigerian
+NIU|Niue|Niuean
+NFK|Norfolk Island|Norfolk Islander
+MKD|North Macedonia|Macedonian
+MNP|Northern Mariana Islands|Northern Mariana Islander
+NOR|Norway|Norwegian
+OMN|Oman|Omani
+PAK|Pakistan|Pakistani
+PLW|Palau|Palauan
+PSE|Palestine, State of|Palestinian
+PAN|Panama|Panamanian
+PNG|Papua New Guinea|Papua New Guinean
+PRY|Paraguay|Paraguayan
+PER|Peru|Peruvian
+PHL|Philippines|Filipino
+PCN|Pitcairn|Pitcairn Islander
+POL|Poland|Polish
+PRT|Portugal|Portuguese
+PRI|Puerto Rico|Puerto Rican
+QAT|Qatar|Qatari
+REU|Reunion|Reunionese
+ROU|Romania|Romanian
+RUS|Russian Federation|Russian
+RWA|Rwanda|Rwandan
+BLM|Saint Barthelemy|Barthelemois
+SHN|Saint Helena, Ascension and Tristan da Cunha|Saint Helenian
+KNA|Saint Kitts and Nevis|Kittitian
+LCA|Saint Lucia|Saint Lucian
+MAF|Saint Martin (French part)|Saint-Martinoise
+SPM|Saint Pierre and Miquelon|Saint-Pierrais
+VCT|Saint Vincent and the Grenadines|Vincentian
+WSM|Samoa|Samoan
+SMR|San Marino|Sammarinese
+STP|Sao Tome and Principe|Sao Tomean
+SAU|Saudi Arabia|Saudi
+SEN|Senegal|Senegalese
+SRB|Serbia|Serbian
+SYC|Seychelles|Seychellois
+SLE|Sierra Leone|Sierra Leonean
+SGP|Singapore|Singaporean
+SXM|Sint Maarten (Dutch part)|Sint Maartener
+SVK|Slovakia|Slovak
+SVN|Slovenia|Slovenian
+SLB|Solomon Islands|Solomon Islander
+SOM|Somalia|Somali
+ZAF|South Africa|South African
+SGS|South Georgia and the South Sandwich Islands|South Georgian
+SSD|South Sudan|South Sudanese
+ESP|Spain|Spanish
+LKA|Sri Lanka|Sri Lankan
+SDN|Sudan|Sudanese
+SUR|Suriname|Surinamese
+SJM|Svalbard and Jan Mayen|Svalbard
+SWE|Sweden|Swedish
+CHE|Switzerland|Swiss
+SYR|Syrian Arab Republic|Syrian
+TWN|Taiwan|Taiwanese
+TJK|Tajikistan|Tajik
+TZA|Tanzania|Tanzanian
+THA|Thailand|Thai
+TLS|Timor-Leste|Timorese
+TGO|Togo|Togolese
+TKL|Tokelau|Tokelauan
+TON|Tonga|Tongan
+TTO|Trinidad and Tobago|Trinidadian
+TUN|Tunisia|Tunisian
+TUR|Turkiye|Turkish
+TKM|Turkmenistan|Turkmen
+TCA|Turks and Caicos Islands|Turks and Caicos Islander
+TUV|Tuvalu|Tuvaluan
+UGA|Uganda|Ugandan
+UKR|Ukraine|Ukrainian
+ARE|United Arab Emirates|Emirati
+GBR|United Kingdom|British
+USA|United States|American
+UMI|United States Minor Outlying Islands|American
+URY|Uruguay|Uruguayan
+UZB|Uzbekistan|Uzbek
+VUT|Vanuatu|Ni-Vanuatu
+VEN|Venezuela|Venezuelan
+VNM|Viet Nam|Vietnamese
+VGB|Virgin Islands (British)|British Virgin Islander
+VIR|Virgin Islands (U.S.)|U.S. Virgin Islander
+WLF|Wallis and Futuna|Wallisian
+ESH|Western Sahara|Sahrawi
+YEM|Yemen|Yemeni
+ZMB|Zambia|Zambian
+ZWE|Zimbabwe|Zimbabwean
+D<<|Germany|German
+GBD|United Kingdom|British Overseas Territories Citizen
+GBN|United Kingdom|British National (Overseas)
+GBO|United Kingdom|British Overseas Citizen
+GBP|United Kingdom|British Protected Person
+GBS|United Kingdom|British Subject
+RKS|Kosovo|Kosovar
+EUE|European Union|European Union
+UNO|United Nations|United Nations
+UNA|United Nations specialized agency|United Nations
+UNK|Kosovo (UNMIK)|Kosovo resident
+XBA|African Development Bank|African Development Bank
+XIM|African Export-Import Bank|African Export-Import Bank
+XCC|Caribbean Community|Caribbean Community
+XCE|Council of Europe|Council of Europe
+XCO|Common Market for Eastern and Southern Africa|COMESA
+XEC|Economic Community of West African States|ECOWAS
+XES|Organisation of Eastern Caribbean States|OECS
+XMP|Parliamentary Assembly of the Mediterranean|Parliamentary Assembly of the Mediterranean
+XDC|Southern African Development Community|SADC
+XOM|Sovereign Military Order of Malta|Sovereign Military Order of Malta
+XPO|INTERPOL|INTERPOL
+XXA|Stateless|Stateless
+XXB|Refugee (1951 Convention)|Refugee
+XXC|Refugee|Refugee
+XXX|Unspecified|Unspecified
+"""
+
+
+def _lookups():
+    names: Dict[str, str] = {}
+    nationalities: Dict[str, str] = {}
+    for row in _TABLE.strip().splitlines():
+        code, name, nationality = row.split("|")
+        for key in {code, code.rstrip("<")}:
+            names[key] = name
+            nationalities[key] = nationality
+    return names, nationalities
+
+
+COUNTRY_NAMES, NATIONALITIES = _lookups()
+COUNTRY_CODES = frozenset(COUNTRY_NAMES)
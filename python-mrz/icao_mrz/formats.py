@@ -0,0 +1,258 @@
+"""
+ICAO 9303 MRZ Layouts
+
+One declarative table for every machine readable zone the services read:
+
+    format  lines x width  length  documents
+    TD1     3 x 30         90      ID cards (I, A, C)
+    TD2     2 x 36         72      ID cards and travel documents (I, A, C)
+    TD3     2 x 44         88      passports (P)
+    MRVA    2 x 44         88      visas, format A (V)
+    MRVB    2 x 36         72      visas, format B (V)
+
+Positions are indices into the joined MRZ (the lines concatenated without
+line breaks), so a field is one slice and a check digit one index whatever
+line it is on. Each layout lists:
+
+- fields: name (the camelCase response key), slice and character class
+  (ALPHA: letters and '<', NUMERIC: digits, ALNUM: either)
+- checks: the check digits, the positions each one covers and whether a
+  '<' check digit is accepted for an empty field
+- position_types: the character class of every position, derived from the
+  fields and checks when the table is built (check digits are NUMERIC)
+
+The document number is called passportNumber in every layout, as in the
+scan responses.
+
+Example:
+    >>> fmt = detect_format("I<UTOD231458907<<<<<<<<<<<<<<<"
+    ...                     "7408122F1204159UTO<<<<<<<<<<<6"
+    ...                     "ERIKSSON<<ANNA<MARIA<<<<<<<<<<")
+    >>> fmt.name, fmt.field("passportNumber")
+    ('TD1', Field(name='passportNumber', start=5, end=14, kind='X'))
+    >>> format_for_line("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<").length
+    88
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+ALPHA = "A"
+NUMERIC = "N"
+ALNUM = "X"
+
+FILLER = "<"
+WEIGHTS = (7, 3, 1)
+
+# First character of the document code per document type
+PASSPORT_CODES = "P"
+VISA_CODES = "V"
+CARD_CODES = "IAC"
+DOCUMENT_CODES = PASSPORT_CODES + VISA_CODES + CARD_CODES
+
+
+class Field(NamedTuple):
+    """One data field: joined-MRZ slice [start, end) and character class."""
+    name: str
+    start: int
+    end: int
+    kind: str
+
+
+class CheckField(NamedTuple):
+    """A check digit and the MRZ positions it covers (indices into the joined MRZ)."""
+    name: str
+    positions: Tuple[int, ...]
+    check: int
+    optional: bool  # '<' allowed as check digit when every covered character is '<'
+
+
+class MRZFormat(NamedTuple):
+    """One MRZ layout (see the module docstring)."""
+    name: str
+    lines: int
+    width: int
+    codes: str                     # Accepted first characters of the document code
+    fields: Tuple[Field, ...]
+    checks: Tuple[CheckField, ...]
+    position_types: str            # ALPHA / NUMERIC / ALNUM per position
+
+    @property
+    def length(self) -> int:
+        return self.lines * self.width
+
+    def field(self, name: str) -> Optional[Field]:
+        """The field called name, or None if this layout has no such field."""
+        return _FIELD_INDEX[self.name].get(name)
+
+    def value(self, mrz: str, name: str) -> str:
+        """Raw characters of one field ('' if this layout has no such field)."""
+        field = _FIELD_INDEX[self.name].get(name)
+        return mrz[field.start:field.end] if field else ""
+
+    def split(self, mrz: str) -> List[str]:
+        """The joined MRZ as its lines."""
+        return [mrz[i:i + self.width] for i in range(0, self.length, self.width)]
+
+
+def _span(start: int, end: int) -> Tuple[int, ...]:
+    return tuple(range(start, end))
+
+
+def _layout(name: str, lines: int, width: int, codes: str,
+            fields: Iterable[Tuple[str, int, int, str]],
+            checks: Iterable[Tuple[str, Tuple[int, ...], int, bool]]) -> MRZFormat:
+    """Build one MRZFormat and its per-position character classes."""
+    fields = tuple(Field(*field) for field in fields)
+    checks = tuple(CheckField(*check) for check in checks)
+
+    types = [None] * (lines * width)
+    for field in fields:
+        types[field.start:field.end] = field.kind * (field.end - field.start)
+    for check in checks:
+        types[check.check] = ALNUM if check.optional else NUMERIC
+    missing = [i for i, kind in enumerate(types) if kind is None]
+    if missing:
+        raise ValueError(f"{name}: positions {missing} belong to no field")
+
+    return MRZFormat(name, lines, width, codes, fields, checks, "".join(types))
+
+
+def _names_line(width: int) -> List[Tuple[str, int, int, str]]:
+    """Line 1 of TD2, TD3 and the visas: document code, issuing state, names."""
+    return [
+        ("documentCode", 0, 2, ALPHA),
+        ("issuingCountry", 2, 5, ALPHA),
+        ("names", 5, width, ALPHA),
+    ]
+
+
+def _data_line(width: int, optional: str, optional_end: int) -> List[Tuple[str, int, int, str]]:
+    """Line 2 of TD2, TD3 and the visas, up to the optional data field."""
+    o = width  # Line 2 offset
+    return [
+        ("passportNumber", o, o + 9, ALNUM),
+        ("nationality", o + 10, o + 13, ALPHA),
+        ("dateOfBirth", o + 13, o + 19, NUMERIC),
+        ("sex", o + 20, o + 21, ALPHA),
+        ("dateOfExpiry", o + 21, o + 27, NUMERIC),
+        (optional, o + 28, optional_end, ALNUM),
+    ]
+
+
+def _data_checks(width: int) -> List[Tuple[str, Tuple[int, ...], int, bool]]:
+    """Document number, birth and expiry check digits of line 2 (TD2, TD3, visas)."""
+    o = width
+    return [
+        ("passportNumber", _span(o, o + 9), o + 9, False),
+        ("dateOfBirth", _span(o + 13, o + 19), o + 19, False),
+        ("dateOfExpiry", _span(o + 21, o + 27), o + 27, False),
+    ]
+
+
+TD1 = _layout(
+    "TD1", 3, 30, CARD_CODES,
+    fields=[
+        ("documentCode", 0, 2, ALPHA),
+        ("issuingCountry", 2, 5, ALPHA),
+        ("passportNumber", 5, 14, ALNUM),
+        ("optionalData", 15, 30, ALNUM),
+        ("dateOfBirth", 30, 36, NUMERIC),
+        ("sex", 37, 38, ALPHA),
+        ("dateOfExpiry", 38, 44, NUMERIC),
+        ("nationality", 45, 48, ALPHA),
+        ("optionalData2", 48, 59, ALNUM),
+        ("names", 60, 90, ALPHA),
+    ],
+    checks=[
+        ("passportNumber", _span(5, 14), 14, False),
+        ("dateOfBirth", _span(30, 36), 36, False),
+        ("dateOfExpiry", _span(38, 44), 44, False),
+        ("composite", _span(5, 30) + _span(30, 37) + _span(38, 45) + _span(48, 59), 59, False),
+    ],
+)
+
+TD2 = _layout(
+    "TD2", 2, 36, CARD_CODES,
+    fields=_names_line(36) + _data_line(36, "optionalData", 71),
+    checks=_data_checks(36) + [
+        ("composite", _span(36, 46) + _span(49, 56) + _span(57, 71), 71, False),
+    ],
+)
+
+TD3 = _layout(
+    "TD3", 2, 44, PASSPORT_CODES,
+    fields=_names_line(44) + _data_line(44, "personalNumber", 86),
+    checks=_data_checks(44) + [
+        ("personalNumber", _span(72, 86), 86, True),
+        ("composite", _span(44, 54) + _span(57, 64) + _span(65, 87), 87, False),
+    ],
+)
+
+MRVA = _layout(
+    "MRVA", 2, 44, VISA_CODES,
+    fields=_names_line(44) + _data_line(44, "optionalData", 88),
+    checks=_data_checks(44),
+)
+
+MRVB = _layout(
+    "MRVB", 2, 36, VISA_CODES,
+    fields=_names_line(36) + _data_line(36, "optionalData", 72),
+    checks=_data_checks(36),
+)
+
+FORMATS: Dict[str, MRZFormat] = {fmt.name: fmt for fmt in (TD1, TD2, TD3, MRVA, MRVB)}
+LINE_WIDTHS = tuple(sorted({fmt.width for fmt in FORMATS.values()}))  # 30, 36, 44
+LENGTHS = tuple(sorted({fmt.length for fmt in FORMATS.values()}))     # 72, 88, 90
+
+_FIELD_INDEX = {fmt.name: {field.name: field for field in fmt.fields} for fmt in FORMATS.values()}
+_BY_LENGTH = {(fmt.length, code): fmt for fmt in FORMATS.values() for code in fmt.codes}
+_BY_WIDTH = {(fmt.width, code): fmt for fmt in FORMATS.values() for code in fmt.codes}
+# Document code misread or unknown: the non-visa layout of that size
+_DEFAULT_BY_LENGTH = {fmt.length: fmt for fmt in (TD1, TD2, TD3)}
+_DEFAULT_BY_WIDTH = {fmt.width: fmt for fmt in (TD1, TD2, TD3)}
+
+
+def detect_format(mrz: str) -> Optional[MRZFormat]:
+    """
+    Layout of a joined MRZ, or None if no layout has its length.
+
+    The length decides, the document code only tells a visa (V) from a
+    document of the same size, so an OCR-misread first character does not
+    lose the MRZ.
+    """
+    return _BY_LENGTH.get((len(mrz), mrz[:1])) or _DEFAULT_BY_LENGTH.get(len(mrz))
+
+
+def format_for_width(width: int, code: str) -> Optional[MRZFormat]:
+    """Layout with lines of width characters for a document code (its first character), as detect_format."""
+    return _BY_WIDTH.get((width, code)) or _DEFAULT_BY_WIDTH.get(width)
+
+
+def format_for_line(line: str) -> Optional[MRZFormat]:
+    """
+    Layout an MRZ whose first line is line would have, or None.
+
+    Lets a reader know how many characters to expect after the first line
+    break. Stricter than detect_format: the line must look like a first
+    line, i.e. a known document code, then a filler or letter, then a
+    three-character issuing state.
+    """
+    fmt = _BY_WIDTH.get((len(line), line[:1]))
+    if fmt is None or not (line[1].isalpha() or line[1] == FILLER):
+        return None
+    if not all(char.isalpha() or char == FILLER for char in line[2:5]):
+        return None
+    return fmt
+
+
+def check_digit(data: str) -> int:
+    """Check digit of one field's characters (weights 7, 3, 1; '<' and others count 0)."""
+    total = 0
+    for i, char in enumerate(data):
+        if "0" <= char <= "9":
+            value = ord(char) - 48
+        elif "A" <= char <= "Z":
+            value = ord(char) - 55
+        else:
+            continue
+        total += value * WEIGHTS[i % 3]
+    return total % 10
@@ -0,0 +1,194 @@
+"""
+MRZ Field Parsing
+
+One parser for the OCR service and the COM bridge, so a document reads the
+same whichever device scanned it. parse() takes a joined MRZ of any layout
+in icao_mrz.formats and returns the response fields (camelCase keys):
+
+- passportNumber, issuingCountry, nationality, documentCode,
+  personalNumber, optionalData: field characters without '<' fillers
+  (personalNumber and optionalData are None when empty)
+- surname, givenName: see split_names()
+- dateOfBirth, dateOfExpiry: YYYY-MM-DD, '' if not six digits. The century
+  comes from one pivot rule (see mrz_date): a birth date is never in the
+  future, an expiry date is at most EXPIRY_YEARS_AHEAD years ahead
+- sex: 'M', 'F' or 'X' (unspecified, '<' in the MRZ)
+
+The field slices of every layout are looked up once at import; a parse is
+a handful of slices and string methods.
+
+Example:
+    >>> data = parse("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+    ...              "L898902C36UTO7408122F1204159ZE184226B<<<<<10")
+    >>> data['surname'], data['givenName'], data['dateOfBirth'], data['dateOfExpiry']
+    ('ERIKSSON', 'ANNA MARIA', '1974-08-12', '2012-04-15')
+"""
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from icao_mrz.formats import FILLER, FORMATS, MRZFormat, detect_format
+
+# Latest expiry year accepted, relative to the current year; older readings
+# are last century. Passports and ID cards are valid for at most 10 years.
+EXPIRY_YEARS_AHEAD = 50
+
+# Name heuristics for readers that lose fillers (see split_names)
+MERGED_SURNAME_LENGTH = 15
+MERGED_GIVEN_NAME_LENGTH = 12
+
+_EMPTY = slice(0, 0)
+
+
+class _Slices(NamedTuple):
+    """Field slices of one layout (empty slice for a field it does not have)."""
+    document_code: slice
+    issuing_country: slice
+    passport_number: slice
+    nationality: slice
+    date_of_birth: slice
+    sex: slice
+    date_of_expiry: slice
+    names: slice
+    personal_number: slice
+    optional_data: Tuple[slice, ...]
+
+
+def _slices(fmt: MRZFormat) -> _Slices:
+    def get(name: str) -> slice:
+        field = fmt.field(name)
+        return slice(field.start, field.end) if field else _EMPTY
+
+    return _Slices(
+        document_code=get("documentCode"),
+        issuing_country=get("issuingCountry"),
+        passport_number=get("passportNumber"),
+        nationality=get("nationality"),
+        date_of_birth=get("dateOfBirth"),
+        sex=get("sex"),
+        date_of_expiry=get("dateOfExpiry"),
+        names=get("names"),
+        personal_number=get("personalNumber"),
+        optional_data=tuple(get(name) for name in ("optionalData", "optionalData2") if fmt.field(name)),
+    )
+
+
+_SLICES = {name: _slices(fmt) for name, fmt in FORMATS.items()}
+
+# Current year, re-read from the clock at most once an hour
+_year = [0, 0.0]  # [year, time.time() until which it holds]
+
+# latest year -> {'YY': 'YYYY-'} for the hundred years up to it
+_CENTURIES: Dict[int, Dict[str, str]] = {}
+
+
+def _this_year() -> int:
+    now = time.time()
+    if now >= _year[1]:
+        _year[:] = [time.localtime(now).tm_year, now + 3600]
+    return _year[0]
+
+
+def _century(latest_year: int) -> Dict[str, str]:
+    table = _CENTURIES.get(latest_year)
+    if table is None:
+        table = _CENTURIES[latest_year] = {
+            f"{year % 100:02d}": f"{year}-" for year in range(latest_year - 99, latest_year + 1)
+        }
+    return table
+
+
+def mrz_date(yymmdd: str, latest_year: int) -> str:
+    """
+    YYMMDD as YYYY-MM-DD, in the latest century that puts it no later than
+    latest_year. '' if yymmdd is not six digits.
+
+    Example:
+        >>> mrz_date("740812", 2026), mrz_date("240812", 2026), mrz_date("300101", 2026)
+        ('1974-08-12', '2024-08-12', '1930-01-01')
+    """
+    prefix = _century(latest_year).get(yymmdd[:2])
+    if prefix is None or len(yymmdd) != 6 or not yymmdd.isdigit():
+        return ""
+    return prefix + yymmdd[2:4] + "-" + yymmdd[4:]
+
+
+def split_names(names: str) -> Tuple[str, str]:
+    """
+    Surname and given names of the names field (SURNAME<<GIVEN<NAMES<<<).
+
+    Readers sometimes lose fillers, so:
+    - no '<<' at all: the first '<'-separated part is the surname
+    - '<<' but no given names and a surname over 15 letters: the surname
+      swallowed the given names; its first part is the surname
+    - given names of over 12 letters without a filler are two merged names
+      and are split in the middle
+
+    Example:
+        >>> split_names("ERIKSSON<<ANNA<MARIA<<<<<<<<<")
+        ('ERIKSSON', 'ANNA MARIA')
+        >>> split_names("NIKOLOV<NIKOLAYSTOYANOV<<<<<<<<<<<<")
+        ('NIKOLOV', 'NIKOLAY STOYANOV')
+    """
+    if "<<" not in names:
+        parts = [part for part in names.split(FILLER) if part]
+        return (parts[0], " ".join(parts[1:])) if parts else ("", "")
+
+    surname_raw, given_raw = names.split("<<", 1)
+    surname = surname_raw.replace(FILLER, " ").strip()
+    given_name = given_raw.replace(FILLER, " ").strip()
+
+    if not given_name and len(surname_raw.replace(FILLER, "")) > MERGED_SURNAME_LENGTH:
+        parts = [part for part in surname_raw.split(FILLER) if part]
+        if len(parts) >= 2:
+            surname, given_name = parts[0], "".join(parts[1:])
+            if len(given_name) > MERGED_GIVEN_NAME_LENGTH:
+                middle = len(given_name) // 2
+                given_name = given_name[:middle] + " " + given_name[middle:]
+    elif " " not in given_name and len(given_name) > MERGED_GIVEN_NAME_LENGTH:
+        middle = len(given_name) // 2
+        given_name = given_name[:middle] + " " + given_name[middle:]
+
+    return surname, given_name
+
+
+def parse(mrz: str, fmt: Optional[MRZFormat] = None, this_year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fields of a joined MRZ (see the module docstring).
+
+    Args:
+        mrz: Joined MRZ, upper case, exactly the layout's length
+        fmt: Layout; detected from length and document code if not given
+        this_year: Current year for the date pivot (default: today's)
+
+    Returns:
+        Field dict, or None if no layout has the MRZ's length
+    """
+    fmt = fmt or detect_format(mrz)
+    if fmt is None or len(mrz) != fmt.length:
+        return None
+    s = _SLICES[fmt.name]
+    year = this_year or _this_year()
+
+    surname, given_name = split_names(mrz[s.names])
+    personal_number = mrz[s.personal_number].replace(FILLER, "")
+    optional_data = ""
+    for field in s.optional_data:
+        part = mrz[field].replace(FILLER, "")
+        if part:
+            optional_data = optional_data + " " + part if optional_data else part
+    sex = mrz[s.sex]
+
+    return {
+        'documentType': fmt.name,
+        'documentCode': mrz[s.document_code].replace(FILLER, ""),
+        'passportNumber': mrz[s.passport_number].replace(FILLER, ""),
+        'surname': surname,
+        'givenName': given_name,
+        'nationality': mrz[s.nationality].replace(FILLER, ""),
+        'dateOfBirth': mrz_date(mrz[s.date_of_birth], year),
+        'sex': sex if sex == "M" or sex == "F" else "X",
+        'dateOfExpiry': mrz_date(mrz[s.date_of_expiry], year + EXPIRY_YEARS_AHEAD),
+        'issuingCountry': mrz[s.issuing_country].replace(FILLER, ""),
+        'personalNumber': personal_number or None,
+        'optionalData': optional_data or None,
+    }
@@ -0,0 +1,188 @@
+"""
+ICAO 9303 Check Digits for every MRZ layout (TD1, TD2, TD3, MRV-A, MRV-B)
+
+Which positions each check digit covers comes from the shared layout table
+(icao_mrz.formats). Character values come from a precomputed 256-entry
+table ('0'-'9' -> 0-9, 'A'-'Z' -> 10-35, '<' and anything else -> 0) and
+every check is a weighted sum (weights 7, 3, 1 repeating) modulo 10.
+
+Every check digit of the layout is verified, e.g. for TD3: document
+number, date of birth, date of expiry, personal number (a '<' check digit
+is accepted when the field is empty) and the composite digit over all of
+them. Visas have no composite digit.
+
+- validate(): one MRZ, one pass over its characters
+- validate_batch(): many MRZs at once; per layout, the weighted sums of
+  every MRZ are a single (n x length) @ (length x checks) NumPy product
+
+Example:
+    >>> report = validate_td3("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+    ...                       "L898902C36UTO7408122F1204159ZE184226B<<<<<10")
+    >>> report["valid"], report["failed"]
+    (True, [])
+    >>> validate("I<UTOD231458907<<<<<<<<<<<<<<<7408122F1204159UTO<<<<<<<<<<<6"
+    ...          "ERIKSSON<<ANNA<MARIA<<<<<<<<<<")["fields"]
+    {'passportNumber': True, 'dateOfBirth': True, 'dateOfExpiry': True, 'composite': True}
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from icao_mrz import FORMATS, TD3, CheckField, MRZFormat, detect_format
+
+MRZ_LENGTH = TD3.length
+WEIGHTS = (7, 3, 1)
+FILLER = ord("<")
+
+# Character value table, indexed by byte
+CHAR_VALUES = np.zeros(256, dtype=np.int64)
+CHAR_VALUES[ord("0"):ord("9") + 1] = np.arange(10)
+CHAR_VALUES[ord("A"):ord("Z") + 1] = np.arange(10, 36)
+_CHAR_VALUES = CHAR_VALUES.tolist()  # list indexing is faster than NumPy scalars for one MRZ
+
+TD3_FIELDS: Tuple[CheckField, ...] = TD3.checks
+FIELD_NAMES = tuple(field.name for field in TD3_FIELDS)
+
+
+class _Tables(NamedTuple):
+    """Precomputed check digit tables of one layout."""
+    field_names: Tuple[str, ...]
+    # WEIGHT_MATRIX[position, field] = weight of that character in that field's sum
+    weight_matrix: np.ndarray
+    # Same weights per position for the single-MRZ pass: ((field index, weight), ...)
+    position_weights: Tuple[Tuple[Tuple[int, int], ...], ...]
+    check_positions: np.ndarray
+    optional_fields: List[int]
+
+
+def _tables(fmt: MRZFormat) -> _Tables:
+    matrix = np.zeros((fmt.length, len(fmt.checks)), dtype=np.int64)
+    for f, field in enumerate(fmt.checks):
+        for i, position in enumerate(field.positions):
+            matrix[position, f] = WEIGHTS[i % 3]
+    return _Tables(
+        field_names=tuple(field.name for field in fmt.checks),
+        weight_matrix=matrix,
+        position_weights=tuple(
+            tuple((f, int(matrix[position, f])) for f in range(len(fmt.checks)) if matrix[position, f])
+            for position in range(fmt.length)
+        ),
+        check_positions=np.array([field.check for field in fmt.checks]),
+        optional_fields=[f for f, field in enumerate(fmt.checks) if field.optional],
+    )
+
+
+_TABLES = {name: _tables(fmt) for name, fmt in FORMATS.items()}
+WEIGHT_MATRIX = _TABLES[TD3.name].weight_matrix
+
+
+def check_digit(data: str) -> int:
+    """Check digit of one field's characters."""
+    total = 0
+    for i, byte in enumerate(data.encode("latin-1", errors="replace")):
+        total += _CHAR_VALUES[byte] * WEIGHTS[i % 3]
+    return total % 10
+
+
+def _report(field_names: Sequence[str], valid: Sequence[bool]) -> Dict[str, Any]:
+    fields = dict(zip(field_names, (bool(v) for v in valid)))
+    return {
+        "valid": all(fields.values()),
+        "fields": fields,
+        "failed": [name for name, ok in fields.items() if not ok],
+    }
+
+
+def validate(mrz: str, fmt: Optional[MRZFormat] = None) -> Dict[str, Any]:
+    """
+    Verify every check digit of an MRZ.
+
+    Args:
+        mrz: Joined MRZ (lines without line breaks)
+        fmt: Layout; detected from length and document code if not given
+
+    Returns:
+        {
+            'valid': bool (all check digits correct),
+            'fields': {check digit name: bool}, e.g. for TD3 passportNumber,
+                      dateOfBirth, dateOfExpiry, personalNumber, composite,
+            'failed': [names of the fields whose check digit is wrong]
+        }
+
+    Raises:
+        ValueError: if mrz does not have the layout's length (or no layout)
+    """
+    fmt = fmt or detect_format(mrz)
+    if fmt is None:
+        raise ValueError(f"No MRZ layout is {len(mrz)} characters starting with {mrz[:1]!r}")
+    if len(mrz) != fmt.length:
+        raise ValueError(f"{fmt.name} MRZ must be {fmt.length} characters, got {len(mrz)}")
+
+    tables = _TABLES[fmt.name]
+    data = mrz.encode("latin-1", errors="replace")
+    sums = [0] * len(fmt.checks)
+    for byte, contributions in zip(data, tables.position_weights):
+        value = _CHAR_VALUES[byte]
+        if value:
+            for f, weight in contributions:
+                sums[f] += value * weight
+
+    valid = []
+    for field, total in zip(fmt.checks, sums):
+        check = data[field.check]
+        if field.optional and check == FILLER and all(data[p] == FILLER for p in field.positions):
+            valid.append(True)
+        else:
+            valid.append(check - 48 == total % 10)
+    return _report(tables.field_names, valid)
+
+
+def validate_td3(mrz: str) -> Dict[str, Any]:
+    """validate() for an 88-character TD3 MRZ (raises ValueError for any other length)."""
+    return validate(mrz, TD3)
+
+
+def validity_matrix(mrzs: Sequence[str], fmt: MRZFormat = TD3) -> np.ndarray:
+    """
+    Check digit validity of many MRZs of one layout.
+
+    Returns:
+        Boolean array (len(mrzs) x checks), columns in fmt.checks order
+    """
+    tables = _TABLES[fmt.name]
+    if not mrzs:
+        return np.zeros((0, len(fmt.checks)), dtype=bool)
+
+    data = np.frombuffer("".join(mrzs).encode("latin-1", errors="replace"), dtype=np.uint8)
+    data = data.reshape(len(mrzs), fmt.length)
+
+    expected = (CHAR_VALUES[data] @ tables.weight_matrix) % 10
+    checks = data[:, tables.check_positions].astype(np.int64)
+    valid = checks - 48 == expected
+
+    for f in tables.optional_fields:
+        field = fmt.checks[f]
+        empty = (data[:, list(field.positions)] == FILLER).all(axis=1) & (checks[:, f] == FILLER)
+        valid[:, f] |= empty
+
+    return valid
+
+
+def validate_batch(mrzs: Sequence[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    validate() for many MRZs, one vectorised pass per layout.
+
+    Entries that are None or match no layout get None instead of a report.
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, mrz in enumerate(mrzs):
+        fmt = detect_format(mrz) if mrz else None
+        if fmt is not None:
+            groups.setdefault(fmt.name, []).append(i)
+
+    reports: List[Optional[Dict[str, Any]]] = [None] * len(mrzs)
+    for name, usable in groups.items():
+        fmt = FORMATS[name]
+        matrix = validity_matrix([mrzs[i] for i in usable], fmt)
+        for row, i in enumerate(usable):
+            reports[i] = _report(_TABLES[name].field_names, matrix[row])
+    return reports
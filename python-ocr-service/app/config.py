@@ -24,18 +24,92 @@ class Settings:
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = ["jpg", "jpeg", "png"]
 
+    # Image Decoding
+    # Images whose long side is at least 2x this are decoded at 1/2, 1/4 or 1/8 scale
+    DECODE_MAX_SIDE: int = int(os.getenv("DECODE_MAX_SIDE", "2000"))
+
     # OCR Configuration
     OCR_LANG: str = "en"  # PaddleOCR language
     OCR_USE_GPU: bool = os.getenv("OCR_USE_GPU", "false").lower() == "true"
     OCR_CONFIDENCE_THRESHOLD: float = 0.7  # Minimum confidence for MRZ detection
+    MRZ_LOCATOR_ENABLED: bool = os.getenv("MRZ_LOCATOR_ENABLED", "true").lower() == "true"  # OCR the MRZ band crop first
+
+    # Low-Confidence Escalation (re-read the MRZ line crops with image variants and fuse)
+    OCR_ESCALATION_ENABLED: bool = os.getenv("OCR_ESCALATION_ENABLED", "true").lower() == "true"
+    OCR_ESCALATION_BUDGET_MS: int = int(os.getenv("OCR_ESCALATION_BUDGET_MS", "1000"))  # Per scan
+
+    # MRZ Correction (look-alike misreads located by the check digits)
+    MRZ_CORRECTION_ENABLED: bool = os.getenv("MRZ_CORRECTION_ENABLED", "true").lower() == "true"
+    MRZ_CORRECTION_MAX_CANDIDATES: int = int(os.getenv("MRZ_CORRECTION_MAX_CANDIDATES", "2000"))  # Per MRZ
+
+    # Startup Warm-Up (synthetic passports through extract_mrz -> parse before /ready)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_SAMPLES: int = int(os.getenv("WARMUP_SAMPLES", "3"))
+
+    # Serving Mode
+    # local:  every uvicorn worker loads its own PaddleOCR model
+    # shared: workers forward inference to app.inference_server (one model for all)
+    OCR_SERVING_MODE: str = os.getenv("OCR_SERVING_MODE", "local").lower()
+    OCR_INFERENCE_SOCKET: str = os.getenv("OCR_INFERENCE_SOCKET", "/tmp/greenpay-ocr-inference.sock")
+    OCR_INFERENCE_AUTHKEY: str = os.getenv("OCR_INFERENCE_AUTHKEY", "")  # Shared secret, required in shared mode
+    OCR_INFERENCE_TIMEOUT: float = float(os.getenv("OCR_INFERENCE_TIMEOUT", "60"))  # Seconds per remote call
+    OCR_MODEL_PROCESSES: int = int(os.getenv("OCR_MODEL_PROCESSES", "1"))  # Forked model processes (shared mode)
+
+    # Batch Scanning (/scan-mrz/batch)
+    MAX_BATCH_FILES: int = int(os.getenv("MAX_BATCH_FILES", "50"))
+    OCR_BATCH_REC_SIZE: int = int(os.getenv("OCR_BATCH_REC_SIZE", "16"))  # Line crops per recognition batch
+
+    # Result Cache (repeat uploads of the same image)
+    RESULT_CACHE_BACKEND: str = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()  # memory, sqlite or off
+    RESULT_CACHE_PATH: str = os.getenv("RESULT_CACHE_PATH", "/dev/shm/greenpay-ocr-cache.sqlite3")  # sqlite only
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+    RESULT_CACHE_TTL: int = int(os.getenv("RESULT_CACHE_TTL", "900"))  # Seconds
+
+    # Inference Executor (keeps PaddleOCR off the event loop)
+    OCR_INFERENCE_THREADS: int = int(os.getenv("OCR_INFERENCE_THREADS", "1"))  # Per uvicorn worker
+    OCR_INFERENCE_QUEUE_SIZE: int = int(os.getenv("OCR_INFERENCE_QUEUE_SIZE", "4"))  # Waiting jobs before 503
+    OCR_RETRY_AFTER_SECONDS: int = int(os.getenv("OCR_RETRY_AFTER_SECONDS", "2"))  # Used until run times are known
+
+    # Scan Jobs (POST /scan-mrz/jobs answers with a job ID; poll /jobs/{id} or stream /jobs/{id}/events)
+    JOB_STORE_BACKEND: str = os.getenv("JOB_STORE_BACKEND", "memory").lower()  # memory or sqlite
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "/dev/shm/greenpay-ocr-jobs.sqlite3")  # sqlite only
+    JOB_MAX_JOBS: int = int(os.getenv("JOB_MAX_JOBS", "500"))  # Queued, running and finished jobs kept
+    JOB_TTL: int = int(os.getenv("JOB_TTL", "300"))  # Seconds a finished job's result is kept
+    JOB_ABANDON_SECONDS: int = int(os.getenv("JOB_ABANDON_SECONDS", "30"))  # Unpolled queued jobs are cancelled
+    JOB_CONCURRENCY: int = int(os.getenv("JOB_CONCURRENCY", "0"))  # Jobs running per worker (0: OCR_INFERENCE_THREADS)
+    JOB_MAX_PENDING_BYTES: int = int(os.getenv("JOB_MAX_PENDING_BYTES", str(200 * 1024 * 1024)))  # Queued uploads per worker
+    JOB_EVENTS_INTERVAL: float = float(os.getenv("JOB_EVENTS_INTERVAL", "0.5"))  # Event stream store re-read (seconds)
+    JOB_EVENTS_KEEPALIVE: float = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))  # Event stream keep-alive (seconds)
+
+    # Live Scan (WebSocket /scan-mrz/stream: camera frames in, MRZ out once the check digits validate)
+    STREAM_MAX_SESSIONS: int = int(os.getenv("STREAM_MAX_SESSIONS", "8"))  # Open sessions per worker
+    STREAM_MAX_SECONDS: float = float(os.getenv("STREAM_MAX_SECONDS", "60"))  # Session length limit
+    STREAM_MAX_FRAME_BYTES: int = int(os.getenv("STREAM_MAX_FRAME_BYTES", str(1024 * 1024)))  # Per frame
+    STREAM_MIN_SHARPNESS: float = float(os.getenv("STREAM_MIN_SHARPNESS", "100"))  # MRZ band Laplacian variance
+    STREAM_WINDOW_FRAMES: int = int(os.getenv("STREAM_WINDOW_FRAMES", "5"))  # Usable frames per recognition
+    STREAM_WINDOW_MS: int = int(os.getenv("STREAM_WINDOW_MS", "700"))  # Recognise the best frame after this anyway
+
+    # Metrics
+    # Shared directory for multi-process Prometheus metrics (unset: per-worker /metrics)
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
 
-    # Rate Limiting
-    RATE_LIMIT_ENABLED: bool = True
-    RATE_LIMIT_REQUESTS: int = 60  # Requests per minute
+    # Rate Limiting (GCRA per client, see app.rate_limit)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))  # Requests per minute
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "0"))  # Back-to-back requests (0: RATE_LIMIT_REQUESTS)
+    RATE_LIMIT_CLIENT_LIMITS: str = os.getenv("RATE_LIMIT_CLIENT_LIMITS", "")  # "id=rpm[/burst],..."
+    RATE_LIMIT_CLIENT_HEADER: str = os.getenv("RATE_LIMIT_CLIENT_HEADER", "X-Client-Id")  # Set by the Node backend
+    RATE_LIMIT_TRUSTED_PROXIES: str = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1,::1")
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # memory or sqlite
+    RATE_LIMIT_PATH: str = os.getenv("RATE_LIMIT_PATH", "/dev/shm/greenpay-ocr-ratelimit.sqlite3")  # sqlite only
+    RATE_LIMIT_SWEEP_SECONDS: float = float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "60"))  # Idle client eviction
 
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = "[%(asctime)s] [%(name)s] %(levelname)s - %(message)s"
+    LOG_JSON: bool = os.getenv("LOG_JSON", "false").lower() == "true"  # One JSON object per record
+    LOG_REDACT_PII: bool = os.getenv("LOG_REDACT_PII", "true").lower() == "true"  # Mask passport data
+    LOG_DETAIL_SAMPLE_RATE: float = float(os.getenv("LOG_DETAIL_SAMPLE_RATE", "0"))  # Share of scans traced at INFO
 
     # CORS (for development)
     CORS_ENABLED: bool = os.getenv("CORS_ENABLED", "false").lower() == "true"
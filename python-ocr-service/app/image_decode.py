@@ -0,0 +1,160 @@
+"""
+Upload Decoding for the OCR Pipeline
+
+Decodes uploaded image bytes straight into a BGR ndarray with cv2.imdecode.
+The upload buffer is wrapped with np.frombuffer, so no copy is made. There is
+no PIL image, no RGB array and no RGB->BGR conversion copy.
+
+Phone uploads are often 12 MP, far more than MRZ recognition needs. The image
+size is read from the JPEG/PNG header first. When the long side is at least
+2x DECODE_MAX_SIDE, the image is decoded at 1/2, 1/4 or 1/8 scale
+(IMREAD_REDUCED_COLOR_*). For JPEG that scaling happens inside the DCT, so
+the full-resolution image is never materialised. OpenCV applies EXIF
+orientation during decode.
+"""
+import logging
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Reduced-resolution decode flags by scale factor
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, ...)
+JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+
+
+def image_dimensions(data) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG or PNG header without decoding.
+
+    Args:
+        data: bytes-like object (bytes, bytearray or memoryview)
+
+    Returns:
+        (width, height) or None if the format is not recognised
+    """
+    header = memoryview(data)
+
+    # PNG: signature + IHDR chunk
+    if len(header) >= 24 and bytes(header[:8]) == b"\x89PNG\r\n\x1a\n":
+        width, height = struct.unpack(">II", header[16:24])
+        return width, height
+
+    # JPEG: walk marker segments until a start-of-frame
+    if len(header) >= 4 and header[0] == 0xFF and header[1] == 0xD8:
+        pos = 2
+        while pos + 9 < len(header):
+            if header[pos] != 0xFF:
+                return None
+            marker = header[pos + 1]
+            if marker == 0xFF:  # Fill byte
+                pos += 1
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">HH", header[pos + 5:pos + 9])
+                return width, height
+            segment_length = struct.unpack(">H", header[pos + 2:pos + 4])[0]
+            pos += 2 + segment_length
+
+    return None
+
+
+def decode_image(data) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Decode uploaded image bytes into a BGR NumPy array (OpenCV format).
+
+    Args:
+        data: Encoded image (bytes-like, JPEG or PNG)
+
+    Returns:
+        Tuple of (image, info)
+        - image: BGR ndarray, possibly downscaled by a power of two
+        - info: {'decodeTime', 'scale', 'width', 'height', 'decodedBytes', 'peakBytes'}
+
+    Raises:
+        ValueError: if the bytes are not a readable image
+    """
+    start = time.perf_counter()
+    buffer = np.frombuffer(data, dtype=np.uint8)  # View over the upload, no copy
+
+    scale = 1
+    flags = cv2.IMREAD_COLOR
+    dimensions = image_dimensions(data)
+    if dimensions:
+        long_side = max(dimensions)
+        for factor, reduced_flag in REDUCED_FLAGS:
+            if long_side >= factor * settings.DECODE_MAX_SIDE:
+                scale, flags = factor, reduced_flag
+                break
+
+    image = cv2.imdecode(buffer, flags)
+    if image is None:
+        raise ValueError("Unsupported or corrupt image data")
+
+    decode_time = time.perf_counter() - start
+    info = {
+        "decodeTime": decode_time,
+        "scale": scale,
+        "width": image.shape[1],
+        "height": image.shape[0],
+        "decodedBytes": image.nbytes,
+        # Upload buffer and decoded array are the only full buffers alive
+        "peakBytes": len(buffer) + image.nbytes,
+    }
+    _decode_stats.record(info)
+    return image, info
+
+
+class DecodeStats:
+    """Per-worker decode time and memory statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._time_total = 0.0
+        self._time_max = 0.0
+        self._peak_total = 0
+        self._peak_max = 0
+        self._reduced = 0
+
+    def record(self, info: Dict[str, Any]) -> None:
+        with self._lock:
+            self._count += 1
+            self._time_total += info["decodeTime"]
+            self._time_max = max(self._time_max, info["decodeTime"])
+            self._peak_total += info["peakBytes"]
+            self._peak_max = max(self._peak_max, info["peakBytes"])
+            if info["scale"] > 1:
+                self._reduced += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "decoded": self._count,
+                "reducedResolution": self._reduced,
+                "avgDecodeTime": self._time_total / self._count if self._count else 0.0,
+                "maxDecodeTime": self._time_max,
+                "avgPeakBytes": self._peak_total // self._count if self._count else 0,
+                "maxPeakBytes": self._peak_max,
+            }
+
+
+_decode_stats = DecodeStats()
+
+
+def get_decode_stats() -> Dict[str, Any]:
+    """Decode statistics for this worker."""
+    return _decode_stats.stats()
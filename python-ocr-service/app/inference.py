@@ -0,0 +1,185 @@
+"""
+Bounded Inference Executor for the OCR Pipeline
+
+PaddleOCR inference is synchronous and takes seconds on CPU. Running it
+directly inside an async endpoint blocks the uvicorn event loop, so /health
+and every other request on that worker stall for the duration of a scan.
+
+This module runs blocking inference on a dedicated thread pool with a bounded
+admission queue. When the queue is full, callers are rejected immediately so
+the endpoint can answer 503 + Retry-After instead of piling up requests.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the admission queue is full and a job is rejected."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Thread pool with a bounded admission queue for blocking OCR inference.
+
+    Features:
+    - Fixed number of inference threads (OCR_INFERENCE_THREADS)
+    - At most OCR_INFERENCE_QUEUE_SIZE jobs waiting behind the running ones
+    - Fast rejection with a Retry-After estimate when the queue is full
+    - Queue depth and wait time statistics for capacity planning
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="ocr-inference"
+        )
+        self._lock = threading.Lock()
+
+        # Live counters
+        self._queued = 0
+        self._running = 0
+
+        # Cumulative statistics
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+        logger.info(
+            f"Inference executor ready: {self.workers} thread(s), "
+            f"queue size {self.max_queue}"
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking function on the inference pool.
+
+        Raises:
+            InferenceQueueFull: if all threads are busy and the queue is full
+        """
+        with self._lock:
+            if self._running + self._queued >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(self._retry_after_locked())
+            self._queued += 1
+            self._submitted += 1
+        INFERENCE_QUEUE_DEPTH.inc()
+
+        enqueued_at = time.perf_counter()
+        future = self._executor.submit(self._execute, fn, args, enqueued_at)
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future: Future) -> None:
+        """Free the queue slot of a job cancelled before it started."""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+            INFERENCE_QUEUE_DEPTH.dec()
+
+    def _execute(self, fn: Callable[..., Any], args: tuple, enqueued_at: float) -> Any:
+        """Worker-thread wrapper that records wait and run time."""
+        started_at = time.perf_counter()
+        wait = started_at - enqueued_at
+
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        INFERENCE_QUEUE_DEPTH.dec()
+        INFERENCE_WAIT.observe(wait)
+
+        failed = False
+        try:
+            return fn(*args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._run_total += elapsed
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def _retry_after_locked(self) -> int:
+        """
+        Estimate seconds until a slot frees up.
+
+        Uses the average run time so far; falls back to the configured
+        default before any job has finished. Caller must hold the lock.
+        """
+        finished = self._completed + self._failed
+        if finished == 0:
+            return settings.OCR_RETRY_AFTER_SECONDS
+
+        avg_run = self._run_total / finished
+        backlog = self._running + self._queued
+        return max(1, math.ceil(avg_run * backlog / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and wait time statistics."""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "maxQueue": self.max_queue,
+                "queueDepth": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avgWaitTime": self._wait_total / started if started else 0.0,
+                "maxWaitTime": self._wait_max,
+                "avgRunTime": self._run_total / finished if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for running ones to finish."""
+        self._executor.shutdown(wait=True)
+
+
+# Singleton instance
+_executor_instance: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    Get singleton InferenceExecutor instance.
+
+    One executor per uvicorn worker process.
+    """
+    global _executor_instance
+
+    if _executor_instance is None:
+        _executor_instance = InferenceExecutor(
+            workers=settings.OCR_INFERENCE_THREADS,
+            max_queue=settings.OCR_INFERENCE_QUEUE_SIZE
+        )
+
+    return _executor_instance
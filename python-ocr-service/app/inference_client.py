@@ -0,0 +1,121 @@
+"""
+Client for the Shared-Model Inference Server
+
+Used by the HTTP workers when OCR_SERVING_MODE=shared. RemoteOCREngine has
+the same extract_mrz / extract_mrz_batch interface as OCREngine, but it sends
+each call to app/inference_server.py over a local Unix socket. The HTTP
+workers therefore never import or load PaddleOCR.
+"""
+import logging
+import socket
+import struct
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServerUnavailable(Exception):
+    """Raised when the inference server cannot be reached or does not reply in time."""
+
+
+def set_socket_timeout(sock: socket.socket, seconds: float) -> None:
+    """
+    Bound every blocking send/recv (and, on a Unix socket, connect) on sock.
+
+    multiprocessing Connections read and write the raw file descriptor, so
+    socket.settimeout() (which makes the descriptor non-blocking) does not
+    apply; SO_RCVTIMEO/SO_SNDTIMEO do, failing the call with an OSError.
+    """
+    timeval = struct.pack("ll", int(seconds), int(seconds % 1 * 1_000_000))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeval)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeval)
+
+
+class RemoteOCREngine:
+    """
+    OCREngine stand-in that forwards calls to the inference server.
+
+    Each call opens a short-lived connection; connection setup on a Unix
+    socket costs microseconds next to seconds of inference.
+    """
+
+    def __init__(self, socket_path: str, timeout: float):
+        if not settings.OCR_INFERENCE_AUTHKEY:
+            raise RuntimeError("OCR_INFERENCE_AUTHKEY must be set in shared serving mode")
+        self.socket_path = socket_path
+        self.timeout = timeout
+        logger.info(f"Using shared inference server at {socket_path}")
+
+    def extract_mrz(self, image: np.ndarray) -> Tuple[Optional[str], float, str]:
+        """Remote OCREngine.extract_mrz."""
+        return self._call("extract_mrz", image)
+
+    def extract_mrz_batch(self, images: List[Optional[np.ndarray]]) -> List[Tuple[Optional[str], float, str]]:
+        """Remote OCREngine.extract_mrz_batch."""
+        return self._call("extract_mrz_batch", images)
+
+    def ping(self) -> dict:
+        """Check the inference server is up. Returns the serving process id."""
+        return self._call("ping")
+
+    def _connect(self) -> Connection:
+        """
+        Connect and authenticate within self.timeout.
+
+        connect() returns once the socket is in the listen backlog; the
+        handshake then waits for a model process to accept it, which takes
+        as long as that process is busy. multiprocessing's Client() has no
+        timeout for either step, so the connection is set up here.
+        """
+        deadline = time.monotonic() + self.timeout
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            set_socket_timeout(sock, self.timeout)
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        conn = Connection(sock.detach())
+
+        try:
+            if not conn.poll(max(0.0, deadline - time.monotonic())):
+                raise InferenceServerUnavailable(f"No model process accepted the connection within {self.timeout}s")
+            authkey = settings.OCR_INFERENCE_AUTHKEY.encode()
+            answer_challenge(conn, authkey)
+            deliver_challenge(conn, authkey)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _call(self, method: str, *args: Any) -> Any:
+        try:
+            conn = self._connect()
+        except AuthenticationError as e:
+            raise InferenceServerUnavailable(f"Inference server rejected OCR_INFERENCE_AUTHKEY: {str(e)}")
+        except (OSError, EOFError) as e:
+            raise InferenceServerUnavailable(f"Cannot connect to inference server: {str(e)}")
+
+        try:
+            conn.send((method, args))
+
+            if not conn.poll(self.timeout):
+                raise InferenceServerUnavailable(f"Inference server did not reply within {self.timeout}s")
+
+            status, result = conn.recv()
+        except (OSError, EOFError) as e:
+            raise InferenceServerUnavailable(f"Inference server connection failed: {str(e)}")
+        finally:
+            conn.close()
+
+        if status != "ok":
+            raise RuntimeError(f"Inference server error: {result}")
+
+        return result
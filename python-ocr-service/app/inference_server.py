@@ -0,0 +1,235 @@
+"""
+Shared-Model Inference Server
+
+In the default (local) serving mode every uvicorn worker loads its own
+PaddleOCR instance: 4 workers mean 4 copies of the det/rec weights and 4
+model loads at startup. In shared mode the HTTP workers load no model at
+all. They send images to this server over a local Unix socket (see
+app/inference_client.py), and this server is the only process that owns
+the model.
+
+The model is loaded once in the parent process, which then forks
+OCR_MODEL_PROCESSES model processes that all accept on the same socket. The
+weights are shared copy-on-write, so each process adds little memory. The
+parent serves no requests: it re-forks any model process that exits, so a
+crash does not silently remove capacity.
+
+Connections are authenticated with OCR_INFERENCE_AUTHKEY, which must be set
+(the server refuses to start without it). A client with the wrong key, or
+anything else that fails the handshake, is logged and dropped. So is a
+client that does not complete the handshake or send its request within
+CLIENT_TIMEOUT_SECONDS, so a stuck peer cannot pin a model process.
+
+Each request is one connection carrying one pickled (method, args) tuple.
+The reply is ("ok", result) or ("error", message). Only OCREngine methods
+listed in ALLOWED_METHODS can be called.
+
+Every model process warms up (app.warmup) before it accepts connections,
+after the fork, so no process serves its first scan cold.
+
+Usage (from python-ocr-service/):
+    python -m app.inference_server
+"""
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, Listener, answer_challenge, deliver_challenge
+
+from app.config import settings
+from app.inference_client import set_socket_timeout
+from app.log import configure_logging
+from app.warmup import log_warmup, run_warmup
+
+configure_logging()
+logger = logging.getLogger("app.inference_server")
+
+# OCREngine methods that HTTP workers may call remotely
+ALLOWED_METHODS = frozenset({"extract_mrz", "extract_mrz_batch"})
+
+# Pause before re-forking a model process that exited (no tight loop if it crashes at startup)
+RESPAWN_DELAY_SECONDS = 1.0
+
+# Longest wait for a connected client's handshake reply or request (workers send at once)
+CLIENT_TIMEOUT_SECONDS = 10.0
+
+
+def warm_up(engine) -> None:
+    """Run the synthetic warm-up scans in this model process (see app.warmup)."""
+    from app import metrics
+    from app.mrz_parser import get_mrz_parser
+
+    try:
+        summary = run_warmup(engine, get_mrz_parser(), settings.WARMUP_SAMPLES)
+    except Exception as e:
+        logger.error(f"Model process {os.getpid()}: warm-up failed: {str(e)}")
+        return
+    log_warmup(summary)
+    metrics.WARMUP_SECONDS.set(summary["durationMs"] / 1000)
+
+
+def accept(listener: Listener) -> Connection:
+    """
+    Accept one connection and authenticate it within CLIENT_TIMEOUT_SECONDS.
+
+    Listener.accept() runs the handshake with no timeout, so a peer that
+    connects and never answers would pin this model process. The listener is
+    created without an authkey and the handshake is done here instead, with
+    the same challenge/response and the socket timeout already set.
+    """
+    conn = listener.accept()
+    try:
+        sock = socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            set_socket_timeout(sock, CLIENT_TIMEOUT_SECONDS)
+        finally:
+            sock.close()
+        authkey = settings.OCR_INFERENCE_AUTHKEY.encode()
+        deliver_challenge(conn, authkey)
+        answer_challenge(conn, authkey)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def serve_forever(listener: Listener, engine) -> None:
+    """Accept connections and run one engine call per connection."""
+    pid = os.getpid()
+    if settings.WARMUP_ENABLED:
+        warm_up(engine)
+    logger.info(f"Model process {pid} accepting requests")
+
+    while True:
+        try:
+            conn = accept(listener)
+        except AuthenticationError as e:
+            # Wrong OCR_INFERENCE_AUTHKEY, or not a worker at all
+            logger.warning(f"Model process {pid}: rejected connection: {str(e)}")
+            continue
+        except BlockingIOError:
+            logger.warning(f"Model process {pid}: handshake not completed within {CLIENT_TIMEOUT_SECONDS}s, dropped")
+            continue
+        except (OSError, EOFError) as e:
+            logger.warning(f"Model process {pid}: accept failed: {str(e)}")
+            continue
+        except Exception as e:
+            logger.error(f"Model process {pid}: accept failed: {str(e)}", exc_info=True)
+            continue
+
+        try:
+            method, args = conn.recv()
+
+            if method == "ping":
+                conn.send(("ok", {"pid": pid}))
+                continue
+
+            if method not in ALLOWED_METHODS:
+                conn.send(("error", f"Method not allowed: {method}"))
+                continue
+
+            start = time.perf_counter()
+            result = getattr(engine, method)(*args)
+            conn.send(("ok", result))
+            logger.debug("Model process %d: %s in %.2fs", pid, method, time.perf_counter() - start)
+
+        except (EOFError, ConnectionError, BrokenPipeError) as e:
+            # HTTP worker gave up (timeout or shutdown)
+            logger.warning(f"Model process {pid}: client went away: {str(e)}")
+
+        except BlockingIOError:
+            # SO_RCVTIMEO/SO_SNDTIMEO expired: the client stopped sending or reading
+            logger.warning(f"Model process {pid}: client timed out after {CLIENT_TIMEOUT_SECONDS}s, dropped")
+
+        except Exception as e:
+            logger.error(f"Model process {pid}: request failed: {str(e)}", exc_info=True)
+            try:
+                conn.send(("error", str(e)))
+            except Exception:
+                pass
+
+        finally:
+            conn.close()
+
+
+def fork_model_process(listener: Listener, engine) -> int:
+    """Fork one model process serving on listener; returns its pid (in the parent)."""
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            serve_forever(listener, engine)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def main():
+    """Load the model once, fork model processes, keep them running until terminated."""
+    socket_path = settings.OCR_INFERENCE_SOCKET
+    processes = max(1, settings.OCR_MODEL_PROCESSES)
+
+    if not settings.OCR_INFERENCE_AUTHKEY:
+        logger.error("OCR_INFERENCE_AUTHKEY is not set: refusing to serve without a shared secret")
+        sys.exit(1)
+
+    logger.info(f"Starting {settings.SERVICE_NAME} inference server v{settings.VERSION}")
+
+    start = time.perf_counter()
+    from app.ocr_engine import OCREngine
+    engine = OCREngine()
+    logger.info(f"Model loaded in {time.perf_counter() - start:.2f}s")
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    # Socket is reachable by the service user only
+    old_umask = os.umask(0o077)
+    try:
+        # No authkey here: accept() authenticates with OCR_INFERENCE_AUTHKEY under a timeout
+        listener = Listener(socket_path, family="AF_UNIX")
+    finally:
+        os.umask(old_umask)
+
+    logger.info(f"Listening on {socket_path} with {processes} model process(es)")
+
+    # Fork the model processes after the model is loaded, so the weights are
+    # shared copy-on-write. The parent never runs inference, so no inference
+    # thread pools exist that could break in the children, including re-forks.
+    children = {fork_model_process(listener, engine) for _ in range(processes)}
+
+    def shutdown(signum, frame):
+        logger.info("Shutting down inference server")
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Supervise: replace every model process that exits
+    while True:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            pid, status = None, 0
+        if pid in children:
+            children.discard(pid)
+            logger.error(f"Model process {pid} exited ({status}), starting a new one")
+        time.sleep(RESPAWN_DELAY_SECONDS)
+        while len(children) < processes:
+            children.add(fork_model_process(listener, engine))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,702 @@
+"""
+Scan Jobs: Submit Now, Fetch the Result Later
+
+A phone upload through the Node backend used to hold its HTTP connection open
+for the whole scan. With a job, POST /scan-mrz/jobs answers 202 with a job ID
+straight away. The client then polls GET /jobs/{id} or listens on the
+server-sent events stream GET /jobs/{id}/events until the job is done.
+
+Each job records its status (queued, running, done, failed, cancelled), its
+priority and, once finished, the scan result or error. The store is bounded:
+finished jobs are evicted JOB_TTL seconds after they finish, and at most
+JOB_MAX_JOBS are kept. When every slot holds an unfinished job, new jobs are
+rejected (503) instead of queueing without limit.
+
+Each worker runs its own jobs with a JobDispatcher, in priority order:
+
+- counter: an agent scanning a traveller at the counter (default for /scan-mrz/jobs)
+- bulk:    corporate-voucher batches (default for /scan-mrz/batch/jobs)
+
+A queued job that nobody has polled or streamed for JOB_ABANDON_SECONDS (the
+phone went away) is cancelled when it comes up, before it reaches PaddleOCR.
+Clients can also cancel a queued job with DELETE /jobs/{id}.
+
+Backends (JOB_STORE_BACKEND):
+- memory: per-worker store (default). Only for a single worker: a poll that
+  reaches another worker does not find the job.
+- sqlite: SQLite file shared by all uvicorn workers on the host, so any
+  worker answers polls and cancels. The default path is on /dev/shm
+  (tmpfs), so scan results never reach disk. Uploaded images always stay
+  in the memory of the worker that runs the job. Store calls run on the
+  event loop, so a write lock held by another worker is waited for
+  BUSY_TIMEOUT_SECONDS at most: a new job is then rejected (503), a poll
+  skips its "seen" update, and a job the runner cannot record fails.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.inference import InferenceQueueFull
+from app.log import event
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for another worker's write lock on the shared store
+BUSY_TIMEOUT_SECONDS = 0.1
+
+# Tries at recording a finished job while the shared store is locked (backing off 0.1s, 0.2s, ...)
+FINISH_ATTEMPTS = 5
+
+# Job priorities, most urgent first
+PRIORITY_COUNTER = "counter"
+PRIORITY_BULK = "bulk"
+PRIORITIES = {PRIORITY_COUNTER: 0, PRIORITY_BULK: 1}
+
+# Job kinds
+KIND_SCAN = "scan"
+KIND_BATCH = "batch"
+
+# Job statuses
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINISHED = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+# Work of one job: fills the job's log fields, returns the result
+JobWork = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobStoreFull(Exception):
+    """Raised when no job can be accepted right now."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job store full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobFailed(Exception):
+    """Raised by job work; the job fails with this status code and error."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def new_job_id() -> str:
+    """Unguessable job ID: the ID is all a client needs to read the result."""
+    return secrets.token_urlsafe(16)
+
+
+def abandoned_error(abandon_after: float) -> str:
+    return f"Abandoned: not polled for {abandon_after:g}s while queued"
+
+
+class MemoryJobStore:
+    """
+    In-process job store with TTL eviction.
+
+    Each uvicorn worker has its own copy.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_jobs: int, ttl: float, abandon_after: float):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.abandon_after = abandon_after
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # Creation order
+        self._lock = threading.Lock()
+        self._counters = {name: 0 for name in ("created", "rejected", STATUS_DONE, STATUS_FAILED,
+                                               STATUS_CANCELLED, "abandoned")}
+
+    def create(self, kind: str, priority: str) -> str:
+        """
+        Add a queued job and return its ID.
+
+        Raises:
+            JobStoreFull: if every slot holds an unfinished job
+        """
+        now = time.time()
+        with self._lock:
+            self._evict_locked(now)
+            if len(self._jobs) >= self.max_jobs:
+                self._counters["rejected"] += 1
+                raise JobStoreFull(settings.OCR_RETRY_AFTER_SECONDS)
+
+            job_id = new_job_id()
+            self._jobs[job_id] = {
+                "jobId": job_id,
+                "kind": kind,
+                "priority": priority,
+                "status": STATUS_QUEUED,
+                "createdAt": now,
+                "updatedAt": now,
+                "seenAt": now,
+                "result": None,
+                "error": None,
+                "statusCode": None,
+            }
+            self._counters["created"] += 1
+            return job_id
+
+    def _evict_locked(self, now: float) -> None:
+        """
+        Drop finished jobs past their TTL, unfinished jobs nobody has looked
+        at for a TTL, then the oldest finished jobs while the store is full.
+        Caller must hold the lock.
+        """
+        for job_id, job in list(self._jobs.items()):
+            last = job["updatedAt"] if job["status"] in FINISHED else max(job["updatedAt"], job["seenAt"])
+            if last <= now - self.ttl:
+                del self._jobs[job_id]
+
+        if len(self._jobs) >= self.max_jobs:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED]:
+                del self._jobs[job_id]
+                if len(self._jobs) < self.max_jobs:
+                    break
+
+    def get(self, job_id: str, seen: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return the job, or None if unknown or evicted.
+
+        seen=True counts as the client still waiting for it (see abandonment).
+        """
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if seen:
+                job["seenAt"] = now
+            return {key: value for key, value in job.items() if key != "seenAt"}
+
+    def start(self, job_id: str) -> bool:
+        """
+        Mark a queued job running. Returns False if it is no longer queued
+        (cancelled, evicted), or was abandoned, in which case it is cancelled.
+        """
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != STATUS_QUEUED:
+                return False
+            if now - job["seenAt"] > self.abandon_after:
+                job.update(status=STATUS_CANCELLED, updatedAt=now, error=abandoned_error(self.abandon_after))
+                self._counters[STATUS_CANCELLED] += 1
+                self._counters["abandoned"] += 1
+                return False
+            job.update(status=STATUS_RUNNING, updatedAt=now)
+            return True
+
+    def requeue(self, job_id: str) -> None:
+        """Put a running job back in the queued state (the inference queue was full)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] == STATUS_RUNNING:
+                job.update(status=STATUS_QUEUED, updatedAt=time.time())
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None, status_code: Optional[int] = None) -> None:
+        """Record the outcome of a running job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return
+            job.update(status=status, updatedAt=time.time(), result=result, error=error, statusCode=status_code)
+            self._counters[status] += 1
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job. Running and finished jobs are left as they are.
+
+        Returns the job's status after the call, or None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == STATUS_QUEUED:
+                job.update(status=STATUS_CANCELLED, updatedAt=time.time(), error="Cancelled by client")
+                self._counters[STATUS_CANCELLED] += 1
+            return job["status"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs by status and cumulative counters."""
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            counters = dict(self._counters)
+        return {
+            "backend": self.backend,
+            "jobs": len(statuses),
+            "maxJobs": self.max_jobs,
+            "ttl": self.ttl,
+            "queued": statuses.count(STATUS_QUEUED),
+            "running": statuses.count(STATUS_RUNNING),
+            **counters,
+        }
+
+
+class SqliteJobStore:
+    """
+    SQLite-backed job store with TTL eviction, shared across worker processes.
+
+    All workers open the same database file, so a job submitted to one
+    worker can be polled or cancelled through any other. Counters are
+    stored in the database too, so stats() reports totals for the service.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_jobs: int, ttl: float, abandon_after: float):
+        self.path = path
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.abandon_after = abandon_after
+        self._lock = threading.Lock()
+
+        # Scan results: readable by the service user only
+        old_umask = os.umask(0o077)
+        try:
+            self._conn = sqlite3.connect(
+                path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False, isolation_level=None
+            )
+        finally:
+            os.umask(old_umask)
+
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, priority TEXT NOT NULL, status TEXT NOT NULL, "
+            "created REAL NOT NULL, updated REAL NOT NULL, seen REAL NOT NULL, "
+            "result TEXT, error TEXT, status_code INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO counters VALUES ('created', 0), ('rejected', 0), ('done', 0), "
+            "('failed', 0), ('cancelled', 0), ('abandoned', 0)"
+        )
+
+    def _count(self, *names: str) -> None:
+        for name in names:
+            self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+    def create(self, kind: str, priority: str) -> str:
+        """
+        Add a queued job and return its ID.
+
+        Raises:
+            JobStoreFull: if every slot holds an unfinished job, or the store
+                stayed locked by another worker for BUSY_TIMEOUT_SECONDS
+        """
+        now = time.time()
+        job_id = new_job_id()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Job store busy, job rejected: {str(e)}")
+                raise JobStoreFull(settings.OCR_RETRY_AFTER_SECONDS)
+            try:
+                # Finished jobs past their TTL; unfinished ones nobody has looked at (their worker died)
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE CASE WHEN status IN ('done', 'failed', 'cancelled') "
+                    "THEN updated ELSE max(updated, seen) END <= ?",
+                    (now - self.ttl,)
+                )
+                count = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+                if count >= self.max_jobs:
+                    self._conn.execute(
+                        "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs "
+                        "WHERE status IN ('done', 'failed', 'cancelled') ORDER BY created LIMIT ?)",
+                        (count - self.max_jobs + 1,)
+                    )
+                    count = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+                if count >= self.max_jobs:
+                    self._count("rejected")
+                    self._conn.execute("COMMIT")
+                    raise JobStoreFull(settings.OCR_RETRY_AFTER_SECONDS)
+
+                self._conn.execute(
+                    "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL)",
+                    (job_id, kind, priority, STATUS_QUEUED, now, now, now)
+                )
+                self._count("created")
+                self._conn.execute("COMMIT")
+            except JobStoreFull:
+                raise
+            except sqlite3.OperationalError as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.warning(f"Job store busy, job rejected: {str(e)}")
+                raise JobStoreFull(settings.OCR_RETRY_AFTER_SECONDS)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def get(self, job_id: str, seen: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return the job, or None if unknown or evicted.
+
+        seen=True counts as the client still waiting for it (see abandonment).
+        """
+        with self._lock:
+            if seen:
+                try:
+                    self._conn.execute("UPDATE jobs SET seen = ? WHERE id = ?", (time.time(), job_id))
+                except sqlite3.OperationalError as e:
+                    # Only delays abandonment; the next poll updates it (reads are not blocked)
+                    logger.debug("Job %s: seen update skipped: %s", job_id, e)
+            row = self._conn.execute(
+                "SELECT id, kind, priority, status, created, updated, result, error, status_code "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "jobId": row[0],
+            "kind": row[1],
+            "priority": row[2],
+            "status": row[3],
+            "createdAt": row[4],
+            "updatedAt": row[5],
+            "result": json.loads(row[6]) if row[6] is not None else None,
+            "error": row[7],
+            "statusCode": row[8],
+        }
+
+    def start(self, job_id: str) -> bool:
+        """
+        Mark a queued job running. Returns False if it is no longer queued
+        (cancelled, evicted), or was abandoned, in which case it is cancelled.
+        """
+        now = time.time()
+        with self._lock:
+            started = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ? AND seen >= ?",
+                (STATUS_RUNNING, now, job_id, STATUS_QUEUED, now - self.abandon_after)
+            ).rowcount
+            if started:
+                return True
+
+            abandoned = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ?, error = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, now, abandoned_error(self.abandon_after), job_id, STATUS_QUEUED)
+            ).rowcount
+            if abandoned:
+                self._count(STATUS_CANCELLED, "abandoned")
+            return False
+
+    def requeue(self, job_id: str) -> None:
+        """Put a running job back in the queued state (the inference queue was full)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ?",
+                (STATUS_QUEUED, time.time(), job_id, STATUS_RUNNING)
+            )
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None, status_code: Optional[int] = None) -> None:
+        """Record the outcome of a running job."""
+        with self._lock:
+            finished = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ?, result = ?, error = ?, status_code = ? "
+                "WHERE id = ? AND status NOT IN ('done', 'failed', 'cancelled')",
+                (status, time.time(), json.dumps(result) if result is not None else None, error,
+                 status_code, job_id)
+            ).rowcount
+            if finished:
+                self._count(status)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job. Running and finished jobs are left as they are.
+
+        Returns the job's status after the call, or None if unknown.
+        """
+        with self._lock:
+            cancelled = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ?, error = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, time.time(), "Cancelled by client", job_id, STATUS_QUEUED)
+            ).rowcount
+            if cancelled:
+                self._count(STATUS_CANCELLED)
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs by status and cumulative counters (totals across all workers)."""
+        with self._lock:
+            statuses = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "backend": self.backend,
+            "jobs": sum(statuses.values()),
+            "maxJobs": self.max_jobs,
+            "ttl": self.ttl,
+            "queued": statuses.get(STATUS_QUEUED, 0),
+            "running": statuses.get(STATUS_RUNNING, 0),
+            **counters,
+        }
+
+
+class JobDispatcher:
+    """
+    Runs this worker's jobs, most urgent priority first, oldest first within
+    a priority.
+
+    At most JOB_CONCURRENCY jobs run at once (default: one per inference
+    thread), so queued jobs wait here in priority order rather than in the
+    inference executor's FIFO queue, and synchronous /scan-mrz requests keep
+    their executor queue slots. The uploaded bytes of queued jobs are bounded
+    by JOB_MAX_PENDING_BYTES.
+    """
+
+    def __init__(self, store, concurrency: int, max_pending_bytes: int):
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.max_pending_bytes = max_pending_bytes
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, Tuple[str, JobWork, int, float]] = {}  # job_id -> priority, work, size, created
+        self._pending_bytes = 0
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._sequence = itertools.count()
+        self._running = 0
+
+    def submit(self, kind: str, priority: str, work: JobWork, size: int) -> str:
+        """
+        Create a job in the store and queue its work (call from the event loop).
+
+        Raises:
+            JobStoreFull: if the store is full or queued uploads would exceed
+                JOB_MAX_PENDING_BYTES on this worker
+        """
+        try:
+            if self._pending and self._pending_bytes + size > self.max_pending_bytes:
+                raise JobStoreFull(settings.OCR_RETRY_AFTER_SECONDS)
+            job_id = self.store.create(kind, priority)
+        except JobStoreFull:
+            metrics.JOBS.labels(priority, "rejected").inc()
+            raise
+
+        self._start()
+        self._pending[job_id] = (priority, work, size, time.time())
+        self._pending_bytes += size
+        self._changed[job_id] = asyncio.Event()
+        self._queue.put_nowait((PRIORITIES[priority], next(self._sequence), job_id))
+        return job_id
+
+    def _start(self) -> None:
+        """Start the runner tasks on first use (they need the running event loop)."""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._run_forever()) for _ in range(self.concurrency)]
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job (see store.cancel) and free its upload if it runs on this worker."""
+        status = self.store.cancel(job_id)
+        if status == STATUS_CANCELLED:
+            pending = self._drop(job_id)
+            if pending is not None:
+                metrics.JOBS.labels(pending[0], STATUS_CANCELLED).inc()
+                self._notify(job_id, finished=True)
+        return status
+
+    def _drop(self, job_id: str) -> Optional[Tuple[str, JobWork, int, float]]:
+        pending = self._pending.pop(job_id, None)
+        if pending is not None:
+            self._pending_bytes -= pending[2]
+        return pending
+
+    def _notify(self, job_id: str, finished: bool = False) -> None:
+        """Wake event streams waiting on this job."""
+        changed = self._changed.pop(job_id, None)
+        if changed is not None:
+            changed.set()
+        if not finished:
+            self._changed[job_id] = asyncio.Event()
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        """
+        Wait until the job changes status or timeout passes.
+
+        Jobs of other workers (shared store) are not signalled here; the
+        caller re-reads the store after timeout.
+        """
+        changed = self._changed.get(job_id)
+        if changed is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_forever(self) -> None:
+        while True:
+            rank, sequence, job_id = await self._queue.get()
+            pending = self._pending.get(job_id)
+            if pending is None:
+                continue  # Cancelled while queued
+            try:
+                started = self.store.start(job_id)
+            except Exception as e:
+                # Store unavailable (e.g. locked by another worker): fail the job, keep this runner
+                logger.error(f"Job {job_id} failed: cannot start it in the job store: {str(e)}")
+                await self._finish(job_id, STATUS_FAILED, error="Job store unavailable", status_code=503)
+                self._drop(job_id)
+                metrics.JOBS.labels(pending[0], STATUS_FAILED).inc()
+                self._notify(job_id, finished=True)
+                continue
+            if not started:
+                # Cancelled through another worker, abandoned, or evicted
+                self._drop(job_id)
+                metrics.JOBS.labels(pending[0], STATUS_CANCELLED).inc()
+                self._notify(job_id, finished=True)
+                continue
+
+            self._notify(job_id)
+            self._running += 1
+            try:
+                requeue_after = await self._run(job_id, pending)
+            finally:
+                self._running -= 1
+
+            if requeue_after:
+                # The inference executor is full of synchronous scans: back off, keep our place
+                await asyncio.sleep(requeue_after)
+                self._queue.put_nowait((rank, sequence, job_id))
+            else:
+                self._drop(job_id)
+                self._notify(job_id, finished=True)
+
+    async def _run(self, job_id: str, pending: Tuple[str, JobWork, int, float]) -> int:
+        """Run one job's work and record its outcome. Returns seconds to wait before a retry, or 0."""
+        priority, work, _, created = pending
+        started = time.time()
+        fields: Dict[str, Any] = {}
+        status, status_code, error, result = STATUS_DONE, None, None, None
+
+        try:
+            result = await work(fields)
+        except InferenceQueueFull as e:
+            try:
+                self.store.requeue(job_id)
+            except Exception as store_error:
+                logger.warning(f"Job {job_id}: requeue not recorded in the job store: {str(store_error)}")
+            self._notify(job_id)
+            return e.retry_after
+        except JobFailed as e:
+            status, status_code, error = STATUS_FAILED, e.status_code, e.detail
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            status, status_code, error = STATUS_FAILED, 500, "Internal server error"
+
+        await self._finish(job_id, status, result=result, error=error, status_code=status_code)
+        metrics.JOBS.labels(priority, status).inc()
+        metrics.JOB_WAIT.labels(priority).observe(started - created)
+        event(
+            logger, "job", logging.INFO,
+            jobId=job_id, priority=priority, status=status,
+            waitMs=round((started - created) * 1000, 1),
+            runMs=round((time.time() - started) * 1000, 1),
+            **fields, **({"error": error} if error else {})
+        )
+        return 0
+
+    async def _finish(self, job_id: str, status: str, **outcome: Any) -> None:
+        """
+        store.finish, retried with backoff while the shared store is locked by
+        another worker. Gives up after FINISH_ATTEMPTS; the job then stays
+        unfinished in the store until it is evicted.
+        """
+        for attempt in range(FINISH_ATTEMPTS):
+            try:
+                self.store.finish(job_id, status, **outcome)
+                return
+            except Exception as e:
+                if attempt == FINISH_ATTEMPTS - 1:
+                    logger.error(f"Job {job_id}: outcome '{status}' not recorded in the job store: {str(e)}")
+                    return
+                await asyncio.sleep(BUSY_TIMEOUT_SECONDS * 2 ** attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        """This worker's queued and running jobs."""
+        return {
+            "concurrency": self.concurrency,
+            "pending": len(self._pending) - self._running,
+            "pendingBytes": self._pending_bytes,
+            "maxPendingBytes": self.max_pending_bytes,
+            "running": self._running,
+        }
+
+    async def stop(self) -> None:
+        """Stop the runner tasks; queued jobs are dropped with the process."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# Singleton instance
+_dispatcher_instance: Optional[JobDispatcher] = None
+
+
+def get_job_dispatcher() -> JobDispatcher:
+    """
+    Get singleton JobDispatcher (and its job store) for this worker.
+
+    Falls back to the in-memory store if the shared SQLite store cannot be
+    opened.
+    """
+    global _dispatcher_instance
+
+    if _dispatcher_instance is None:
+        backend = settings.JOB_STORE_BACKEND
+        store = None
+
+        if backend == "sqlite":
+            try:
+                store = SqliteJobStore(
+                    settings.JOB_STORE_PATH,
+                    settings.JOB_MAX_JOBS,
+                    settings.JOB_TTL,
+                    settings.JOB_ABANDON_SECONDS
+                )
+            except Exception as e:
+                logger.error(f"Failed to open shared job store at {settings.JOB_STORE_PATH}: {str(e)}")
+                logger.warning("Falling back to per-worker in-memory job store")
+
+        if store is None:
+            store = MemoryJobStore(settings.JOB_MAX_JOBS, settings.JOB_TTL, settings.JOB_ABANDON_SECONDS)
+
+        _dispatcher_instance = JobDispatcher(
+            store,
+            settings.JOB_CONCURRENCY or settings.OCR_INFERENCE_THREADS,
+            settings.JOB_MAX_PENDING_BYTES
+        )
+        logger.info(
+            f"Scan jobs enabled: {store.backend} store ({settings.JOB_MAX_JOBS} jobs, {settings.JOB_TTL}s TTL), "
+            f"{_dispatcher_instance.concurrency} running at once"
+        )
+
+    return _dispatcher_instance
@@ -0,0 +1,352 @@
+"""
+Live Scan: MRZ Recognition from a Camera Feed
+
+The phone streams downscaled camera frames over a WebSocket
+(/scan-mrz/stream) instead of uploading one photo that may turn out blurry.
+Full recognition takes seconds, so most frames never reach PaddleOCR:
+
+1. Every frame is decoded and assessed off the event loop. The MRZ band
+   locator (app.mrz_locator) runs on a 600 px wide grayscale copy, and the
+   variance of the Laplacian of the band measures its sharpness. This takes
+   a few milliseconds. Frames without a band (no_mrz) or below
+   STREAM_MIN_SHARPNESS (blurry) are skipped, and the client is told why,
+   so the agent can move the passport or hold still.
+2. Usable frames go into a sliding window of the last STREAM_WINDOW_FRAMES.
+   Once the window is full, or STREAM_WINDOW_MS after its first frame, the
+   sharpest frame is recognised. One recognition runs per session at a
+   time; meanwhile the window keeps sliding over newer frames.
+3. The session ends as soon as a recognised MRZ has valid check digits. A
+   result that fails the check digits is sent as non-final and scanning
+   goes on.
+
+Backpressure: the receiver never waits for the processor. It keeps only the
+latest unprocessed frame and drops the one it replaces, so a phone sending
+faster than the worker can assess never builds a backlog. What the client
+sees is always at most one frame behind.
+
+Sessions are limited per worker (STREAM_MAX_SESSIONS) and end after
+STREAM_MAX_SECONDS. LiveScan only needs receive, send and recognize
+callables; app.main supplies the WebSocket and the OCR engine.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.image_decode import decode_image
+from app.inference import InferenceQueueFull
+from app.mrz_locator import LOCATOR_WIDTH, locate_mrz_band
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Frame results (label values of greenpay_ocr_stream_frames_total)
+FRAME_USABLE = "usable"
+FRAME_BLURRY = "blurry"
+FRAME_NO_MRZ = "no_mrz"
+FRAME_INVALID = "invalid"  # Not a readable JPEG/PNG, text message or over STREAM_MAX_FRAME_BYTES
+FRAME_DROPPED = "dropped"  # Replaced by a newer frame before it was assessed
+FRAME_RESULTS = (FRAME_USABLE, FRAME_BLURRY, FRAME_NO_MRZ, FRAME_INVALID, FRAME_DROPPED)
+
+# Why a session ended (label values of greenpay_ocr_stream_sessions_total)
+END_DONE = "done"          # MRZ with valid check digits
+END_TIMEOUT = "timeout"    # STREAM_MAX_SECONDS passed
+END_CLOSED = "closed"      # Client disconnected
+END_ERROR = "error"        # Recognition or connection failed
+END_REFUSED = "refused"    # Rate limited or too many sessions on this worker
+
+# One client message: JPEG/PNG bytes, text (rejected), or None once the client has gone
+Receive = Callable[[], Awaitable[Optional[Union[bytes, str]]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+# Full recognition of one frame: the /scan-mrz response as a dict
+Recognize = Callable[[np.ndarray], Awaitable[Dict[str, Any]]]
+
+
+class FrameQuality(NamedTuple):
+    result: str                                   # FRAME_USABLE, FRAME_BLURRY or FRAME_NO_MRZ
+    sharpness: float                              # Laplacian variance of the MRZ band (0 without one)
+    band: Optional[Tuple[int, int, int, int]]     # Full-resolution crop box, as locate_mrz_band
+
+
+def assess_frame(image: np.ndarray, min_sharpness: float) -> FrameQuality:
+    """
+    Locate the MRZ band of a frame and measure its sharpness.
+
+    Both run on one grayscale copy at LOCATOR_WIDTH, so the sharpness does
+    not depend on the frame resolution the client picked.
+
+    Example:
+        >>> quality = assess_frame(image, settings.STREAM_MIN_SHARPNESS)
+        >>> quality.result, round(quality.sharpness)
+        ('usable', 2140)
+    """
+    full_h, full_w = image.shape[:2]
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    scale = min(1.0, LOCATOR_WIDTH / float(full_w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (LOCATOR_WIDTH, max(1, int(full_h * scale))), interpolation=cv2.INTER_AREA)
+
+    box = locate_mrz_band(gray)
+    if box is None:
+        return FrameQuality(FRAME_NO_MRZ, 0.0, None)
+
+    _, y0, _, y1 = box
+    sharpness = float(cv2.Laplacian(gray[y0:y1], cv2.CV_64F).var())
+    band = (0, int(y0 / scale), full_w, min(full_h, int(round(y1 / scale))))
+    return FrameQuality(FRAME_USABLE if sharpness >= min_sharpness else FRAME_BLURRY, sharpness, band)
+
+
+def decode_and_assess(data: bytes, min_sharpness: float) -> Tuple[np.ndarray, FrameQuality]:
+    """
+    Decode a frame and assess it (runs in a thread, off the event loop).
+
+    Raises:
+        ValueError: if the bytes are not a readable image
+    """
+    image, _ = decode_image(data)
+    return image, assess_frame(image, min_sharpness)
+
+
+class LiveScan:
+    """
+    One live scan session (see the module docstring).
+
+    Messages sent to the client:
+
+    - {"type": "frame", "frame": n, "quality": "usable"|"blurry"|"no_mrz"|"invalid",
+       "sharpness": s, "dropped": d}: for every assessed frame. n counts the
+       client's frames from 1; d is the number of frames dropped so far.
+    - {"type": "result", "frame": n, "final": bool, "scan": {...}}: a recognised
+      frame with the /scan-mrz response. final: the check digits are valid.
+    - {"type": "busy", "retryAfter": s}: the inference queue is full; the
+      next recognition waits s seconds (frames are still assessed).
+    - {"type": "end", "reason": "done"|"timeout"|"error", ...}: the last message.
+    """
+
+    def __init__(
+        self,
+        receive: Receive,
+        send: Send,
+        recognize: Recognize,
+        window_frames: int,
+        window_seconds: float,
+        min_sharpness: float,
+        max_frame_bytes: int,
+        max_seconds: float
+    ):
+        self.receive = receive
+        self.send = send
+        self.recognize = recognize
+        self.window_seconds = window_seconds
+        self.min_sharpness = min_sharpness
+        self.max_frame_bytes = max_frame_bytes
+        self.max_seconds = max_seconds
+
+        self.frames = 0
+        self.recognitions = 0
+        self.counts: Dict[str, int] = dict.fromkeys(FRAME_RESULTS, 0)
+        self.result: Optional[Dict[str, Any]] = None  # Last recognition result
+        self._latest: Optional[Tuple[int, Union[bytes, str]]] = None
+        self._arrived = asyncio.Event()
+        self._window: Deque[Tuple[float, int, np.ndarray]] = deque(maxlen=max(1, window_frames))
+        self._window_started = 0.0
+        self._retry_at = 0.0
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        metrics.STREAM_FRAMES.labels(result).inc()
+
+    async def _receive_forever(self) -> None:
+        """Keep the latest frame for the processor; a frame it has not taken yet is dropped."""
+        while True:
+            data = await self.receive()
+            if data is None:
+                return
+            self.frames += 1
+            if self._latest is not None:
+                self._count(FRAME_DROPPED)
+            self._latest = (self.frames, data)
+            self._arrived.set()
+
+    async def _assess(self, number: int, data: Union[bytes, str]) -> None:
+        """Assess one frame, tell the client, and put it in the window if usable."""
+        quality: Optional[FrameQuality] = None
+        error = None
+        if isinstance(data, str):
+            error = "Frames must be binary messages (JPEG or PNG)"
+        elif len(data) > self.max_frame_bytes:
+            error = f"Frame too large: {len(data)} bytes (limit {self.max_frame_bytes})"
+        else:
+            try:
+                image, quality = await asyncio.get_running_loop().run_in_executor(
+                    None, decode_and_assess, data, self.min_sharpness
+                )
+            except ValueError as e:
+                error = str(e)
+
+        if quality is None:
+            self._count(FRAME_INVALID)
+            await self.send({"type": "frame", "frame": number, "quality": FRAME_INVALID, "error": error,
+                             "dropped": self.counts[FRAME_DROPPED]})
+            return
+
+        self._count(quality.result)
+        await self.send({"type": "frame", "frame": number, "quality": quality.result,
+                         "sharpness": round(quality.sharpness, 1), "dropped": self.counts[FRAME_DROPPED]})
+        if quality.result == FRAME_USABLE:
+            if not self._window:
+                self._window_started = time.monotonic()
+            self._window.append((quality.sharpness, number, image))
+
+    def _window_due(self, now: float) -> float:
+        """When the window may next be recognised (inf while it is empty)."""
+        if not self._window:
+            return float("inf")
+        if len(self._window) == self._window.maxlen:
+            return max(now, self._retry_at)
+        return max(self._window_started + self.window_seconds, self._retry_at)
+
+    async def _recognize_best(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Recognise the sharpest frame of the window and empty it. None: the inference queue was full."""
+        _, number, image = max(self._window, key=lambda entry: entry[0])
+        self._window.clear()
+        try:
+            return number, await self.recognize(image)
+        except InferenceQueueFull as e:
+            self._retry_at = time.monotonic() + e.retry_after
+            await self.send({"type": "busy", "retryAfter": e.retry_after})
+            return number, None
+
+    async def run(self) -> Dict[str, Any]:
+        """Process the client's frames until the MRZ validates, the client leaves, or time runs out. Returns the session summary."""
+        start = time.monotonic()
+        deadline = start + self.max_seconds
+        receiver = asyncio.ensure_future(self._receive_forever())
+        arrival: Optional[asyncio.Future] = None
+        recognition: Optional[asyncio.Future] = None
+        reason = None
+
+        try:
+            while reason is None:
+                now = time.monotonic()
+                if now >= deadline:
+                    reason = END_TIMEOUT
+                    break
+                if recognition is None and self._window_due(now) <= now:
+                    recognition = asyncio.ensure_future(self._recognize_best())
+
+                if arrival is None:
+                    arrival = asyncio.ensure_future(self._arrived.wait())
+                waiting = {receiver, arrival} | ({recognition} if recognition else set())
+                wake = deadline if recognition else min(deadline, self._window_due(now))
+                await asyncio.wait(waiting, timeout=max(0.0, wake - now), return_when=asyncio.FIRST_COMPLETED)
+
+                if recognition is not None and recognition.done():
+                    number, result = recognition.result()
+                    recognition = None
+                    if result is not None:
+                        self.recognitions += 1
+                        self.result = result
+                        final = bool(result.get("success") and result.get("validCheckDigits"))
+                        await self.send({"type": "result", "frame": number, "final": final, "scan": result})
+                        if final:
+                            reason = END_DONE
+                            break
+
+                if arrival.done():
+                    arrival = None
+                    self._arrived.clear()
+                    number, data = self._latest
+                    self._latest = None
+                    await self._assess(number, data)
+                elif receiver.done():
+                    reason = END_CLOSED  # Client gone and every frame it sent is handled
+
+        except Exception as e:
+            logger.error(f"Live scan failed: {str(e)}", exc_info=True)
+            reason = END_ERROR
+
+        finally:
+            for task in (receiver, arrival, recognition):
+                if task is not None:
+                    task.cancel()
+            await asyncio.gather(*(t for t in (receiver, arrival, recognition) if t is not None),
+                                 return_exceptions=True)
+            self._window.clear()
+
+        summary = {
+            "reason": reason,
+            "frames": self.frames,
+            "usable": self.counts[FRAME_USABLE],
+            "blurry": self.counts[FRAME_BLURRY],
+            "noMrz": self.counts[FRAME_NO_MRZ],
+            "invalid": self.counts[FRAME_INVALID],
+            "dropped": self.counts[FRAME_DROPPED],
+            "recognitions": self.recognitions,
+            "durationMs": round((time.monotonic() - start) * 1000, 1),
+        }
+        if reason != END_CLOSED:
+            try:
+                await self.send({"type": "end", **summary})
+            except Exception:
+                pass  # Client already gone
+        return summary
+
+
+class StreamSessions:
+    """Live scan sessions open on this worker, bounded by STREAM_MAX_SESSIONS."""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._active = 0
+        self._ended: Dict[str, int] = {}
+
+    def open(self) -> bool:
+        """Take a session slot; False if the worker is at its limit."""
+        with self._lock:
+            if self._active >= self.max_sessions:
+                return False
+            self._active += 1
+            return True
+
+    def close(self, reason: str) -> None:
+        """Give the slot back and count how the session ended."""
+        with self._lock:
+            self._active -= 1
+            self._ended[reason] = self._ended.get(reason, 0) + 1
+        metrics.STREAM_SESSIONS.labels(reason).inc()
+
+    def refuse(self) -> None:
+        """Count a session turned away before it started."""
+        with self._lock:
+            self._ended[END_REFUSED] = self._ended.get(END_REFUSED, 0) + 1
+        metrics.STREAM_SESSIONS.labels(END_REFUSED).inc()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "maxSessions": self.max_sessions,
+                "ended": dict(self._ended),
+            }
+
+
+# Singleton instance
+_sessions_instance: Optional[StreamSessions] = None
+
+
+def get_stream_sessions() -> StreamSessions:
+    """Get singleton StreamSessions for this worker."""
+    global _sessions_instance
+
+    if _sessions_instance is None:
+        _sessions_instance = StreamSessions(settings.STREAM_MAX_SESSIONS)
+
+    return _sessions_instance
@@ -0,0 +1,176 @@
+"""
+Structured, Sampled Logging
+
+One handler on the root logger (configure_logging) for the HTTP workers and
+the inference server, instead of per-module stderr handlers. Three kinds of
+records:
+
+- Summary: one INFO record per request (event(logger, "request", ...)) with
+  the outcome, timings and scan result as key=value fields, or as a JSON
+  object with LOG_JSON=true.
+- Detail: the per-line OCR and per-field parse trace (Detail). Emitted at
+  DEBUG when LOG_LEVEL=DEBUG, or at INFO for a LOG_DETAIL_SAMPLE_RATE share of
+  scans. Otherwise a detail call is one attribute check: the message is
+  formatted lazily by logging, never for records that are not emitted.
+- Everything else (warnings, errors, startup) as before.
+
+PII (LOG_REDACT_PII, on by default): fields named in PII_FIELDS are masked
+by the formatter, and any MRZ-like run of characters left in a message is
+replaced by its length. Detail records pass document data as fields, not in
+the message, so sampled detail does not write passport numbers to the log.
+
+Example:
+    >>> redact_fields({"passportNumber": "L898902C3", "confidence": 0.97})
+    {'passportNumber': '*******C3', 'confidence': 0.97}
+    >>> redact_text("line P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<")
+    'line <mrz:44>'
+"""
+import json
+import logging
+import random
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# Document holder data: masked in every record
+PII_FIELDS = frozenset({
+    "passportNumber", "surname", "givenName", "dateOfBirth", "personalNumber",
+    "optionalData", "mrzText", "rawMrz", "line", "line1", "line2", "line3", "text",
+})
+
+# Runs of MRZ characters long enough to be (part of) an MRZ line
+MRZ_RUN = re.compile(r"[A-Z0-9<]*<[A-Z0-9<]{18,}|[A-Z0-9]{5,}<[A-Z0-9<]{14,}")
+
+
+def mask(value: Any) -> str:
+    """Keep the last two characters of a document number or name (enough to match a support case)."""
+    text = str(value)
+    if len(text) > 20:  # MRZ lines
+        return f"<redacted:{len(text)}>"
+    if len(text) <= 4:
+        return "*" * len(text)
+    return "*" * (len(text) - 2) + text[-2:]
+
+
+def redact_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of fields with the PII_FIELDS values masked."""
+    if PII_FIELDS.isdisjoint(fields):
+        return fields
+    return {
+        key: mask(value) if key in PII_FIELDS and value not in (None, "") else value
+        for key, value in fields.items()
+    }
+
+
+def redact_text(text: str) -> str:
+    """Replace MRZ-like character runs in a message with their length."""
+    return MRZ_RUN.sub(lambda match: f"<mrz:{len(match.group())}>", text)
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value if value and " " not in value and "=" not in value else json.dumps(value)
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+class TextFormatter(logging.Formatter):
+    """LOG_FORMAT followed by the record's fields as key=value pairs."""
+
+    def __init__(self, fmt: str, redact: bool):
+        super().__init__(fmt)
+        self.redact = redact
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if self.redact:
+            line = redact_text(line)
+        fields = getattr(record, "fields", None)
+        if fields:
+            if self.redact:
+                fields = redact_fields(fields)
+            line += " " + " ".join(f"{key}={_format_value(value)}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and the fields."""
+
+    def __init__(self, redact: bool):
+        super().__init__()
+        self.redact = redact
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact_text(message) if self.redact else message,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(redact_fields(fields) if self.redact else fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Install the single stderr handler on the root logger (replaces logging.basicConfig)."""
+    formatter = (
+        JsonFormatter(settings.LOG_REDACT_PII) if settings.LOG_JSON
+        else TextFormatter(settings.LOG_FORMAT, settings.LOG_REDACT_PII)
+    )
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, (level or settings.LOG_LEVEL).upper(), logging.INFO))
+
+
+def event(logger: logging.Logger, name: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Log one structured record: name as the message, fields as key=value (or JSON) fields."""
+    if logger.isEnabledFor(level):
+        logger.log(level, name, extra={"fields": fields})
+
+
+class Detail:
+    """
+    Per-scan trace for one module's logger.
+
+    begin() decides once per scan (per thread) whether this scan is traced;
+    calls in between cost a thread-local lookup when it is not.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._local = threading.local()
+
+    def begin(self) -> bool:
+        """Start a scan on this thread; returns whether its detail is logged."""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            level = logging.DEBUG
+        elif settings.LOG_DETAIL_SAMPLE_RATE > 0 and random.random() < settings.LOG_DETAIL_SAMPLE_RATE:
+            level = logging.INFO
+        else:
+            level = 0
+        self._local.level = level
+        return level > 0
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(self._local, "level", 0) > 0
+
+    def __call__(self, msg: str, *args: Any, **fields: Any) -> None:
+        """Log msg % args, plus document data as (redacted) fields, if this scan is traced."""
+        level = getattr(self._local, "level", 0)
+        if level and self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args, extra={"fields": fields} if fields else None)
@@ -3,28 +3,40 @@ GreenPay MRZ OCR Microservice - FastAPI Application
 
 High-precision passport MRZ scanning service using PaddleOCR and FastMRZ.
 """
+import asyncio
+import json
 import logging
 import time
-from typing import Optional
-from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
 
-import cv2
 import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.requests import HTTPConnection
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from PIL import Image
 
 from app.config import settings
+from app.log import configure_logging, event
 from app.ocr_engine import get_ocr_engine
 from app.mrz_parser import get_mrz_parser
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format=settings.LOG_FORMAT
+from app.inference import get_inference_executor, InferenceQueueFull
+from app.result_cache import get_result_cache, image_hash
+from app.rate_limit import client_identity, get_rate_limiter, retry_after_seconds
+from app.inference_client import InferenceServerUnavailable
+from app.image_decode import decode_image, get_decode_stats
+from app.upload import UploadedImage, UploadRejected, openapi_upload_body, read_image_uploads
+from app.warmup import get_warmup
+from app.jobs import (
+    FINISHED, KIND_BATCH, KIND_SCAN, PRIORITIES, PRIORITY_BULK, PRIORITY_COUNTER,
+    JobFailed, JobStoreFull, JobWork, get_job_dispatcher,
 )
+from app.live_scan import END_DONE, END_ERROR, LiveScan, get_stream_sessions
+from app import metrics
+from app.metrics import observe_stage, record_outcome
+
+# Configure logging (one structured handler for all modules, see app.log)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -40,52 +52,102 @@ if settings.CORS_ENABLED:
         CORSMiddleware,
         allow_origins=settings.CORS_ORIGINS,
         allow_credentials=True,
-        allow_methods=["POST", "GET"],
+        allow_methods=["POST", "GET", "DELETE"],
         allow_headers=["*"],
     )
 
-# Rate limiting (simple in-memory implementation)
-request_counts = {}  # {ip: [(timestamp, count), ...]}
-
 
-def check_rate_limit(request: Request) -> bool:
+class RequestSummaryMiddleware:
     """
-    Simple rate limiting: 60 requests per minute per IP.
+    One structured log record per request, written when the response is done.
 
-    Returns True if allowed, False if rate limit exceeded.
+    Endpoints add their outcome to the record with log_fields(request). Scan
+    requests are logged at INFO, everything else (health checks, metrics
+    scrapes) at DEBUG.
     """
-    if not settings.RATE_LIMIT_ENABLED:
-        return True
 
-    client_ip = request.client.host
-    current_time = time.time()
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        fields = scope.setdefault("state", {}).setdefault("log_fields", {})
+        status = [500]
 
-    # Clean old entries (older than 60 seconds)
-    if client_ip in request_counts:
-        request_counts[client_ip] = [
-            (ts, count) for ts, count in request_counts[client_ip]
-            if current_time - ts < 60
-        ]
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            path = scope["path"]
+            event(
+                logger, "request", logging.INFO if path.startswith("/scan-mrz") else logging.DEBUG,
+                method=scope["method"], path=path, status=status[0],
+                durationMs=round((time.perf_counter() - start) * 1000, 1), **fields
+            )
 
-    # Count requests in last minute
-    if client_ip not in request_counts:
-        request_counts[client_ip] = []
 
-    total_requests = sum(count for _, count in request_counts[client_ip])
+app.add_middleware(RequestSummaryMiddleware)
 
-    if total_requests >= settings.RATE_LIMIT_REQUESTS:
-        return False
 
-    # Add current request
-    request_counts[client_ip].append((current_time, 1))
-    return True
+def log_fields(request: HTTPConnection) -> Dict[str, Any]:
+    """Fields of this request's summary record (see RequestSummaryMiddleware)."""
+    return request.scope.setdefault("state", {}).setdefault("log_fields", {})
+
+
+def scan_log_fields(response: "MRZResponse") -> Dict[str, Any]:
+    """Summary fields of one scan result. No document data: the passport number is masked by app.log."""
+    fields = {
+        "success": response.success,
+        "confidence": round(response.confidence, 4),
+        "detectionPath": response.detectionPath,
+        "cached": response.cached,
+    }
+    if response.success:
+        fields["documentType"] = response.documentType
+        fields["passportNumber"] = response.passportNumber
+        fields["validCheckDigits"] = response.validCheckDigits
+        fields["corrections"] = len(response.corrections or ())
+    else:
+        fields["error"] = response.error
+    return fields
+
+
+def check_rate_limit(request: HTTPConnection) -> int:
+    """
+    Count one request (or live scan session) against the client's rate limit (see app.rate_limit).
+
+    Returns 0 if allowed, otherwise the Retry-After seconds.
+    """
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return 0
+
+    identity = client_identity(
+        request.client.host if request.client else None,
+        request.headers.get(settings.RATE_LIMIT_CLIENT_HEADER)
+    )
+    wait = rate_limiter.check(identity)
+    if wait > 0:
+        log_fields(request)["client"] = identity
+        return retry_after_seconds(wait)
+    return 0
 
 
 # Response models
 class MRZResponse(BaseModel):
     """Successful MRZ scan response"""
     success: bool
-    passportNumber: Optional[str] = None
+    documentType: Optional[str] = None  # MRZ layout: TD3 (passport), TD1/TD2 (ID card), MRVA/MRVB (visa)
+    documentCode: Optional[str] = None  # P, I, ID, AC, V, ... as printed in the MRZ
+    passportNumber: Optional[str] = None  # Document number (ID cards and visas too)
     surname: Optional[str] = None
     givenName: Optional[str] = None
     nationality: Optional[str] = None
@@ -94,12 +156,38 @@ class MRZResponse(BaseModel):
     dateOfExpiry: Optional[str] = None
     issuingCountry: Optional[str] = None
     personalNumber: Optional[str] = None
+    optionalData: Optional[str] = None  # ID cards and visas: optional data field(s)
     confidence: float
     validCheckDigits: Optional[bool] = None
+    checkDigits: Optional[Dict[str, bool]] = None  # Per check digit: passportNumber, dateOfBirth, ...
+    corrections: Optional[List[Dict[str, Any]]] = None  # Characters changed from mrzText: position, read, corrected
     mrzText: Optional[str] = None
+    detectionPath: Optional[str] = None  # "band" (MRZ crop) or "full" (whole image)
+    processingTime: Optional[float] = None
+    error: Optional[str] = None
+    cached: bool = False  # True if served from the result cache (no OCR run)
+
+
+class BatchMRZResponse(BaseModel):
+    """Batch MRZ scan response (one result per uploaded file, in upload order)"""
+    success: bool
+    results: List[MRZResponse]
     processingTime: Optional[float] = None
 
 
+class JobResponse(BaseModel):
+    """Scan job status (see app.jobs); result is set once the job is done"""
+    jobId: str
+    kind: str  # "scan" (/scan-mrz/jobs) or "batch" (/scan-mrz/batch/jobs)
+    priority: str  # "counter" or "bulk"
+    status: str  # queued, running, done, failed, cancelled
+    createdAt: float  # Unix time
+    updatedAt: float  # Unix time of the last status change
+    result: Optional[Dict[str, Any]] = None  # MRZResponse (scan) or BatchMRZResponse (batch)
+    error: Optional[str] = None  # Why the job failed or was cancelled
+    statusCode: Optional[int] = None  # Failed jobs: the status the synchronous endpoint would have returned
+
+
 class ErrorResponse(BaseModel):
     """Error response"""
     success: bool = False
@@ -107,27 +195,386 @@ class ErrorResponse(BaseModel):
     confidence: float = 0.0
 
 
+def build_mrz_response(
+    mrz_text: Optional[str],
+    confidence: float,
+    detection_path: str,
+    start_time: float,
+    check_report: Optional[Dict[str, Any]] = None
+) -> MRZResponse:
+    """
+    Turn OCR output into an MRZResponse.
+
+    Applies the confidence threshold and parses the MRZ. Failures are
+    reported as success=False with an error message. check_report is a
+    precomputed check digit report (batch scans validate all MRZs at once).
+    """
+    if not mrz_text:
+        record_outcome(metrics.OUTCOME_NO_MRZ)
+        return MRZResponse(
+            success=False,
+            error="No MRZ detected in image",
+            confidence=confidence,
+            detectionPath=detection_path,
+            processingTime=time.time() - start_time
+        )
+
+    # Check confidence threshold
+    if confidence < settings.OCR_CONFIDENCE_THRESHOLD:
+        record_outcome(metrics.OUTCOME_LOW_CONFIDENCE)
+        return MRZResponse(
+            success=False,
+            error=f"Low OCR confidence: {confidence:.2%}",
+            confidence=confidence,
+            mrzText=mrz_text,
+            detectionPath=detection_path,
+            processingTime=time.time() - start_time
+        )
+
+    # Parse MRZ text
+    mrz_parser = get_mrz_parser()
+    with observe_stage("parse"):
+        parsed_data = mrz_parser.parse(mrz_text, check_report)
+
+    if not parsed_data:
+        record_outcome(metrics.OUTCOME_PARSE_FAILURE)
+        return MRZResponse(
+            success=False,
+            error="Failed to parse MRZ data",
+            confidence=confidence,
+            mrzText=mrz_text,
+            detectionPath=detection_path,
+            processingTime=time.time() - start_time
+        )
+
+    # Success!
+    record_outcome(metrics.OUTCOME_SUCCESS)
+    metrics.record_check_digits(bool(parsed_data.get('validCheckDigits')), bool(parsed_data.get('corrections')))
+    processing_time = time.time() - start_time
+
+    return MRZResponse(
+        success=True,
+        documentType=parsed_data.get('documentType'),
+        documentCode=parsed_data.get('documentCode'),
+        passportNumber=parsed_data.get('passportNumber'),
+        surname=parsed_data.get('surname'),
+        givenName=parsed_data.get('givenName'),
+        nationality=parsed_data.get('nationality'),
+        dateOfBirth=parsed_data.get('dateOfBirth'),
+        sex=parsed_data.get('sex'),
+        dateOfExpiry=parsed_data.get('dateOfExpiry'),
+        issuingCountry=parsed_data.get('issuingCountry'),
+        personalNumber=parsed_data.get('personalNumber'),
+        optionalData=parsed_data.get('optionalData'),
+        confidence=confidence,
+        validCheckDigits=parsed_data.get('validCheckDigits'),
+        checkDigits=parsed_data.get('checkDigits'),
+        corrections=parsed_data.get('corrections'),
+        mrzText=mrz_text,
+        detectionPath=detection_path,
+        processingTime=processing_time
+    )
+
+
+def cached_response(cache_key: str, start_time: float) -> Optional[MRZResponse]:
+    """Return the cached scan result for an image hash, or None on miss."""
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return None
+
+    try:
+        cached = result_cache.get(cache_key)
+    except Exception as e:
+        logger.error(f"Result cache lookup failed: {str(e)}")
+        return None
+
+    if cached is None:
+        metrics.CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    metrics.CACHE_LOOKUPS.labels("hit").inc()
+    record_outcome(metrics.OUTCOME_CACHED)
+    return MRZResponse(**cached, cached=True, processingTime=time.time() - start_time)
+
+
+def store_response(cache_key: str, response: MRZResponse) -> None:
+    """Cache a successful scan result (parsed fields only, never the image)."""
+    result_cache = get_result_cache()
+    if result_cache is None or not response.success:
+        return
+
+    try:
+        result_cache.put(cache_key, response.model_dump(exclude={"processingTime", "cached"}))
+    except Exception as e:
+        logger.error(f"Result cache store failed: {str(e)}")
+
+
+def inference_error(e: Exception) -> HTTPException:
+    """503 for a scan that could not get to the OCR model (queue full or inference server down)."""
+    if isinstance(e, InferenceQueueFull):
+        record_outcome(metrics.OUTCOME_QUEUE_FULL)
+        return HTTPException(
+            status_code=503,
+            detail="OCR service busy. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    logger.error(f"Inference server unavailable: {str(e)}")
+    record_outcome(metrics.OUTCOME_ERROR)
+    return HTTPException(
+        status_code=503,
+        detail="OCR inference server unavailable. Please try again shortly.",
+        headers={"Retry-After": str(settings.OCR_RETRY_AFTER_SECONDS)}
+    )
+
+
+async def scan_image(contents: bytes, start_time: float, fields: Dict[str, Any]) -> MRZResponse:
+    """
+    Scan one uploaded image: result cache, decode, OCR, parse.
+
+    Used by /scan-mrz and by scan jobs. Adds the scan's summary to fields
+    (the request's or the job's log record). Hashing and decoding run off
+    the event loop, like in scan_images.
+
+    Raises:
+        HTTPException: 400 if the image cannot be decoded
+        InferenceQueueFull, InferenceServerUnavailable: see inference_error
+    """
+    # Repeat upload of the same image: answer from cache (hashed off the event loop)
+    cache_key = await asyncio.get_running_loop().run_in_executor(None, image_hash, contents)
+    response = cached_response(cache_key, start_time)
+    if response is not None:
+        fields.update(scan_log_fields(response))
+        return response
+
+    ocr_engine = get_ocr_engine()
+    decoded: Dict[str, Any] = {}
+
+    def decode_and_scan() -> Optional[Tuple[Optional[str], float, str]]:
+        """
+        Runs on the inference executor: decode straight into a BGR array
+        (downscaled when far above MRZ needs), then extract the MRZ text.
+        Returns None if the image cannot be decoded.
+        """
+        try:
+            with observe_stage("decode"):
+                image_np, decoded["info"] = decode_image(contents)
+        except Exception as e:
+            decoded["error"] = e
+            return None
+        return ocr_engine.extract_mrz(image_np)
+
+    ocr_start = time.perf_counter()
+    ocr_result = await get_inference_executor().run(decode_and_scan)
+    ocr_seconds = time.perf_counter() - ocr_start
+
+    if ocr_result is None:
+        e = decoded["error"]
+        logger.error(f"Image conversion failed: {str(e)}")
+        record_outcome(metrics.OUTCOME_INVALID_INPUT)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to process image: {str(e)}"
+        )
+
+    decode_info = decoded["info"]
+    mrz_text, confidence, detection_path = ocr_result
+    fields.update(
+        image=f"{decode_info['width']}x{decode_info['height']}",
+        scale=decode_info['scale'],
+        decodeMs=round(decode_info['decodeTime'] * 1000, 1),
+        ocrMs=round((ocr_seconds - decode_info['decodeTime']) * 1000, 1)
+    )
+
+    response = build_mrz_response(mrz_text, confidence, detection_path, start_time)
+    get_warmup().record_scan(time.time() - start_time)
+    store_response(cache_key, response)
+    fields.update(scan_log_fields(response))
+    return response
+
+
+async def scan_images(uploads: List[UploadedImage], start_time: float, fields: Dict[str, Any]) -> BatchMRZResponse:
+    """
+    Scan a batch of uploaded images with one inference job.
+
+    Used by /scan-mrz/batch and by batch scan jobs. A file that cannot be
+    read or scanned gets success=False; the rest of the batch is unaffected.
+    Hashing and decoding run off the event loop; the data of every upload
+    that was decoded is emptied in uploads.
+
+    Raises:
+        InferenceQueueFull, InferenceServerUnavailable: see inference_error
+    """
+    # Hash off the event loop (a batch can be hundreds of MB), then answer repeats from cache
+    cache_keys = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: [image_hash(upload.data) for upload in uploads]
+    )
+    errors: List[Optional[str]] = [upload.error for upload in uploads]
+    cached = [cached_response(key, start_time) if error is None else None for key, error in zip(cache_keys, errors)]
+    to_scan = [i for i in range(len(uploads)) if errors[i] is None and cached[i] is None]
+    for error in errors:
+        if error:
+            record_outcome(metrics.OUTCOME_INVALID_INPUT)
+
+    ocr_engine = get_ocr_engine()
+    decode_seconds = [0.0]
+
+    def decode_and_scan() -> List[Tuple[Optional[str], float, str]]:
+        """
+        Runs on the inference executor: decode the files still to scan, then
+        OCR them as one batch. Each upload's bytes are released once decoded,
+        so the batch never holds every upload and every decoded image at once.
+        """
+        images: List[Optional[np.ndarray]] = [None] * len(uploads)
+        decode_start = time.perf_counter()
+        for i in to_scan:
+            try:
+                with observe_stage("decode"):
+                    images[i], _ = decode_image(uploads[i].data)
+            except Exception as e:
+                errors[i] = f"Failed to process image: {str(e)}"
+                record_outcome(metrics.OUTCOME_INVALID_INPUT)
+            uploads[i] = uploads[i]._replace(data=memoryview(b""))
+        decode_seconds[0] = time.perf_counter() - decode_start
+
+        if all(image_np is None for image_np in images):
+            return [(None, 0.0, "full")] * len(images)
+        return ocr_engine.extract_mrz_batch(images)
+
+    # One inference job for the whole batch (skipped if nothing is left to scan)
+    ocr_results = [(None, 0.0, "full")] * len(uploads)
+    if to_scan:
+        ocr_start = time.perf_counter()
+        ocr_results = await get_inference_executor().run(decode_and_scan)
+        fields["decodeMs"] = round(decode_seconds[0] * 1000, 1)
+        fields["ocrMs"] = round((time.perf_counter() - ocr_start - decode_seconds[0]) * 1000, 1)
+
+    # Check digits of the whole batch in one vectorised pass
+    check_reports = get_mrz_parser().check_digit_reports([mrz_text for mrz_text, _, _ in ocr_results])
+
+    results = []
+    for i, (mrz_text, confidence, detection_path) in enumerate(ocr_results):
+        if errors[i]:
+            results.append(MRZResponse(success=False, error=errors[i], confidence=0.0))
+            continue
+
+        if cached[i] is not None:
+            results.append(cached[i])
+            continue
+
+        try:
+            response = build_mrz_response(mrz_text, confidence, detection_path, start_time, check_reports[i])
+            store_response(cache_keys[i], response)
+            results.append(response)
+        except Exception as e:
+            logger.error(f"Batch item failed: {str(e)}", exc_info=True)
+            record_outcome(metrics.OUTCOME_ERROR)
+            results.append(MRZResponse(success=False, error="Internal error", confidence=0.0))
+
+    processing_time = time.time() - start_time
+    succeeded = sum(1 for r in results if r.success)
+    fields.update(
+        files=len(results),
+        succeeded=succeeded,
+        cached=sum(1 for r in results if r.cached),
+        rejected=sum(1 for error in errors if error)
+    )
+
+    return BatchMRZResponse(
+        success=True,
+        results=results,
+        processingTime=processing_time
+    )
+
+
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint.
 
-    Returns service status and version.
+    Returns service status, version, warm-up, inference queue, result cache,
+    rate limiter, image decode, scan job and live scan statistics. "healthy" means the
+    process is up; use /ready to know whether it has warmed up.
     """
+    result_cache = get_result_cache()
+    rate_limiter = get_rate_limiter()
+    job_dispatcher = get_job_dispatcher()
     return {
         "status": "healthy",
         "service": settings.SERVICE_NAME,
-        "version": settings.VERSION
+        "version": settings.VERSION,
+        "warmup": get_warmup().stats(),
+        "inference": get_inference_executor().stats(),
+        "cache": result_cache.stats() if result_cache else None,
+        "rateLimit": rate_limiter.stats() if rate_limiter else None,
+        "decode": get_decode_stats(),
+        "jobs": {**job_dispatcher.store.stats(), "worker": job_dispatcher.stats()},
+        "stream": get_stream_sessions().stats()
     }
 
 
-@app.post("/scan-mrz", response_model=MRZResponse)
-async def scan_mrz(request: Request, file: UploadFile = File(...)):
+@app.get("/ready")
+async def readiness_check():
     """
-    Scan passport image and extract MRZ data.
+    Readiness endpoint.
+
+    200 once this worker's startup warm-up has run the models (see
+    app.warmup), 503 before that or if the warm-up failed. The body reports
+    the warm-up status and, with shared metrics, how many workers are ready.
+    """
+    warmup = get_warmup()
+    return JSONResponse(
+        status_code=200 if warmup.ready else 503,
+        content={"ready": warmup.ready, **warmup.stats()}
+    )
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Per-stage latency histograms, scan outcome counters, inference queue
+    and result cache metrics. Aggregated across all uvicorn workers (and
+    the shared inference server) when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    return Response(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@app.delete("/cache")
+async def purge_cache():
+    """
+    Purge all cached scan results.
+
+    With the sqlite backend this clears the cache for every worker.
+    """
+    result_cache = get_result_cache()
+    purged = result_cache.purge() if result_cache else 0
+    logger.info(f"Result cache purged ({purged} entries)")
+    return {"success": True, "purged": purged}
+
+
+@app.delete("/cache/{cache_key}")
+async def purge_cache_entry(cache_key: str):
+    """
+    Purge the cached scan result for one image.
 
     Args:
-        file: Image file (JPG, PNG) containing passport with MRZ
+        cache_key: SHA-256 hex digest of the uploaded image bytes
+    """
+    result_cache = get_result_cache()
+    purged = result_cache.purge(cache_key.lower()) if result_cache else 0
+    return {"success": True, "purged": purged}
+
+
+@app.post("/scan-mrz", response_model=MRZResponse, openapi_extra=openapi_upload_body("file"))
+async def scan_mrz(request: Request):
+    """
+    Scan passport image and extract MRZ data.
+
+    Form fields:
+        file: Image file (JPG, PNG) containing passport with MRZ. Streamed:
+            oversized or non-image uploads are rejected while they arrive
 
     Returns:
         MRZResponse with parsed passport data
@@ -138,131 +585,475 @@ async def scan_mrz(request: Request, file: UploadFile = File(...)):
             - 400: Invalid file format or size
             - 422: No MRZ detected or parsing failed
             - 500: Internal server error
+            - 503: Inference queue full (see Retry-After header)
     """
     start_time = time.time()
 
     try:
         # Rate limiting
-        if not check_rate_limit(request):
-            logger.warning(f"Rate limit exceeded for {request.client.host}")
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            record_outcome(metrics.OUTCOME_RATE_LIMITED)
             raise HTTPException(
                 status_code=429,
-                detail="Rate limit exceeded. Please try again later."
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(retry_after)}
             )
 
-        # Validate file size
-        contents = await file.read()
-        file_size = len(contents)
+        # Stream the upload: size cap and file type are enforced while it arrives
+        try:
+            upload = (await read_image_uploads(request, "file", settings.MAX_FILE_SIZE))[0]
+        except UploadRejected as e:
+            record_outcome(metrics.OUTCOME_INVALID_INPUT)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+        # Cache, decode, OCR, parse (shared with scan jobs)
+        try:
+            return await scan_image(upload.data, start_time, log_fields(request))
+        except (InferenceQueueFull, InferenceServerUnavailable) as e:
+            raise inference_error(e)
+
+    except HTTPException:
+        # Re-raise HTTP exceptions (already formatted)
+        raise
+
+    except Exception as e:
+        # Unexpected error
+        logger.error(f"Unexpected error in scan_mrz: {str(e)}", exc_info=True)
+        record_outcome(metrics.OUTCOME_ERROR)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+    finally:
+        metrics.SCAN_LATENCY.labels("scan").observe(time.time() - start_time)
+
+
+@app.post(
+    "/scan-mrz/batch",
+    response_model=BatchMRZResponse,
+    openapi_extra=openapi_upload_body("files", multiple=True)
+)
+async def scan_mrz_batch(request: Request):
+    """
+    Scan many passport images in one request.
+
+    Text detection runs per image; the detected line crops of all images
+    are then recognised together in large batches, which is much cheaper
+    per image than calling /scan-mrz once per file.
+
+    Form fields:
+        files: Image files (JPG, PNG) containing passports with MRZ. Streamed:
+            an oversized or non-image file is skipped as it arrives
+
+    Returns:
+        BatchMRZResponse with one MRZResponse per file, in upload order.
+        A file that cannot be read or scanned gets success=False and an
+        error message; the rest of the batch is unaffected.
+
+    Raises:
+        HTTPException:
+            - 429: Rate limit exceeded
+            - 400: Too many files
+            - 500: Internal server error
+            - 503: Inference queue full (see Retry-After header)
+    """
+    start_time = time.time()
 
-        if file_size > settings.MAX_FILE_SIZE:
-            logger.warning(f"File too large: {file_size} bytes")
+    try:
+        # Rate limiting (one batch counts as one request)
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            record_outcome(metrics.OUTCOME_RATE_LIMITED)
             raise HTTPException(
-                status_code=400,
-                detail=f"File size ({file_size} bytes) exceeds maximum ({settings.MAX_FILE_SIZE} bytes)"
+                status_code=429,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(retry_after)}
             )
 
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith("image/"):
-            logger.warning(f"Invalid file type: {file.content_type}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type: {file.content_type}. Only images allowed."
+        # Stream the files; an oversized or non-image file becomes a per-item error
+        try:
+            uploads = await read_image_uploads(
+                request, "files", settings.MAX_FILE_SIZE, max_files=settings.MAX_BATCH_FILES
             )
+        except UploadRejected as e:
+            record_outcome(metrics.OUTCOME_INVALID_INPUT)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-        # Convert to OpenCV image
+        # Decode, OCR all files as one inference job, parse (shared with batch scan jobs)
         try:
-            image = Image.open(BytesIO(contents))
-            image_np = np.array(image)
+            return await scan_images(uploads, start_time, log_fields(request))
+        except (InferenceQueueFull, InferenceServerUnavailable) as e:
+            raise inference_error(e)
 
-            # Convert RGB to BGR (OpenCV format)
-            if len(image_np.shape) == 3 and image_np.shape[2] == 3:
-                image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-            elif len(image_np.shape) == 2:
-                # Grayscale image, convert to BGR
-                image_np = cv2.cvtColor(image_np, cv2.COLOR_GRAY2BGR)
+    except HTTPException:
+        raise
 
-        except Exception as e:
-            logger.error(f"Image conversion failed: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error in scan_mrz_batch: {str(e)}", exc_info=True)
+        record_outcome(metrics.OUTCOME_ERROR)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+    finally:
+        metrics.SCAN_LATENCY.labels("batch").observe(time.time() - start_time)
+
+
+def job_priority(request: Request, default: str) -> str:
+    """The priority query parameter ("counter" or "bulk"), or default."""
+    priority = request.query_params.get("priority", default)
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority: {priority}. Use {' or '.join(PRIORITIES)}."
+        )
+    return priority
+
+
+def job_failed(e: HTTPException) -> JobFailed:
+    """A scan error as the failure of a job."""
+    return JobFailed(e.status_code, e.detail)
+
+
+def submit_job(request: Request, kind: str, priority: str, work: JobWork, size: int) -> JSONResponse:
+    """
+    Queue a scan job and answer 202 with its status (Location: /jobs/{id}).
+
+    Raises:
+        HTTPException: 503 if no job can be accepted right now
+    """
+    dispatcher = get_job_dispatcher()
+    try:
+        job_id = dispatcher.submit(kind, priority, work, size)
+    except JobStoreFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many scan jobs. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    log_fields(request).update(jobId=job_id, priority=priority)
+    job = dispatcher.store.get(job_id, seen=False)
+    return JSONResponse(
+        status_code=202,
+        content=JobResponse(**job).model_dump(),
+        headers={"Location": f"/jobs/{job_id}"}
+    )
+
+
+def find_job(job_id: str) -> Dict[str, Any]:
+    """The job (counts as the client polling it), or 404."""
+    job = get_job_dispatcher().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired)")
+    return job
+
+
+@app.post(
+    "/scan-mrz/jobs",
+    status_code=202,
+    response_model=JobResponse,
+    openapi_extra=openapi_upload_body("file")
+)
+async def submit_scan_job(request: Request):
+    """
+    Queue a passport scan and return a job ID straight away.
+
+    Poll GET /jobs/{jobId} or listen on GET /jobs/{jobId}/events for the
+    result, which is the /scan-mrz response. A queued job that is neither
+    polled nor streamed for JOB_ABANDON_SECONDS is cancelled unscanned.
+
+    Form fields:
+        file: Image file (JPG, PNG) containing passport with MRZ
+
+    Query parameters:
+        priority: "counter" (default) or "bulk"
+
+    Returns:
+        202 with the queued JobResponse and a Location header
+
+    Raises:
+        HTTPException:
+            - 429: Rate limit exceeded
+            - 400: Invalid file format, size or priority
+            - 503: Too many jobs (see Retry-After header)
+    """
+    try:
+        priority = job_priority(request, PRIORITY_COUNTER)
+
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            record_outcome(metrics.OUTCOME_RATE_LIMITED)
             raise HTTPException(
-                status_code=400,
-                detail=f"Failed to process image: {str(e)}"
+                status_code=429,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(retry_after)}
             )
 
-        # Extract MRZ text using PaddleOCR
-        ocr_engine = get_ocr_engine()
-        mrz_text, confidence = ocr_engine.extract_mrz(image_np)
-
-        if not mrz_text:
-            logger.warning("No MRZ detected in image")
-            return MRZResponse(
-                success=False,
-                error="No MRZ detected in image",
-                confidence=confidence,
-                processingTime=time.time() - start_time
-            )
+        try:
+            upload = (await read_image_uploads(request, "file", settings.MAX_FILE_SIZE))[0]
+        except UploadRejected as e:
+            record_outcome(metrics.OUTCOME_INVALID_INPUT)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        contents = upload.data
+
+        async def work(fields: Dict[str, Any]) -> Dict[str, Any]:
+            start_time = time.time()
+            try:
+                response = await scan_image(contents, start_time, fields)
+            except InferenceServerUnavailable as e:
+                raise job_failed(inference_error(e))
+            except HTTPException as e:
+                raise job_failed(e)
+            finally:
+                metrics.SCAN_LATENCY.labels("job").observe(time.time() - start_time)
+            return response.model_dump()
+
+        return submit_job(request, KIND_SCAN, priority, work, len(contents))
+
+    except HTTPException:
+        raise
 
-        # Check confidence threshold
-        if confidence < settings.OCR_CONFIDENCE_THRESHOLD:
-            logger.warning(f"Low confidence: {confidence:.2%}")
-            return MRZResponse(
-                success=False,
-                error=f"Low OCR confidence: {confidence:.2%}",
-                confidence=confidence,
-                mrzText=mrz_text,
-                processingTime=time.time() - start_time
+    except Exception as e:
+        logger.error(f"Unexpected error in submit_scan_job: {str(e)}", exc_info=True)
+        record_outcome(metrics.OUTCOME_ERROR)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.post(
+    "/scan-mrz/batch/jobs",
+    status_code=202,
+    response_model=JobResponse,
+    openapi_extra=openapi_upload_body("files", multiple=True)
+)
+async def submit_batch_job(request: Request):
+    """
+    Queue a batch scan and return a job ID straight away.
+
+    Like POST /scan-mrz/jobs; the result is the /scan-mrz/batch response.
+    Batches default to bulk priority, so counter scans run first.
+
+    Form fields:
+        files: Image files (JPG, PNG) containing passports with MRZ
+
+    Query parameters:
+        priority: "bulk" (default) or "counter"
+
+    Returns:
+        202 with the queued JobResponse and a Location header
+
+    Raises:
+        HTTPException:
+            - 429: Rate limit exceeded
+            - 400: Too many files, or invalid priority
+            - 503: Too many jobs (see Retry-After header)
+    """
+    try:
+        priority = job_priority(request, PRIORITY_BULK)
+
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            record_outcome(metrics.OUTCOME_RATE_LIMITED)
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(retry_after)}
             )
 
-        # Parse MRZ text
-        mrz_parser = get_mrz_parser()
-        parsed_data = mrz_parser.parse(mrz_text)
-
-        if not parsed_data:
-            logger.warning("MRZ parsing failed")
-            return MRZResponse(
-                success=False,
-                error="Failed to parse MRZ data",
-                confidence=confidence,
-                mrzText=mrz_text,
-                processingTime=time.time() - start_time
+        try:
+            uploads = await read_image_uploads(
+                request, "files", settings.MAX_FILE_SIZE, max_files=settings.MAX_BATCH_FILES
             )
+        except UploadRejected as e:
+            record_outcome(metrics.OUTCOME_INVALID_INPUT)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-        # Success!
-        processing_time = time.time() - start_time
-        logger.info(
-            f"MRZ scan successful: {parsed_data['passportNumber']} "
-            f"({confidence:.2%} confidence, {processing_time:.2f}s)"
-        )
+        async def work(fields: Dict[str, Any]) -> Dict[str, Any]:
+            start_time = time.time()
+            try:
+                response = await scan_images(uploads, start_time, fields)
+            except InferenceServerUnavailable as e:
+                raise job_failed(inference_error(e))
+            finally:
+                metrics.SCAN_LATENCY.labels("batch_job").observe(time.time() - start_time)
+            return response.model_dump()
 
-        return MRZResponse(
-            success=True,
-            passportNumber=parsed_data.get('passportNumber'),
-            surname=parsed_data.get('surname'),
-            givenName=parsed_data.get('givenName'),
-            nationality=parsed_data.get('nationality'),
-            dateOfBirth=parsed_data.get('dateOfBirth'),
-            sex=parsed_data.get('sex'),
-            dateOfExpiry=parsed_data.get('dateOfExpiry'),
-            issuingCountry=parsed_data.get('issuingCountry'),
-            personalNumber=parsed_data.get('personalNumber'),
-            confidence=confidence,
-            validCheckDigits=parsed_data.get('validCheckDigits'),
-            mrzText=mrz_text,
-            processingTime=processing_time
-        )
+        return submit_job(request, KIND_BATCH, priority, work, sum(len(upload.data) for upload in uploads))
 
     except HTTPException:
-        # Re-raise HTTP exceptions (already formatted)
         raise
 
     except Exception as e:
-        # Unexpected error
-        logger.error(f"Unexpected error in scan_mrz: {str(e)}", exc_info=True)
+        logger.error(f"Unexpected error in submit_batch_job: {str(e)}", exc_info=True)
+        record_outcome(metrics.OUTCOME_ERROR)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
 
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Status of a scan job, with its result once done.
+
+    Raises:
+        HTTPException:
+            - 404: Unknown job, or finished more than JOB_TTL seconds ago
+    """
+    return JobResponse(**find_job(job_id))
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events stream of a scan job.
+
+    Sends a "status" event (data: JobResponse as JSON) now and on every
+    status change, and ends after the event of the finished job (done,
+    failed or cancelled), which carries the result. A comment line is sent
+    every JOB_EVENTS_KEEPALIVE seconds so proxies keep the stream open.
+    While the stream is open the job counts as polled.
+
+    Raises:
+        HTTPException:
+            - 404: Unknown job, or finished more than JOB_TTL seconds ago
+    """
+    find_job(job_id)
+    dispatcher = get_job_dispatcher()
+
+    async def stream():
+        status = None
+        last_sent = time.monotonic()
+        while True:
+            job = dispatcher.store.get(job_id)
+            if job is None:
+                return  # Evicted
+            if job["status"] != status:
+                status = job["status"]
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(JobResponse(**job).model_dump())}\n\n"
+                if status in FINISHED:
+                    return
+            elif time.monotonic() - last_sent >= settings.JOB_EVENTS_KEEPALIVE:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            await dispatcher.wait(job_id, settings.JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued scan job; it will not be scanned.
+
+    A job that is already running or finished is left as it is; the
+    response shows its status either way.
+
+    Raises:
+        HTTPException:
+            - 404: Unknown job, or finished more than JOB_TTL seconds ago
+    """
+    if get_job_dispatcher().cancel(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired)")
+    return JobResponse(**find_job(job_id))
+
+
+@app.websocket("/scan-mrz/stream")
+async def scan_mrz_stream(websocket: WebSocket):
+    """
+    Live scan: read the MRZ from a stream of camera frames (see app.live_scan).
+
+    The client sends downscaled frames (JPEG or PNG, at most
+    STREAM_MAX_FRAME_BYTES each) as binary messages, as fast as it likes:
+    frames that arrive while the previous one is still being assessed are
+    dropped. The service answers with JSON messages: a "frame" message per
+    assessed frame (usable, blurry, no_mrz, invalid), a "result" message per
+    recognised frame, and an "end" message before it closes the socket. The
+    session ends once a result is final (check digits valid) or after
+    STREAM_MAX_SECONDS.
+
+    A client over its rate limit, or a worker already running
+    STREAM_MAX_SESSIONS sessions, gets a "busy" message with retryAfter and
+    close code 1013 (try again later). Each session counts as one request
+    against the rate limit.
+    """
+    await websocket.accept()
+    start_time = time.time()
+    sessions = get_stream_sessions()
+
+    retry_after = check_rate_limit(websocket)
+    if retry_after or not sessions.open():
+        if retry_after:
+            record_outcome(metrics.OUTCOME_RATE_LIMITED)
+            error = "Rate limit exceeded. Please try again later."
+        else:
+            retry_after = settings.OCR_RETRY_AFTER_SECONDS
+            error = "Too many live scans. Please try again shortly."
+        sessions.refuse()
+        event(logger, "stream", logging.INFO, reason="refused", error=error, **log_fields(websocket))
+        await websocket.send_json({"type": "busy", "retryAfter": retry_after, "error": error})
+        await websocket.close(code=1013)
+        return
+
+    scans: List[MRZResponse] = []
+
+    async def receive():
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        return message["bytes"] if message.get("bytes") is not None else message.get("text", "")
+
+    async def recognize(image_np: np.ndarray) -> Dict[str, Any]:
+        scan_start = time.time()
+        try:
+            mrz_text, confidence, detection_path = await get_inference_executor().run(
+                get_ocr_engine().extract_mrz, image_np
+            )
+        except InferenceQueueFull:
+            record_outcome(metrics.OUTCOME_QUEUE_FULL)
+            raise
+        response = build_mrz_response(mrz_text, confidence, detection_path, scan_start)
+        scans.append(response)
+        return response.model_dump()
+
+    session = LiveScan(
+        receive, websocket.send_json, recognize,
+        window_frames=settings.STREAM_WINDOW_FRAMES,
+        window_seconds=settings.STREAM_WINDOW_MS / 1000,
+        min_sharpness=settings.STREAM_MIN_SHARPNESS,
+        max_frame_bytes=settings.STREAM_MAX_FRAME_BYTES,
+        max_seconds=settings.STREAM_MAX_SECONDS
+    )
+    summary = {"reason": END_ERROR}
+    try:
+        summary = await session.run()
+    finally:
+        sessions.close(summary["reason"])
+
+    if summary["reason"] == END_DONE:
+        metrics.SCAN_LATENCY.labels("stream").observe(time.time() - start_time)
+    event(
+        logger, "stream", logging.INFO,
+        **summary, **(scan_log_fields(scans[-1]) if scans else {})
+    )
+    try:
+        await websocket.close(code=1011 if summary["reason"] == END_ERROR else 1000)
+    except Exception:
+        pass  # Client already gone
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """
@@ -270,13 +1061,15 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
     Ensures all errors return consistent JSON format.
     """
+    log_fields(request)["error"] = exc.detail
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
             "error": exc.detail,
             "confidence": 0.0
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -309,15 +1102,29 @@ async def startup_event():
     logger.info(f"Starting {settings.SERVICE_NAME} v{settings.VERSION}")
     logger.info(f"Listening on {settings.HOST}:{settings.PORT}")
 
-    # Pre-initialize OCR engine (loads PaddleOCR models)
-    logger.info("Pre-loading PaddleOCR models...")
+    # Shared serving mode needs the inference server's secret: do not start without it
+    if settings.OCR_SERVING_MODE == "shared" and not settings.OCR_INFERENCE_AUTHKEY:
+        raise RuntimeError("OCR_INFERENCE_AUTHKEY must be set in shared serving mode")
+
+    # Pre-initialize OCR engine (loads PaddleOCR models, or connects to the
+    # shared inference server in shared serving mode)
+    logger.info(f"Pre-loading PaddleOCR models ({settings.OCR_SERVING_MODE} serving mode)...")
     try:
         ocr_engine = get_ocr_engine()
-        logger.info("PaddleOCR models loaded successfully")
+        if settings.OCR_SERVING_MODE == "shared":
+            ocr_engine.ping()
+            logger.info("Shared inference server reachable")
+        else:
+            logger.info("PaddleOCR models loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load PaddleOCR models: {str(e)}")
         logger.warning("Service will continue, but first request may be slow")
 
+    # Start inference executor, result cache and job store
+    get_inference_executor()
+    get_result_cache()
+    get_job_dispatcher()
+
     # Initialize MRZ parser
     try:
         mrz_parser = get_mrz_parser()
@@ -325,6 +1132,12 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize MRZ parser: {str(e)}")
 
+    # Warm up extract_mrz -> parse on the inference executor; /ready flips when it is done
+    try:
+        get_warmup().start(get_inference_executor(), get_ocr_engine(), get_mrz_parser())
+    except Exception as e:
+        get_warmup().fail(str(e))
+
     logger.info(f"{settings.SERVICE_NAME} started successfully")
 
 
@@ -335,6 +1148,9 @@ async def shutdown_event():
     Cleanup on shutdown.
     """
     logger.info(f"Shutting down {settings.SERVICE_NAME}")
+    await get_job_dispatcher().stop()
+    get_inference_executor().shutdown()
+    metrics.mark_process_dead()
 
 
 if __name__ == "__main__":
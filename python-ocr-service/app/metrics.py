@@ -0,0 +1,281 @@
+"""
+Prometheus Metrics for the OCR Pipeline
+
+Per-stage latency histograms (decode, locate, detection, recognition, filter,
+escalation, parse), end-to-end scan latency, outcome counters, inference queue metrics,
+result cache counters, low-confidence escalations, MRZ check digit
+results, startup warm-up, scan jobs and live scans, served in Prometheus text format on /metrics.
+
+Multi-worker aggregation: with uvicorn --workers N each worker is a separate
+process. When PROMETHEUS_MULTIPROC_DIR is set (see ecosystem.config.js), every
+process writes its samples to mmap files in that directory, and /metrics on
+any worker merges the files of all workers (and of the inference server in
+shared serving mode). Without it, /metrics only reports the worker that
+answered.
+
+Each process clears the files of dead processes from the directory when it
+imports this module (clean_multiproc_dir), so restarts need no manual cleanup.
+"""
+import glob
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Settings load .env; prometheus_client picks its storage from the environment at import
+from app.config import settings
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+MULTIPROC_DIR = settings.PROMETHEUS_MULTIPROC_DIR
+
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    from prometheus_client import multiprocess
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clean_multiproc_dir() -> None:
+    """
+    Remove metric files left by processes that are gone.
+
+    Workers killed by OOM, SIGKILL or a PM2 memory restart never run
+    mark_process_dead, so their live gauges would stay in the sums. If no
+    process that wrote to the directory is running any more (a restart of
+    the whole service), every old file is removed so counter and histogram
+    files do not pile up per PID. Otherwise only the live gauges of the
+    dead processes are dropped: removing their counters while others keep
+    reporting would look like a counter reset to Prometheus.
+    """
+    if not MULTIPROC_DIR:
+        return
+
+    files = {}
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.db")):
+        pid = os.path.basename(path)[:-3].rsplit("_", 1)[-1]
+        if pid.isdigit():
+            files.setdefault(int(pid), []).append(path)
+
+    own = os.getpid()
+    dead = [pid for pid in files if pid != own and not _process_alive(pid)]
+    others_running = len(files) - len(dead) - (own in files) > 0
+
+    for pid in dead:
+        try:
+            if others_running:
+                multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+            else:
+                for path in files[pid]:
+                    os.remove(path)
+        except FileNotFoundError:
+            pass  # Removed by a worker starting at the same time
+
+
+clean_multiproc_dir()
+
+# Pipeline stages take milliseconds (decode, filter, parse) to seconds (OCR)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCAN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+
+STAGE_LATENCY = Histogram(
+    "greenpay_ocr_stage_seconds",
+    "Time spent in each OCR pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+SCAN_LATENCY = Histogram(
+    "greenpay_ocr_scan_seconds",
+    "End-to-end scan request latency",
+    ["endpoint"],
+    buckets=SCAN_BUCKETS,
+)
+
+SCAN_OUTCOMES = Counter(
+    "greenpay_ocr_scans_total",
+    "Scan results by outcome",
+    ["outcome"],
+)
+
+INFERENCE_WAIT = Histogram(
+    "greenpay_ocr_inference_wait_seconds",
+    "Time a scan waited in the inference queue before running",
+    buckets=SCAN_BUCKETS,
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "greenpay_ocr_inference_queue_depth",
+    "Scans waiting in the inference queue (summed over live workers)",
+    multiprocess_mode="livesum",
+)
+
+CACHE_LOOKUPS = Counter(
+    "greenpay_ocr_result_cache_lookups_total",
+    "Result cache lookups",
+    ["result"],
+)
+
+ESCALATIONS = Counter(
+    "greenpay_ocr_escalations_total",
+    "Low-confidence scans re-read with multi-pass fusion, by result",
+    ["result"],
+)
+
+MRZ_CHECK_DIGITS = Counter(
+    "greenpay_ocr_mrz_check_digits_total",
+    "Parsed MRZs by check digit result",
+    ["result"],
+)
+
+WARMUP_SECONDS = Gauge(
+    "greenpay_ocr_warmup_seconds",
+    "Duration of the startup warm-up, per process",
+    multiprocess_mode="liveall",
+)
+
+FIRST_SCAN_SECONDS = Gauge(
+    "greenpay_ocr_first_scan_seconds",
+    "Latency of the first scan served after startup, per worker",
+    multiprocess_mode="liveall",
+)
+
+WORKERS_READY = Gauge(
+    "greenpay_ocr_workers_ready",
+    "Workers that finished warm-up (summed over live workers)",
+    multiprocess_mode="livesum",
+)
+
+JOBS = Counter(
+    "greenpay_ocr_jobs_total",
+    "Scan jobs by priority and final status (rejected: not accepted)",
+    ["priority", "status"],
+)
+
+JOB_WAIT = Histogram(
+    "greenpay_ocr_job_wait_seconds",
+    "Time a scan job waited before it started, by priority",
+    ["priority"],
+    buckets=SCAN_BUCKETS,
+)
+
+STREAM_FRAMES = Counter(
+    "greenpay_ocr_stream_frames_total",
+    "Live scan frames by result (only usable frames can reach recognition)",
+    ["result"],
+)
+
+STREAM_SESSIONS = Counter(
+    "greenpay_ocr_stream_sessions_total",
+    "Live scan sessions by how they ended",
+    ["reason"],
+)
+
+# Scan outcomes (label values of greenpay_ocr_scans_total)
+OUTCOME_SUCCESS = "success"
+OUTCOME_NO_MRZ = "no_mrz"
+OUTCOME_LOW_CONFIDENCE = "low_confidence"
+OUTCOME_PARSE_FAILURE = "parse_failure"
+OUTCOME_RATE_LIMITED = "rate_limited"
+OUTCOME_QUEUE_FULL = "queue_full"
+OUTCOME_INVALID_INPUT = "invalid_input"
+OUTCOME_ERROR = "error"
+OUTCOME_CACHED = "cached"
+
+# Escalation results (label values of greenpay_ocr_escalations_total)
+ESCALATION_ACCEPTED = "accepted"  # Fused MRZ reached OCR_CONFIDENCE_THRESHOLD, check digits agreeing
+ESCALATION_REJECTED = "rejected"  # Still below the threshold after the time budget
+
+# Check digit results (label values of greenpay_ocr_mrz_check_digits_total)
+CHECK_DIGITS_VALID = "valid"          # Correct as read
+CHECK_DIGITS_CORRECTED = "corrected"  # Correct after app.mrz_correction (a rescan avoided)
+CHECK_DIGITS_INVALID = "invalid"      # Still wrong: the agent has to rescan
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """
+    Time a pipeline stage into greenpay_ocr_stage_seconds.
+
+    Example:
+        >>> with observe_stage("parse"):
+        ...     parsed = parser.parse(mrz_text)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_outcome(outcome: str) -> None:
+    """Count one scan outcome."""
+    SCAN_OUTCOMES.labels(outcome).inc()
+
+
+def record_escalation(accepted: bool) -> None:
+    """Count one low-confidence escalation."""
+    ESCALATIONS.labels(ESCALATION_ACCEPTED if accepted else ESCALATION_REJECTED).inc()
+
+
+def record_check_digits(valid: bool, corrected: bool) -> None:
+    """Count the check digit result of one parsed MRZ."""
+    if not valid:
+        result = CHECK_DIGITS_INVALID
+    elif corrected:
+        result = CHECK_DIGITS_CORRECTED
+    else:
+        result = CHECK_DIGITS_VALID
+    MRZ_CHECK_DIGITS.labels(result).inc()
+
+
+def render_metrics() -> bytes:
+    """Metrics in Prometheus text format (merged across workers if configured)."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def workers_ready() -> Optional[int]:
+    """Live workers that finished warm-up, or None without a shared metrics directory."""
+    if not MULTIPROC_DIR:
+        return None
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for metric in registry.collect():
+        if metric.name == "greenpay_ocr_workers_ready":
+            return int(sum(sample.value for sample in metric.samples))
+    return 0
+
+
+def mark_process_dead() -> None:
+    """Drop this process's live gauges from the shared metrics directory."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "observe_stage",
+    "record_outcome",
+    "render_metrics",
+    "mark_process_dead",
+]
@@ -0,0 +1,189 @@
+"""
+MRZ Candidate Scoring
+
+Decides which OCR text lines are MRZ lines, and which line of the MRZ
+each one is: the first line (document code and issuing state), the data
+line (document number or dates, nationality, check digits) or the names
+line that only TD1 ID cards have. A dense data page yields 100+ detected lines, almost all of
+them ordinary text, so every line is classified once. The features are
+computed from precompiled patterns and kept on the Candidate, so combining
+the lines does not recount them:
+
+- format: one fullmatch of [A-Z0-9<]{30,50} (alphabet and length, from
+  30-character TD1 lines to 44-character passport lines plus OCR noise);
+  lines too short to match are dropped before they are cleaned. A line
+  needs a "<" filler unless it is a full 36 or 44 characters with two
+  dates (a data line whose optional data is used up)
+- digits and date runs: one scan over the digit runs
+- country code: icao_mrz.COUNTRY_CODES lookups at the positions where a code
+  can be, i.e. the issuing state in line 1 and the nationality in the
+  data line.
+  Any position would match ordinary words, and a short list of common
+  countries misses most of them.
+
+Scores (below MIN_SCORE the line is not an MRZ line):
+
+    document code (P, V, I, A, C) +50  ("<" dropped before the state: +45)
+    letters at positions 2-4      +20
+    names only (letters, <<)      +20  (TD1 line 3)
+    << separator                  +15
+    15+ / 8+ digits               +40 / +20
+    2+ six-digit runs (dates)     +30
+    known country code            +25
+    digits in a line 1 that is    -40  (TD2, TD3 and visa line 1 hold names;
+    longer than TD1's                   OCR misreads a letter or two as digits)
+
+Example:
+    >>> score_line("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<", 0.93)
+    Candidate(text='P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<', confidence=0.93, kind='line1', score=85, digits=0, date_runs=0)
+    >>> score_line("L898902C36UTO7408122F1204159ZE184226B<<<<<10", 0.91).kind
+    'line2'
+    >>> score_line("ERIKSSON<<ANNA<MARIA<<<<<<<<<<", 0.9).kind
+    'names'
+"""
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from icao_mrz import CARD_CODES, COUNTRY_CODES, PASSPORT_CODES, TD1, TD2, TD3, VISA_CODES
+
+from app.mrz_correction import nationality_offset
+
+MIN_LENGTH = 30
+MAX_LENGTH = 50
+MIN_SCORE = 30
+
+LINE1 = "line1"  # Document code, issuing state, then names (TD1: document number)
+LINE2 = "line2"  # Document number or dates, nationality, check digits
+NAMES = "names"  # TD1 line 3: names only
+
+OTHER_CODES = VISA_CODES + CARD_CODES  # Document codes besides P
+
+# Where the nationality is in a TD1 data line (dates first)
+_TD1_NATIONALITY = slice(15, 18)
+
+_FULL_DATA_LINES = (TD2.width, TD3.width)  # TD1 data lines always end in fillers
+_MRZ_LINE = re.compile(r"[A-Z0-9<]{%d,%d}" % (MIN_LENGTH, MAX_LENGTH))
+_DIGIT_RUN = re.compile(r"[0-9]+")
+
+
+class Candidate(NamedTuple):
+    """One OCR line that passed the format checks, with its features."""
+    text: str          # Cleaned: no spaces or commas, upper case
+    confidence: float
+    kind: Optional[str]  # LINE1, LINE2, NAMES or None (MRZ-like, but none of them)
+    score: int
+    digits: int
+    date_runs: int     # Non-overlapping runs of six digits (YYMMDD)
+
+
+def clean_line(text: str) -> str:
+    """Remove the spaces and commas OCR inserts into MRZ lines, upper-case the rest."""
+    return text.replace(" ", "").replace(",", "").upper()
+
+
+def score_line(text: str, confidence: float) -> Optional[Candidate]:
+    """
+    Score one OCR line.
+
+    Returns:
+        The Candidate (compare its score with MIN_SCORE), or None if the line
+        cannot be an MRZ line at all (length, alphabet, no "<")
+    """
+    if len(text) < MIN_LENGTH:  # Cleaning only removes characters
+        return None
+    cleaned = clean_line(text)
+    filler = "<" in cleaned
+    # Without a filler only a full-width data line (optional data used up) qualifies
+    if not (filler or len(cleaned) in _FULL_DATA_LINES) or not _MRZ_LINE.fullmatch(cleaned):
+        return None
+
+    runs = _DIGIT_RUN.findall(cleaned)
+    digits = sum(map(len, runs))
+    date_runs = sum(len(run) // 6 for run in runs)
+    if not filler and date_runs < 2:
+        return None
+
+    score = 0
+    kind = None
+    country = None
+    offset = country_offset(cleaned)
+    if offset is not None:
+        score += 50 if offset == 2 else 45
+        kind = LINE1
+        country = cleaned[offset:offset + 3]
+    elif digits >= 8:
+        kind = LINE2
+    elif not digits and "<<" in cleaned:
+        kind = NAMES
+        score += 20  # Letters and fillers only
+
+    if cleaned[2:5].isalpha():
+        score += 20
+    if "<<" in cleaned:
+        score += 15
+    if digits >= 15:  # Document number + date of birth + expiry: 21+ digits
+        score += 40
+    elif digits >= 8:
+        score += 20
+    if date_runs >= 2:
+        score += 30
+    if country is not None:
+        known_country = country in COUNTRY_CODES
+    else:
+        known_country = nationality_offset(cleaned) != -1 or (
+            kind == LINE2 and cleaned[_TD1_NATIONALITY] in COUNTRY_CODES)
+    if known_country:
+        score += 25
+    if kind == LINE1 and digits > 2 and len(cleaned) > TD1.width + 3:
+        score -= 40  # Only the 30-character TD1 line 1 has a document number
+
+    return Candidate(cleaned, confidence, kind, score, digits, date_runs)
+
+
+def country_offset(text: str) -> Optional[int]:
+    """
+    Where the issuing state starts if text is a first MRZ line, else None.
+
+    2 for a document code with its second character ("P<", "ID", "V<"), 1
+    when OCR dropped the "<" (P<BGR read as PBGR). Passports keep the old
+    rule (any three letters). For ID cards a two-letter code is only told
+    from a dropped "<" by which position holds a known country code.
+    """
+    first = text[:1]
+    if first == PASSPORT_CODES:
+        if text[1:2] == "<":
+            return 2
+        return 1 if text[1:4].isalpha() else None
+    if first and first in OTHER_CODES:
+        second = text[1:2]
+        if second == "<" and text[2:5].replace("<", "").isalpha():
+            return 2
+        if first in CARD_CODES and second.isalpha() and text[2:5] in COUNTRY_CODES:
+            return 2  # ID, IR, AC, ... (visas always have V<)
+        if text[1:4] in COUNTRY_CODES:
+            return 1
+    return None
+
+
+def line_width(first: Candidate, second: Candidate) -> int:
+    """
+    Line width of the MRZ two candidate lines belong to (30, 36 or 44).
+
+    OCR drops runs of trailing fillers far more often than it adds
+    characters, so the longer line decides. Passports are always TD3.
+    """
+    if first.text[0] == PASSPORT_CODES:
+        return TD3.width
+    longest = max(len(first.text), len(second.text))
+    if longest >= (TD2.width + TD3.width) // 2:
+        return TD3.width
+    if longest > TD1.width + 2:
+        return TD2.width
+    return TD1.width
+
+
+def rank_candidates(lines: Sequence[Tuple[str, float]]) -> List[Candidate]:
+    """Candidates scoring at least MIN_SCORE, best first (score, then confidence)."""
+    candidates = [c for c in (score_line(text, conf) for text, conf in lines) if c and c.score >= MIN_SCORE]
+    candidates.sort(key=lambda c: (c.score, c.confidence), reverse=True)
+    return candidates
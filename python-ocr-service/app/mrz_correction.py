@@ -0,0 +1,263 @@
+"""
+Check-Digit-Guided MRZ Correction
+
+OCR confuses look-alike characters (O/0, I/1, B/8, S/5, ...). An MRZ
+carries enough redundancy to undo most of these misreads:
+
+1. Field types. Dates and check digits are digits; country codes, sex and
+   names are letters. A letter in a date can only be a misread digit (and
+   the other way round), so it is replaced by its look-alike directly.
+   The character class of every position comes from the layout table
+   (icao_mrz.formats), so TD1, TD2, TD3 and visas are corrected alike.
+2. Check digits. In the alphanumeric fields (document and personal
+   number) either reading is possible, and a digit can be misread as
+   another digit. Substitutions are enumerated cheapest first (see the
+   costs below) and a field candidate is kept only if its check digit
+   agrees and its dates are real calendar values. Field candidates are
+   then combined, cheapest first, until one also satisfies the composite
+   check digit (visas have none).
+
+The search stops at the first fully consistent MRZ and evaluates at most
+max_candidates candidates. A correction is only made if it changes at
+most MAX_CHANGES characters and is clearly cheaper (CONFIDENCE_MARGIN)
+than any other consistent reading: check digits cannot tell some
+substitutions apart (a weighted sum modulo 10 has collisions), and a
+near-tie means the MRZ stays flagged for a rescan rather than being
+guessed. When nothing is found, only the field-type fixes of step 1 are
+kept.
+
+Example:
+    >>> mrz = ("P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+    ...        "L898902C36UTO74O8122F12O4159ZE184226B<<<<<1O")
+    >>> corrected, result = correct_td3(mrz)
+    >>> result["valid"], [c["position"] for c in result["corrections"]]
+    (True, [59, 67, 87])
+"""
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from icao_mrz import COUNTRY_CODES, TD3, MRZFormat, detect_format
+
+from app.check_digits import check_digit, validate
+
+# Look-alikes in the OCR font (both directions are listed)
+LETTER_TO_DIGIT = {"O": "0", "Q": "0", "D": "0", "U": "0", "I": "1", "L": "1", "Z": "2",
+                   "A": "4", "S": "5", "G": "6", "T": "7", "B": "8"}
+DIGIT_TO_LETTER = {"0": "O", "1": "I", "2": "Z", "4": "A", "5": "S", "6": "G", "7": "T", "8": "B"}
+# Digits the recogniser mixes up with each other
+DIGIT_CONFUSIONS = {"0": "8", "1": "7", "3": "8", "5": "6", "6": "58", "7": "1", "8": "0369", "9": "8"}
+
+# Substitution costs. Document and personal numbers are mostly a short
+# letter prefix followed by digits, so a letter inside the digit run is the
+# least likely reading.
+TO_DIGIT_COST = 2          # O -> 0, B -> 8, ... in an alphanumeric field
+TO_LETTER_COST = 3         # 0 -> O, 8 -> B, ... in the letter prefix
+DIGIT_CONFUSION_COST = 4   # 3 -> 8, 1 -> 7, ...
+TO_LETTER_IN_DIGITS_COST = 5
+MAX_FIELD_COST = 5         # Per field: two look-alike swaps or one digit confusion
+MAX_FIELD_CANDIDATES = 6   # Consistent variants kept per field for the composite search
+MAX_CHANGES = 2            # Check-digit substitutions per MRZ; more misreads means a rescan
+# A correction is applied only if no other consistent reading costs less than this much more
+CONFIDENCE_MARGIN = 2
+
+# Reasons recorded with each correction
+REASON_FIELD_TYPE = "fieldType"
+REASON_CHECK_DIGIT = "checkDigit"
+
+DATE_FIELDS = {"dateOfBirth", "dateOfExpiry"}
+
+
+def _type_fixes(mrz: str, types: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Step 1: replace characters that cannot occur at their position by their look-alike."""
+    chars = list(mrz)
+    corrections = []
+    for i, (char, kind) in enumerate(zip(mrz, types)):
+        if kind == "A" and char in DIGIT_TO_LETTER:
+            chars[i] = DIGIT_TO_LETTER[char]
+        elif kind == "N" and char in LETTER_TO_DIGIT:
+            chars[i] = LETTER_TO_DIGIT[char]
+        else:
+            continue
+        corrections.append({"position": i, "read": char, "corrected": chars[i], "reason": REASON_FIELD_TYPE})
+    return "".join(chars), corrections
+
+
+def _alternatives(char: str, kind: str, in_prefix: bool = True) -> List[Tuple[str, int]]:
+    """
+    Substitutions worth trying for one character, with their cost.
+
+    in_prefix: every character before it in its field is a letter
+    """
+    options = []
+    if kind == "X":
+        if char in LETTER_TO_DIGIT:
+            options.append((LETTER_TO_DIGIT[char], TO_DIGIT_COST))
+        if char in DIGIT_TO_LETTER:
+            options.append((DIGIT_TO_LETTER[char], TO_LETTER_COST if in_prefix else TO_LETTER_IN_DIGITS_COST))
+    if char.isdigit():
+        options.extend((digit, DIGIT_CONFUSION_COST) for digit in DIGIT_CONFUSIONS.get(char, ""))
+    return options
+
+
+def _plausible_date(value: str) -> bool:
+    return value.isdigit() and 1 <= int(value[2:4]) <= 12 and 1 <= int(value[4:6]) <= 31
+
+
+def _field_variants(mrz: str, field, types: str, budget: List[int]) -> List[Tuple[int, Dict[int, str]]]:
+    """
+    Substitutions that make one field's check digit agree, cheapest first.
+
+    Returns:
+        [(cost, {position: new character})]: every variant of the lowest
+        cost (so ties are visible), then cheaper-first up to MAX_FIELD_CANDIDATES
+    """
+    positions = field.positions + (field.check,)
+    options = []
+    in_prefix = True
+    for position in positions:
+        options.extend(
+            (position, char, cost)
+            for char, cost in _alternatives(mrz[position], types[position], in_prefix)
+        )
+        in_prefix = in_prefix and mrz[position].isalpha()
+    combos = [
+        combo
+        for changes in (1, 2)
+        for combo in itertools.combinations(options, changes)
+        if sum(option[2] for option in combo) <= MAX_FIELD_COST and len({option[0] for option in combo}) == changes
+    ]
+    combos.sort(key=lambda combo: sum(option[2] for option in combo))
+
+    variants: List[Tuple[int, Dict[int, str]]] = []
+    for combo in combos:
+        cost = sum(option[2] for option in combo)
+        if len(variants) >= MAX_FIELD_CANDIDATES and cost >= variants[0][0] + CONFIDENCE_MARGIN:
+            break
+        if budget[0] <= 0:
+            break
+        budget[0] -= 1
+
+        substitution = {position: char for position, char, _ in combo}
+        data = "".join(substitution.get(p, mrz[p]) for p in field.positions)
+        check = substitution.get(field.check, mrz[field.check])
+        if str(check_digit(data)) != check:
+            continue
+        if field.name in DATE_FIELDS and not _plausible_date(data):
+            continue
+        variants.append((cost, substitution))
+    return variants
+
+
+def correct(mrz: str, fmt: Optional[MRZFormat] = None, max_candidates: int = 2000) -> Tuple[str, Dict[str, Any]]:
+    """
+    Find the most likely check-digit-consistent reading of an MRZ.
+
+    Args:
+        mrz: Joined MRZ as read (uppercase, '<' separators)
+        fmt: Layout; detected from length and document code if not given
+        max_candidates: Hard cap on candidate evaluations
+
+    Returns:
+        (mrz, result) where mrz is the corrected text and result is
+        {
+            'valid': bool (all check digits agree),
+            'corrections': [{'position': int, 'read': str, 'corrected': str,
+                             'reason': 'fieldType' or 'checkDigit'}],
+            'candidates': number of candidates evaluated,
+            'report': check digit report of the returned text (see app.check_digits)
+        }
+    """
+    fmt = fmt or detect_format(mrz)
+    if fmt is None or len(mrz) != fmt.length:
+        raise ValueError(f"No MRZ layout is {len(mrz)} characters" if fmt is None
+                         else f"{fmt.name} MRZ must be {fmt.length} characters, got {len(mrz)}")
+
+    fixed, corrections = _type_fixes(mrz, fmt.position_types)
+    report = validate(fixed, fmt)
+    budget = [max_candidates]
+
+    if not report["valid"]:
+        found = _search(fixed, report, budget, fmt)
+        if found is not None:
+            substitution = found
+            corrections = _merge(mrz, fixed, substitution, corrections)
+            fixed = "".join(substitution.get(i, char) for i, char in enumerate(fixed))
+            report = validate(fixed, fmt)
+
+    return fixed, {
+        "valid": report["valid"],
+        "corrections": corrections,
+        "candidates": max_candidates - budget[0],
+        "report": report,
+    }
+
+
+def correct_td3(mrz: str, max_candidates: int = 2000) -> Tuple[str, Dict[str, Any]]:
+    """correct() for an 88-character TD3 MRZ (raises ValueError for any other length)."""
+    return correct(mrz, TD3, max_candidates)
+
+
+def _search(mrz: str, report: Dict[str, Any], budget: List[int], fmt: MRZFormat) -> Optional[Dict[int, str]]:
+    """
+    Step 2: cheapest combination of field fixes that satisfies every check digit.
+
+    None if there is none, the budget runs out, or another combination is
+    within CONFIDENCE_MARGIN of it.
+    """
+    fields = {field.name: field for field in fmt.checks}
+    failed = [name for name in fields if name != "composite" and not report["fields"][name]]
+
+    per_field = []
+    for name in failed:
+        variants = _field_variants(mrz, fields[name], fmt.position_types, budget)
+        if not variants:
+            return None
+        per_field.append(variants)
+
+    # All field digits agree but the composite does not: the composite digit itself was misread
+    if not failed and "composite" in fields:
+        per_field.append([(cost, {fields["composite"].check: char})
+                          for char, cost in _alternatives(mrz[fields["composite"].check], "N")])
+
+    combinations = sorted(itertools.product(*per_field), key=lambda combo: sum(cost for cost, _ in combo))
+    best: Optional[Dict[int, str]] = None
+    best_cost = None
+    for combo in combinations:
+        cost = sum(c for c, _ in combo)
+        if best is not None and cost >= best_cost + CONFIDENCE_MARGIN:
+            break
+        if budget[0] <= 0:
+            return None
+        budget[0] -= 1
+
+        substitution: Dict[int, str] = {}
+        for _, changes in combo:
+            substitution.update(changes)
+        if len(substitution) > MAX_CHANGES:
+            continue
+        candidate = "".join(substitution.get(i, char) for i, char in enumerate(mrz))
+        if validate(candidate, fmt)["valid"]:
+            if best is not None:
+                return None  # Two nearly equally likely readings: do not guess
+            best, best_cost = substitution, cost
+    return best
+
+
+def _merge(original: str, fixed: str, substitution: Dict[int, str], corrections: List[Dict[str, Any]]):
+    """Corrections list for type fixes plus search substitutions, relative to the OCR text."""
+    changed = {c["position"] for c in corrections} | set(substitution)
+    merged = []
+    for position in sorted(changed):
+        corrected = substitution.get(position, fixed[position])
+        if corrected != original[position]:
+            reason = REASON_CHECK_DIGIT if position in substitution else REASON_FIELD_TYPE
+            merged.append({"position": position, "read": original[position], "corrected": corrected, "reason": reason})
+    return merged
+
+
+def nationality_offset(line2: str, first: int = 9, last: int = 13) -> int:
+    """Index of the first known country code in line2[first:last + 1], or -1."""
+    for position in range(first, min(last, len(line2) - 3) + 1):
+        if line2[position:position + 3] in COUNTRY_CODES:
+            return position
+    return -1
@@ -4,21 +4,27 @@ PaddleOCR Engine for MRZ Detection and Text Extraction
 This module wraps PaddleOCR to detect and extract MRZ text from passport images.
 """
 import logging
-import sys
-from typing import Tuple, Optional
+import threading
+import time
+from typing import Dict, List, Tuple, Optional
+import cv2
 import numpy as np
-from paddleocr import PaddleOCR
+from icao_mrz import TD1, TD3, detect_format, format_for_width
 from app.config import settings
+from app.log import Detail
+from app.check_digits import validate
+from app.mrz_locator import locate_mrz_band
+from app import metrics
+from app.metrics import observe_stage
+from app.mrz_candidates import LINE1, LINE2, NAMES, Candidate, country_offset, line_width, rank_candidates
+from app.mrz_correction import nationality_offset
+from app.ocr_fusion import VARIANTS, fuse_line
 
-# Configure logger to output to stderr (always visible)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-if not logger.handlers:
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('[%(asctime)s] [OCR_ENGINE] %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+detail = Detail(logger)  # Per-scan trace, see app.log
+
+# Line crops narrower than this (width / height) cannot hold 30+ MRZ characters
+MIN_LINE_ASPECT = 8.0
 
 
 class OCREngine:
@@ -26,8 +32,9 @@ class OCREngine:
     PaddleOCR wrapper for MRZ text extraction from passport images.
 
     Features:
-    - Automatic MRZ region detection
+    - Automatic MRZ region detection (band crop with full-image fallback)
     - Text extraction with confidence scores
+    - Multi-pass fusion of the MRZ line crops for low-confidence scans
     - GPU acceleration support (optional)
     - Image preprocessing for better accuracy
     """
@@ -36,7 +43,13 @@ class OCREngine:
         """Initialize PaddleOCR engine"""
         logger.info("Initializing PaddleOCR engine...")
 
+        # PaddleOCR predictors are not safe to share between threads
+        self._lock = threading.Lock()
+
         try:
+            # Imported here so HTTP workers in shared serving mode never load Paddle
+            from paddleocr import PaddleOCR
+
             self.ocr = PaddleOCR(
                 use_angle_cls=False,  # Disabled - MRZ is always horizontal (saves 10+ seconds)
                 lang=settings.OCR_LANG,
@@ -50,202 +63,393 @@ class OCREngine:
             logger.error(f"Failed to initialize PaddleOCR: {str(e)}")
             raise
 
-    def extract_mrz(self, image: np.ndarray) -> Tuple[Optional[str], float]:
+    def extract_mrz(self, image: np.ndarray) -> Tuple[Optional[str], float, str]:
         """
         Extract MRZ text from passport image.
 
+        The MRZ band is located first and OCR runs on that crop only. If no
+        band is found, or the crop does not yield both MRZ lines, OCR runs on
+        the entire image as before. Below OCR_CONFIDENCE_THRESHOLD the MRZ
+        line crops are re-read and fused (see _escalate).
+
         Args:
             image: NumPy array of passport image (BGR format from OpenCV)
 
         Returns:
-            Tuple of (mrz_text, confidence_score)
-            - mrz_text: 88-character MRZ string (2 lines × 44 chars) or None if not found
+            Tuple of (mrz_text, confidence_score, detection_path)
+            - mrz_text: MRZ lines joined (88 characters for passports, 90 for
+              TD1 ID cards, 72 for TD2 cards and MRV-B visas) or None if not found
             - confidence: Average confidence score (0.0 to 1.0)
+            - detection_path: "band" if the MRZ band crop was used, "full" otherwise
 
         Example:
-            >>> mrz_text, confidence = ocr_engine.extract_mrz(image)
-            >>> print(f"MRZ: {mrz_text}, Confidence: {confidence:.2f}")
+            >>> mrz_text, confidence, path = ocr_engine.extract_mrz(image)
+            >>> print(f"MRZ: {mrz_text}, Confidence: {confidence:.2f} ({path})")
         """
+        detail.begin()
         try:
-            # Run OCR on entire image
-            result = self.ocr.ocr(image, cls=False)
+            # Fast path: OCR only the MRZ band
+            if settings.MRZ_LOCATOR_ENABLED:
+                with observe_stage("locate"):
+                    box = locate_mrz_band(image)
+                if box:
+                    x0, y0, x1, y1 = box
+                    detail("MRZ band located at y=%d-%d, running OCR on crop", y0, y1)
+                    band_crops: list = []
+                    band_lines = self._ocr_lines(image[y0:y1, x0:x1], band_crops)
+                    with observe_stage("filter"):
+                        mrz_candidates = self._filter_mrz_candidates(band_lines)
+
+                    if len(mrz_candidates) >= 2:
+                        mrz_text, avg_confidence = self._combine_mrz_lines(mrz_candidates)
+                        detail("MRZ extracted from band with %.2f confidence", avg_confidence)
+                        mrz_text, avg_confidence = self._escalate(band_lines, band_crops, mrz_text, avg_confidence)
+                        return mrz_text, avg_confidence, "band"
+
+                    detail("MRZ band crop did not yield both lines, falling back to full image")
+                else:
+                    detail("No MRZ band located, running OCR on full image")
 
-            if not result or not result[0]:
-                logger.warning("No text detected in image")
-                return None, 0.0
-
-            # Extract all detected text lines with confidence scores
-            detected_lines = []
-            for line in result[0]:
-                text = line[1][0]  # Detected text
-                confidence = line[1][1]  # Confidence score
-                detected_lines.append((text, confidence))
+            # Run OCR on entire image
+            line_crops: list = []
+            detected_lines = self._ocr_lines(image, line_crops)
 
-            logger.info(f"=== PADDLEOCR DETECTED {len(detected_lines)} TEXT LINES ===")
-            for i, (text, conf) in enumerate(detected_lines):
-                logger.info(f"  Line {i+1}: '{text}' (confidence: {conf:.2f})")
+            if not detected_lines:
+                detail("No text detected in image")
+                return None, 0.0, "full"
 
             # Find MRZ lines (typically last 2-3 lines, all uppercase, contains '<')
-            mrz_candidates = self._filter_mrz_candidates(detected_lines)
+            with observe_stage("filter"):
+                mrz_candidates = self._filter_mrz_candidates(detected_lines)
 
             if not mrz_candidates:
-                logger.warning("No MRZ-like text detected")
-                return None, 0.0
+                detail("No MRZ-like text detected")
+                return None, 0.0, "full"
 
             # Combine MRZ lines and calculate average confidence
             mrz_text, avg_confidence = self._combine_mrz_lines(mrz_candidates)
 
-            logger.info(f"MRZ extracted with {avg_confidence:.2%} confidence")
-            return mrz_text, avg_confidence
+            detail("MRZ extracted with %.2f confidence", avg_confidence)
+            mrz_text, avg_confidence = self._escalate(detected_lines, line_crops, mrz_text, avg_confidence)
+            return mrz_text, avg_confidence, "full"
 
         except Exception as e:
             logger.error(f"OCR extraction failed: {str(e)}")
-            return None, 0.0
+            return None, 0.0, "full"
 
-    def _filter_mrz_candidates(self, detected_lines: list) -> list:
+    def extract_mrz_batch(self, images: List[Optional[np.ndarray]]) -> List[Tuple[Optional[str], float, str]]:
         """
-        Filter detected text lines to find MRZ candidates.
+        Extract MRZ text from many passport images with batched recognition.
 
-        MRZ characteristics (STRICT validation):
-        - Line 1: Starts with P< (passport type), has country code, has names with <<
-        - Line 2: Starts with passport number (alphanumeric), has dates (6 digits each)
-        - Both: ~44 characters, contains '<', alphanumeric only
-        """
-        candidates = []
+        Detection runs per image (on the MRZ band crop when one is found),
+        then the line crops of all images are recognised together in batches
+        of OCR_BATCH_REC_SIZE. Images whose band crop does not yield both MRZ
+        lines are retried on the full image in a second batched round.
+        Low-confidence results are escalated per image, as in extract_mrz.
+
+        Args:
+            images: List of BGR images; None entries are skipped
 
-        for text, confidence in detected_lines:
-            # Clean text (remove spaces, convert to uppercase)
-            cleaned = text.replace(" ", "").replace(",", "").upper()
+        Returns:
+            One (mrz_text, confidence, detection_path) tuple per input image,
+            in input order (same shape as extract_mrz)
+        """
+        detail.begin()
+        results: List[Tuple[Optional[str], float, str]] = [(None, 0.0, "full")] * len(images)
+
+        # Round 1: band crops where available, full image otherwise
+        regions = {}
+        paths = {}
+        for i, image in enumerate(images):
+            if image is None:
+                continue
+            box = None
+            if settings.MRZ_LOCATOR_ENABLED:
+                with observe_stage("locate"):
+                    box = locate_mrz_band(image)
+            if box:
+                x0, y0, x1, y1 = box
+                regions[i] = image[y0:y1, x0:x1]
+                paths[i] = "band"
+            else:
+                regions[i] = image
+                paths[i] = "full"
 
-            # Basic checks (must pass these first)
-            is_reasonable_length = 30 <= len(cleaned) <= 50
-            is_alphanumeric = all(c.isalnum() or c == "<" for c in cleaned)
-            has_separator = "<" in cleaned
+        retry = []
+        crops: Dict[int, list] = {}
+        for i, lines in self._ocr_lines_batch(regions, settings.OCR_BATCH_REC_SIZE, crops).items():
+            with observe_stage("filter"):
+                mrz_candidates = self._filter_mrz_candidates(lines)
 
-            if not (is_reasonable_length and is_alphanumeric and has_separator):
+            if paths[i] == "band" and len(mrz_candidates) < 2:
+                retry.append(i)
                 continue
 
-            # Score this candidate (higher = more likely to be MRZ)
-            score = 0
-
-            # MRZ Line 1 indicators:
-            # - Starts with P< (passport document type)
-            # - OCR sometimes misses the < and reads PBGR instead of P<BGR
-            if cleaned.startswith("P<"):
-                score += 50
-                logger.debug(f"Line starts with P<: +50 score")
-            elif cleaned.startswith("P") and len(cleaned) >= 4 and cleaned[1:4].isalpha():
-                # Likely P<BGR read as PBGR (missing separator)
-                score += 45  # Slightly lower score but still strong indicator
-                logger.debug(f"Line starts with P + 3 letters (likely P<BGR): +45 score")
-
-            # - Has 3-letter country code after P< (positions 2-5)
-            if len(cleaned) >= 5 and cleaned[2:5].isalpha():
-                score += 20
-                logger.debug(f"Has country code: +20 score")
-
-            # - Has double separators << (indicates name field separator)
-            if "<<" in cleaned:
-                score += 15
-                logger.debug(f"Has << separator: +15 score")
-
-            # MRZ Line 2 indicators:
-            # - Contains digits (passport number, dates)
-            digit_count = sum(1 for c in cleaned if c.isdigit())
-            if digit_count >= 15:  # Line 2 has passport#(9) + DOB(6) + expiry(6) = 21+ digits
-                score += 40
-                logger.debug(f"Has {digit_count} digits: +40 score")
-            elif digit_count >= 8:  # Some digits, likely line 2
-                score += 20
-                logger.debug(f"Has {digit_count} digits: +20 score")
-
-            # - Detect date patterns (YYMMDD format, 6 consecutive digits)
-            import re
-            date_patterns = re.findall(r'\d{6}', cleaned)
-            if len(date_patterns) >= 2:  # Line 2 has DOB + expiry
-                score += 30
-                logger.debug(f"Has {len(date_patterns)} date patterns: +30 score")
-
-            # - Check if contains common nationality codes
-            common_countries = ['BGR', 'USA', 'GBR', 'DEU', 'FRA', 'ITA', 'ESP', 'AUS', 'CAN', 'JPN', 'CHN', 'IND']
-            for country in common_countries:
-                if country in cleaned:
-                    score += 25
-                    logger.debug(f"Contains country code {country}: +25 score")
+            if mrz_candidates:
+                mrz_text, avg_confidence = self._combine_mrz_lines(mrz_candidates)
+                mrz_text, avg_confidence = self._escalate(lines, crops[i], mrz_text, avg_confidence)
+                results[i] = (mrz_text, avg_confidence, paths[i])
+
+        # Round 2: full image for band crops that did not yield both lines
+        if retry:
+            detail("Retrying %d image(s) on full image", len(retry))
+            full_images = {i: images[i] for i in retry}
+            crops = {}
+            for i, lines in self._ocr_lines_batch(full_images, settings.OCR_BATCH_REC_SIZE, crops).items():
+                with observe_stage("filter"):
+                    mrz_candidates = self._filter_mrz_candidates(lines)
+                if mrz_candidates:
+                    mrz_text, avg_confidence = self._combine_mrz_lines(mrz_candidates)
+                    mrz_text, avg_confidence = self._escalate(lines, crops[i], mrz_text, avg_confidence)
+                    results[i] = (mrz_text, avg_confidence, "full")
+
+        return results
+
+    def _ocr_lines_batch(
+        self,
+        regions: Dict[int, np.ndarray],
+        batch_size: Optional[int] = None,
+        crops_out: Optional[Dict[int, list]] = None
+    ) -> Dict[int, list]:
+        """
+        Detect text lines per region, then recognise all line crops together.
+
+        Detection failures are isolated per region (that region gets no
+        lines). Line crops that are too short to be an MRZ line are dropped
+        before recognition, and results below PaddleOCR's drop_score are
+        discarded, as PaddleOCR.ocr() does.
+
+        Args:
+            regions: Images keyed by caller-chosen id
+            batch_size: Recognition batch size (defaults to the engine's rec_batch_num)
+            crops_out: If given, filled with the line crops per region key,
+                parallel to the returned lines (for _escalate)
+
+        Returns:
+            Dict mapping region key to list of (text, confidence) tuples,
+            in top-to-bottom reading order
+        """
+        crops = []
+        owners = []
+        lines: Dict[int, list] = {key: [] for key in regions}
+        if crops_out is not None:
+            crops_out.update({key: [] for key in regions})
+
+        with self._lock:
+            with observe_stage("detection"):
+                for key, region in regions.items():
+                    try:
+                        dt_boxes, _ = self.ocr.text_detector(region)
+                    except Exception as e:
+                        logger.error(f"Text detection failed for region {key}: {str(e)}")
+                        continue
+
+                    if dt_boxes is None:
+                        continue
+
+                    # Reading order: top to bottom, then left to right
+                    for box in sorted(dt_boxes, key=lambda b: (b[0][1], b[0][0])):
+                        crop = _crop_text_box(region, box)
+                        if crop.shape[1] < MIN_LINE_ASPECT * crop.shape[0]:
+                            continue
+                        crops.append(crop)
+                        owners.append(key)
+
+            if not crops:
+                return lines
+
+            # Recognise all crops at once
+            with observe_stage("recognition"):
+                recognizer = self.ocr.text_recognizer
+                default_batch = recognizer.rec_batch_num
+                rec_batch_size = batch_size or default_batch
+                recognizer.rec_batch_num = rec_batch_size
+                try:
+                    rec_res, _ = recognizer(crops)
+                finally:
+                    recognizer.rec_batch_num = default_batch
+
+        for key, crop, (text, confidence) in zip(owners, crops, rec_res):
+            if confidence >= self.ocr.drop_score:
+                lines[key].append((text, confidence))
+                if crops_out is not None:
+                    crops_out[key].append(crop)
+
+        if len(regions) > 1:
+            detail(
+                "Batch OCR: %d image(s), %d line crop(s) recognised in batches of %d",
+                len(regions), len(crops), rec_batch_size
+            )
+        return lines
+
+    def _ocr_lines(self, image: np.ndarray, crops: Optional[list] = None) -> list:
+        """
+        Run PaddleOCR detection + recognition on an image.
+
+        Args:
+            crops: If given, extended with the line crops, parallel to the result
+
+        Returns:
+            List of (text, confidence) tuples, one per detected text line
+        """
+        crops_out: Dict[int, list] = {}
+        detected_lines = self._ocr_lines_batch({0: image}, crops_out=crops_out)[0]
+        if crops is not None:
+            crops.extend(crops_out[0])
+
+        if detail.enabled:
+            detail("PaddleOCR detected %d text line(s)", len(detected_lines))
+            for i, (text, conf) in enumerate(detected_lines):
+                detail("Line %d (confidence %.2f)", i + 1, conf, text=text)
+
+        return detected_lines
+
+    def _escalate(self, lines: list, crops: list, mrz_text: str, confidence: float) -> Tuple[str, float]:
+        """
+        Re-read the MRZ line crops of a low-confidence scan and fuse the passes.
+
+        Recognition only (no detection) runs on the crops of the lines that
+        look like MRZ lines, once per app.ocr_fusion variant, until the fused
+        MRZ reaches OCR_CONFIDENCE_THRESHOLD with all check digits agreeing,
+        or OCR_ESCALATION_BUDGET_MS is spent. The budget is checked before
+        each pass, so one pass may end past it.
+
+        Returns:
+            (mrz_text, confidence): the original reading, unless a fused
+            reading has all check digits agreeing (and, if the original did
+            too, a higher confidence). A fused reading with wrong check
+            digits never replaces it, so it cannot lift the confidence over
+            the threshold.
+        """
+        threshold = settings.OCR_CONFIDENCE_THRESHOLD
+        if not settings.OCR_ESCALATION_ENABLED or confidence >= threshold or len(crops) != len(lines):
+            return mrz_text, confidence
+
+        indices = [i for i, line in enumerate(lines) if self._filter_mrz_candidates([line])]
+        if not indices:
+            return mrz_text, confidence
+
+        deadline = time.perf_counter() + settings.OCR_ESCALATION_BUDGET_MS / 1000
+        readings = {i: [lines[i]] for i in indices}
+        best_text, best_confidence = mrz_text, confidence
+        best_valid = _check_digits_agree(mrz_text)
+        passes = 0
+
+        with observe_stage("escalation"):
+            for name, variant in VARIANTS:
+                if time.perf_counter() >= deadline:
+                    break
+                try:
+                    variant_crops = [variant(crops[i]) for i in indices]
+                    with self._lock:
+                        rec_res, _ = self.ocr.text_recognizer(variant_crops)
+                except Exception as e:
+                    logger.error(f"Escalation pass '{name}' failed: {str(e)}")
+                    continue
+                passes += 1
+                for i, reading in zip(indices, rec_res):
+                    readings[i].append(reading)
+
+                fused_lines = [fuse_line(readings[i]) if i in readings else line for i, line in enumerate(lines)]
+                candidates = self._filter_mrz_candidates(fused_lines)
+                if len(candidates) < 2:
+                    continue
+                fused_text, fused_confidence = self._combine_mrz_lines(candidates)
+                if not _check_digits_agree(fused_text):
+                    continue
+                if not best_valid or fused_confidence > best_confidence:
+                    best_text, best_confidence, best_valid = fused_text, fused_confidence, True
+                if best_confidence >= threshold:
                     break
 
-            # REJECT if score too low (likely just a name or random text)
-            if score < 30:
-                logger.debug(f"Rejected (score {score}): {cleaned[:30]}...")
-                continue
+        accepted = best_valid and best_confidence >= threshold
+        metrics.record_escalation(accepted)
+        detail(
+            "Escalation: %d extra pass(es) over %d line(s), confidence %.2f -> %.2f, check digits %s (%s)",
+            passes, len(indices), confidence, best_confidence, "agree" if best_valid else "wrong",
+            "accepted" if accepted else "still low"
+        )
+        return best_text, best_confidence
 
-            # Add to candidates with score
-            candidates.append((cleaned, confidence, score))
-            logger.info(f"MRZ candidate (score={score}): {cleaned[:30]}... (confidence: {confidence:.2f})")
+    def _filter_mrz_candidates(self, detected_lines: list) -> List[Candidate]:
+        """
+        Filter detected text lines to find MRZ candidates.
 
-        # Sort by score (highest first), then by confidence
-        candidates = sorted(candidates, key=lambda x: (x[2], x[1]), reverse=True)
+        MRZ characteristics (STRICT validation, scored in app.mrz_candidates):
+        - Line 1: Starts with a document code (P<, V<, I<, ID, ...), has country code
+        - Line 2: Document number and/or dates (6 digits each), check digits
+        - Names (TD1 line 3): letters and <<, no digits
+        - All: 30-44 characters, contains '<', alphanumeric only
 
-        # Return as (text, confidence) tuples (drop score)
-        return [(text, conf) for text, conf, score in candidates]
+        Returns:
+            Candidates best first, each classified as line 1, line 2 or names
+        """
+        candidates = rank_candidates(detected_lines)
+        if detail.enabled:
+            for c in candidates:
+                detail("MRZ candidate (%s, score %d, confidence %.2f)", c.kind, c.score, c.confidence, text=c.text)
+        return candidates
 
-    def _combine_mrz_lines(self, candidates: list) -> Tuple[str, float]:
+    def _combine_mrz_lines(self, candidates: List[Candidate]) -> Tuple[str, float]:
         """
-        Combine MRZ candidate lines into final 88-character MRZ.
+        Combine MRZ candidate lines into the final MRZ.
 
-        ICAO 9303 standard: 2 lines × 44 characters each
-        - Line 1: P<ISSUINGCOUNTRYSURNAME<<GIVENNAMES
-        - Line 2: PASSPORTNUMBER<NATIONALITY<DOB<SEX<EXPIRY<PERSONALNUMBER
+        The layout (icao_mrz.formats) follows from the document code of line
+        1 and the line lengths (see app.mrz_candidates.line_width):
+        - TD3 passports, MRV-A visas: 2 lines × 44 characters
+        - TD2 cards, MRV-B visas: 2 lines × 36 characters
+        - TD1 ID cards: 3 lines × 30 characters (line 1, data line, names)
         """
         if not candidates:
             return "", 0.0
 
-        # Separate Line 1 and Line 2 candidates
-        line1_candidates = []
-        line2_candidates = []
-
-        for text, conf in candidates:
-            # Line 1 starts with P< (or PBGR if < is missing) and has mostly letters
-            # OCR sometimes reads P<BGR as PBGR (missing separator)
-            if text.startswith("P<"):
-                line1_candidates.append((text, conf))
-            elif text.startswith("P") and len(text) >= 4 and text[1:4].isalpha():
-                # Likely P<BGR read as PBGR
-                line1_candidates.append((text, conf))
-            # Line 2 has many digits (passport number, dates)
-            else:
-                digit_count = sum(1 for c in text if c.isdigit())
-                if digit_count >= 8:  # Line 2 has ~21 digits
-                    line2_candidates.append((text, conf))
+        # Separate Line 1 and Line 2 candidates (classified while scoring)
+        line1_candidates = [c for c in candidates if c.kind == LINE1]
+        line2_candidates = [c for c in candidates if c.kind == LINE2]
 
-        logger.info(f"Found {len(line1_candidates)} Line 1 candidates, {len(line2_candidates)} Line 2 candidates")
+        detail("Found %d Line 1 candidates, %d Line 2 candidates", len(line1_candidates), len(line2_candidates))
 
         # Try to get both lines
         if line1_candidates and line2_candidates:
             # Take best of each type
-            line1_text, line1_conf = line1_candidates[0]
-            line2_text, line2_conf = line2_candidates[0]
-
-            logger.info(f"Selected Line 1: {line1_text[:30]}... (conf: {line1_conf:.2f})")
-            logger.info(f"Selected Line 2: {line2_text[:30]}... (conf: {line2_conf:.2f})")
-
-            # Normalize to exactly 44 characters each
-            line1 = self._normalize_mrz_line(line1_text)
-            line2 = self._normalize_mrz_line(line2_text)
+            line1_text, line1_conf = line1_candidates[0].text, line1_candidates[0].confidence
+            line2_text, line2_conf = line2_candidates[0].text, line2_candidates[0].confidence
+
+            detail("Selected Line 1 (conf %.2f)", line1_conf, line=line1_text)
+            detail("Selected Line 2 (conf %.2f)", line2_conf, line=line2_text)
+
+            width = line_width(line1_candidates[0], line2_candidates[0])
+            fmt = format_for_width(width, line1_text[0])
+            detail("Layout %s (%d characters per line)", fmt.name, width)
+
+            # Normalize to the layout's width
+            lines = [self._normalize_mrz_line(line1_text, width), self._normalize_mrz_line(line2_text, width)]
+            confidences = [line1_conf, line2_conf]
+
+            if fmt is TD1:
+                # Names lines starting with P (P<BGR read as PBGR rule) are scored as line 1
+                names = [c for c in candidates if c.kind == NAMES or (c.kind == LINE1 and not c.digits)]
+                if names:
+                    detail("Selected names line (conf %.2f)", names[0].confidence, line=names[0].text)
+                    lines.append(names[0].text[:width].ljust(width, "<"))  # No code or data to repair
+                    confidences.append(names[0].confidence)
+                else:
+                    detail("No names line found, leaving names empty")
+                    lines.append("<" * width)
 
             # Combine lines
-            mrz_text = line1 + line2
-            avg_confidence = (line1_conf + line2_conf) / 2
+            mrz_text = "".join(lines)
+            avg_confidence = sum(confidences) / len(confidences)
 
             return mrz_text, avg_confidence
 
         # Fallback: If we only have one type, try to use top 2 candidates
         elif len(candidates) >= 2:
-            logger.warning("Could not separate Line 1 and Line 2, using top 2 candidates by length")
-            sorted_candidates = sorted(candidates, key=lambda x: abs(len(x[0]) - 44))
+            detail("Could not separate Line 1 and Line 2, using top 2 candidates by length")
+            sorted_candidates = sorted(candidates, key=lambda c: abs(len(c.text) - 44))
 
-            line1_text, line1_conf = sorted_candidates[0]
-            line2_text, line2_conf = sorted_candidates[1]
+            line1_text, line1_conf = sorted_candidates[0].text, sorted_candidates[0].confidence
+            line2_text, line2_conf = sorted_candidates[1].text, sorted_candidates[1].confidence
 
             line1 = self._normalize_mrz_line(line1_text)
             line2 = self._normalize_mrz_line(line2_text)
@@ -257,18 +461,18 @@ class OCREngine:
 
         # Only one candidate found - incomplete scan
         elif len(candidates) == 1:
-            logger.warning("Only one MRZ line detected (incomplete scan)")
-            single_text, single_conf = candidates[0]
+            detail("Only one MRZ line detected (incomplete scan)")
+            single_text, single_conf = candidates[0].text, candidates[0].confidence
             mrz_text = self._normalize_mrz_line(single_text)
             return mrz_text, single_conf
 
         else:
-            logger.error("No valid MRZ candidates found")
+            detail("No valid MRZ candidates found")
             return "", 0.0
 
-    def _normalize_mrz_line(self, text: str) -> str:
+    def _normalize_mrz_line(self, text: str, width: int = TD3.width) -> str:
         """
-        Normalize MRZ line to exactly 44 characters.
+        Normalize MRZ line to exactly width characters (44, 36 or 30).
 
         - Pad with '<' if too short
         - Truncate if too long
@@ -277,22 +481,21 @@ class OCREngine:
         # Replace spaces with separators
         corrected = text.replace(" ", "<")
 
-        # FIX: Line 1 sometimes missing < after P
+        # FIX: Line 1 sometimes missing < after the document code
         # OCR reads P<BGR as PBGR (missing separator)
-        # Correct format: P<ISSUINGCOUNTRY...
-        if corrected.startswith("P") and not corrected.startswith("P<"):
-            # Check if next 3 chars are letters (country code)
-            if len(corrected) >= 4 and corrected[1:4].isalpha():
-                # Insert missing < after P
-                corrected = "P<" + corrected[1:]
-                logger.info(f"Fixed Line 1 format: inserted < after P (was {corrected[:5]}, now P<{corrected[2:5]})")
+        # Correct format: P<ISSUINGCOUNTRY... (same for V<, I<, A<, C<)
+        if country_offset(corrected) == 1:
+            # Insert missing < after the document code
+            corrected = corrected[0] + "<" + corrected[1:]
+            detail("Fixed Line 1 format: inserted < after %s", corrected[0])
 
         # FIX: Line 2 often missing check digit separator
         # Correct format: PASSPORT#<NAT<DOB<SEX<EXP... (passport# = 9 chars, then <, then 3-letter NAT)
         # OCR sometimes reads: PASSPORT#XNAT... or PASSPORT##NAT... (misreads < or adds extra digit)
         # We need to find where the 3-letter nationality code starts and insert < before it
 
-        if len(corrected) >= 13:
+        # (TD1 data lines start with the dates instead)
+        if len(corrected) >= 13 and width != TD1.width:
             # Check if this looks like Line 2 (starts with digits)
             if corrected[:9].replace('<', '').isdigit():  # First 9 chars should be passport number
                 # Look for 3-letter nationality code (position should be 10-12 after inserting <)
@@ -300,22 +503,17 @@ class OCREngine:
                 # Strategy: Find where we have 2-3 consecutive UPPERCASE letters (nationality)
                 # Handle cases like: 8GR, BGR, <BGR
 
-                # List of known nationality codes to search for
-                common_countries = ['BGR', 'USA', 'GBR', 'DEU', 'FRA', 'ITA', 'ESP', 'AUS', 'CAN', 'JPN', 'CHN', 'IND', 'RUS', 'TUR']
-
-                nationality_pos = -1
-                for country in common_countries:
-                    pos = corrected.find(country)
-                    if pos >= 9 and pos <= 13:  # Should be around position 10
-                        nationality_pos = pos
-                        logger.info(f"Found nationality code '{country}' at position {pos}")
-                        break
+                # Any ICAO country code should be around position 10
+                nationality_pos = nationality_offset(corrected)
+                if nationality_pos != -1:
+                    detail("Found nationality code %s at position %d",
+                           corrected[nationality_pos:nationality_pos + 3], nationality_pos)
 
                 # If we found a nationality code and separator is missing
                 if nationality_pos > 9 and corrected[9] != '<':
                     # Remove extra characters between pos 9 and nationality
                     corrected = corrected[:9] + '<' + corrected[nationality_pos:]
-                    logger.info(f"Fixed Line 2 format: removed {nationality_pos-9} chars, inserted < at pos 9")
+                    detail("Fixed Line 2 format: removed %d chars, inserted < at pos 9", nationality_pos - 9)
                 elif nationality_pos == -1:
                     # Fallback: Look for any 3 consecutive letters
                     for i in range(9, min(14, len(corrected))):
@@ -325,31 +523,72 @@ class OCREngine:
                             # Found 3 letters at position i
                             if i > 9 and corrected[9] != '<':
                                 corrected = corrected[:9] + '<' + corrected[i:]
-                                logger.info(f"Fixed Line 2 format (fallback): removed {i-9} chars, inserted < at pos 9")
+                                detail("Fixed Line 2 format (fallback): removed %d chars, inserted < at pos 9", i - 9)
                             break
 
-        # Ensure exactly 44 characters
-        if len(corrected) < 44:
-            corrected = corrected.ljust(44, "<")
-        elif len(corrected) > 44:
-            corrected = corrected[:44]
+        # Ensure exactly width characters
+        if len(corrected) < width:
+            corrected = corrected.ljust(width, "<")
+        elif len(corrected) > width:
+            corrected = corrected[:width]
 
         return corrected
 
 
+def _check_digits_agree(mrz_text: Optional[str]) -> bool:
+    """True if mrz_text is a complete MRZ (any layout) whose check digits all agree."""
+    fmt = detect_format(mrz_text) if mrz_text else None
+    return fmt is not None and validate(mrz_text, fmt)["valid"]
+
+
+def _crop_text_box(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """
+    Cut a detected text quadrilateral out of the image as an upright line crop.
+
+    Same perspective rectification PaddleOCR applies before recognition.
+    """
+    points = np.asarray(box, dtype=np.float32).reshape(4, 2)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    width, height = max(width, 1), max(height, 1)
+
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    matrix = cv2.getPerspectiveTransform(points, target)
+    crop = cv2.warpPerspective(
+        image, matrix, (width, height),
+        borderMode=cv2.BORDER_REPLICATE,
+        flags=cv2.INTER_CUBIC
+    )
+
+    # Vertical boxes are text rotated by 90 degrees
+    if height / float(width) >= 1.5:
+        crop = np.rot90(crop)
+
+    return crop
+
+
 # Singleton instance
-_ocr_engine_instance: Optional[OCREngine] = None
+_ocr_engine_instance = None
 
 
-def get_ocr_engine() -> OCREngine:
+def get_ocr_engine():
     """
-    Get singleton OCREngine instance.
+    Get singleton OCR engine instance.
 
-    This ensures only one PaddleOCR instance is created (saves memory).
+    This ensures only one PaddleOCR instance is created per process (saves memory).
+    In shared serving mode (OCR_SERVING_MODE=shared) no model is loaded here:
+    a RemoteOCREngine forwards calls to the shared inference server instead.
     """
     global _ocr_engine_instance
 
     if _ocr_engine_instance is None:
-        _ocr_engine_instance = OCREngine()
+        if settings.OCR_SERVING_MODE == "shared":
+            from app.inference_client import RemoteOCREngine
+            _ocr_engine_instance = RemoteOCREngine(
+                settings.OCR_INFERENCE_SOCKET,
+                settings.OCR_INFERENCE_TIMEOUT
+            )
+        else:
+            _ocr_engine_instance = OCREngine()
 
     return _ocr_engine_instance
@@ -0,0 +1,143 @@
+"""
+Multi-Pass OCR Fusion for Low-Confidence MRZ Lines
+
+When a scan comes back below OCR_CONFIDENCE_THRESHOLD, the MRZ line crops
+that were already cut out for recognition are recognised again after a few
+cheap image variants (Otsu binarisation, a slight horizontal stretch,
+unsharp masking). Each pass reads every line once; the readings of one line
+are then fused:
+
+1. Alignment. Only readings with the most supported length are compared
+   position by position (an inserted or dropped character shifts the rest
+   of the line).
+2. Characters. Each position takes the character with the highest summed
+   confidence over the passes. Its confidence is that sum divided by the
+   number of passes: the mean confidence over all passes, where a pass
+   that read another character counts as 0 (PaddleOCR reports one
+   confidence per line, so a pass's line confidence stands in for its
+   characters). A low first reading therefore still weighs on the result.
+3. Check digits. On line 2 (the data line of TD2, TD3 and visas, the
+   dates of TD1), a field whose fused characters fail their check digit is
+   replaced by the most confident pass whose reading of that field (data
+   and check digit) agrees. Which fields those are comes from the layout
+   table for the line's width.
+
+Example:
+    >>> fuse_line([("L898902C36UTO7408122F1204159ZE184226B<<<<<10", 0.62),
+    ...            ("L898902C36UTO7408122F1204159ZE184226B<<<<<1O", 0.55),
+    ...            ("L898902C36UTO7408122F1204159ZE184226B<<<<<10", 0.81)])[0][-2:]
+    '10'
+"""
+from collections import defaultdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from icao_mrz import DOCUMENT_CODES, FORMATS, CheckField
+
+from app.check_digits import check_digit
+from app.mrz_candidates import clean_line  # Same cleaning as before candidate scoring
+
+
+def _line2_checks(fmt) -> Tuple[CheckField, ...]:
+    """Check digits of a layout that lie wholly on line 2, positions relative to the line."""
+    start, end = fmt.width, 2 * fmt.width
+    return tuple(
+        CheckField(field.name, tuple(p - start for p in field.positions), field.check - start, field.optional)
+        for field in fmt.checks
+        if all(start <= p < end for p in field.positions + (field.check,))
+    )
+
+
+# Line width -> line-2 check digits (TD3 for 44, TD2 for 36, TD1 for 30)
+LINE2_CHECKS: Dict[int, Tuple[CheckField, ...]] = {
+    FORMATS[name].width: _line2_checks(FORMATS[name]) for name in ("TD1", "TD2", "TD3")
+}
+
+
+def _binarized(crop: np.ndarray) -> np.ndarray:
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
+
+
+def _stretched(crop: np.ndarray) -> np.ndarray:
+    # The recogniser rescales to a fixed height, so only a change of aspect ratio matters
+    return cv2.resize(crop, None, fx=1.15, fy=1.0, interpolation=cv2.INTER_CUBIC)
+
+
+def _sharpened(crop: np.ndarray) -> np.ndarray:
+    blurred = cv2.GaussianBlur(crop, (0, 0), 2.0)
+    return cv2.addWeighted(crop, 1.6, blurred, -0.6, 0)
+
+
+# Tried in this order until the time budget runs out
+VARIANTS: Tuple[Tuple[str, Callable[[np.ndarray], np.ndarray]], ...] = (
+    ("binarized", _binarized),
+    ("stretched", _stretched),
+    ("sharpened", _sharpened),
+)
+
+
+def _field_agrees(line2: str, field) -> bool:
+    """Check digit of one field, read from line 2 alone."""
+    data = "".join(line2[p] for p in field.positions)
+    check = line2[field.check]
+    if field.optional and check == "<" and set(data) == {"<"}:
+        return True
+    return check == str(check_digit(data))
+
+
+def _agree_check_digits(chars: List[str], confs: List[float], aligned: Sequence[Tuple[str, float]],
+                        checks: Sequence[CheckField]) -> None:
+    """Step 3: take failing line-2 fields from the most confident pass whose digits agree."""
+    by_confidence = sorted(aligned, key=lambda reading: reading[1], reverse=True)
+    for field in checks:
+        if _field_agrees("".join(chars), field):
+            continue
+        for text, conf in by_confidence:
+            if _field_agrees(text, field):
+                for p in field.positions + (field.check,):
+                    chars[p] = text[p]
+                    confs[p] = conf
+                break
+
+
+def fuse_line(readings: Sequence[Tuple[str, float]]) -> Tuple[str, float]:
+    """
+    Fuse several OCR readings of the same line crop.
+
+    Args:
+        readings: (text, confidence) per pass, first pass first
+
+    Returns:
+        (text, confidence): fused line and the mean of its character confidences
+    """
+    cleaned = [(clean_line(text), conf) for text, conf in readings if text]
+    if not cleaned:
+        return "", 0.0
+
+    support: Dict[int, float] = defaultdict(float)
+    for text, conf in cleaned:
+        support[len(text)] += conf
+    length = max(support, key=support.get)
+    aligned = [(text, conf) for text, conf in cleaned if len(text) == length]
+
+    chars: List[str] = []
+    confs: List[float] = []
+    for position in range(length):
+        votes: Dict[str, float] = defaultdict(float)
+        for text, conf in aligned:
+            votes[text[position]] += conf
+        char = max(votes, key=votes.get)
+        chars.append(char)
+        confs.append(votes[char] / len(aligned))
+
+    # Line 2 of a full-width MRZ (line 1 starts with a document code and the issuing state)
+    checks = LINE2_CHECKS.get(length)
+    is_line1 = chars[0] in DOCUMENT_CODES and "".join(chars[2:5]).replace("<", "").isalpha()
+    if checks and not is_line1:
+        _agree_check_digits(chars, confs, aligned, checks)
+
+    return "".join(chars), sum(confs) / len(confs) if confs else 0.0
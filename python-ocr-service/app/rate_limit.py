@@ -0,0 +1,279 @@
+"""
+Per-Client Rate Limiting (GCRA)
+
+Each client is limited with the generic cell rate algorithm, the
+single-timestamp form of a token bucket. For a limit of R requests per minute
+with a burst of B, the state per client is one float, the theoretical
+arrival time (TAT) of its next request:
+
+    interval = 60 / R                 (time one request "costs")
+    tolerance = interval * (B - 1)    (how far ahead of schedule a client may be)
+    allowed if TAT - now <= tolerance; then TAT = max(TAT, now) + interval
+
+So every check is O(1), and a client whose TAT has passed has a full
+bucket: its entry can be dropped. Idle clients are swept out every
+RATE_LIMIT_SWEEP_SECONDS.
+
+Client identity: all traffic arrives through the Node backend on 127.0.0.1,
+so the backend passes the real client in RATE_LIMIT_CLIENT_HEADER. The
+header is only honoured from RATE_LIMIT_TRUSTED_PROXIES; any other peer is
+identified by its IP. RATE_LIMIT_CLIENT_LIMITS overrides the default limit
+per identity, e.g. "10.0.4.21=120,10.0.4.22=30/5" (requests per minute,
+optionally /burst).
+
+Backends (RATE_LIMIT_BACKEND):
+- memory: per-worker state, so the effective limit is multiplied by the
+  number of uvicorn workers (default)
+- sqlite: state shared by all workers on the host. The default path is on
+  /dev/shm (tmpfs). Checks run on the event loop, so a write lock held by
+  another worker is waited for BUSY_TIMEOUT_SECONDS at most; past that the
+  request is allowed (fail open) and logged rather than stalling the worker.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for another worker's write lock on the shared store
+BUSY_TIMEOUT_SECONDS = 0.05
+
+
+def parse_client_limits(value: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse RATE_LIMIT_CLIENT_LIMITS.
+
+    Example:
+        >>> parse_client_limits("10.0.4.21=120, kiosk-3=30/5")
+        {'10.0.4.21': (120, 120), 'kiosk-3': (30, 5)}
+    """
+    limits = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        identity, _, limit = item.rpartition("=")
+        rate, _, burst = limit.partition("/")
+        try:
+            limits[identity.strip()] = (int(rate), int(burst or rate))
+        except ValueError:
+            logger.error(f"Ignoring invalid RATE_LIMIT_CLIENT_LIMITS entry: {item!r}")
+    return limits
+
+
+class _Limiter(ABC):
+    """GCRA bookkeeping shared by both backends; subclasses store the TATs."""
+
+    backend = ""
+
+    def __init__(self, rate: int, burst: int, client_limits: Dict[str, Tuple[int, int]], sweep_seconds: float):
+        self.rate = rate
+        self.burst = burst
+        self.client_limits = client_limits
+        self.sweep_seconds = sweep_seconds
+        self._next_sweep = time.time() + sweep_seconds
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._rejected = 0
+
+    def limit_for(self, identity: str) -> Tuple[int, int]:
+        """(requests per minute, burst) for a client."""
+        return self.client_limits.get(identity, (self.rate, self.burst))
+
+    def check(self, identity: str) -> float:
+        """
+        Count one request from identity.
+
+        Returns:
+            0.0 if the request is allowed, otherwise the seconds until it would be
+        """
+        rate, burst = self.limit_for(identity)
+        if rate <= 0:
+            return 0.0
+        interval = 60.0 / rate
+        tolerance = interval * (max(burst, 1) - 1)
+
+        now = time.time()
+        with self._lock:
+            wait = self._update(identity, now, interval, tolerance)
+            if wait > 0:
+                self._rejected += 1
+            else:
+                self._allowed += 1
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_seconds
+                self._sweep(now)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, tracked clients and allowed/rejected counts (this worker)."""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "requestsPerMinute": self.rate,
+                "burst": self.burst,
+                "clientLimits": len(self.client_limits),
+                "trackedClients": self._tracked(),
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+            }
+
+    @abstractmethod
+    def _update(self, identity: str, now: float, interval: float, tolerance: float) -> float:
+        """Apply one request to the client's TAT; returns seconds to wait (0: allowed). Called under the lock."""
+
+    @abstractmethod
+    def _sweep(self, now: float) -> None:
+        """Forget clients whose bucket has refilled. Called under the lock."""
+
+    @abstractmethod
+    def _tracked(self) -> int:
+        """Number of clients with stored state. Called under the lock."""
+
+
+class MemoryRateLimiter(_Limiter):
+    """GCRA state in a dict, per worker process."""
+
+    backend = "memory"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tat: Dict[str, float] = {}
+
+    def _update(self, identity: str, now: float, interval: float, tolerance: float) -> float:
+        tat = max(self._tat.get(identity, now), now)
+        if tat - now > tolerance:
+            return tat - now - tolerance
+        self._tat[identity] = tat + interval
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        # A client whose TAT has passed has a full bucket, the same as no entry
+        self._tat = {identity: tat for identity, tat in self._tat.items() if tat > now}
+
+    def _tracked(self) -> int:
+        return len(self._tat)
+
+
+class SqliteRateLimiter(_Limiter):
+    """GCRA state in a SQLite file shared by all worker processes."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+
+        # Client identities: readable by the service user only
+        old_umask = os.umask(0o077)
+        try:
+            self._conn = sqlite3.connect(
+                path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False, isolation_level=None
+            )
+        finally:
+            os.umask(old_umask)
+
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # Losing the state on a crash only resets the limits
+        self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _update(self, identity: str, now: float, interval: float, tolerance: float) -> float:
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            # Store locked past BUSY_TIMEOUT_SECONDS: allow rather than stall the event loop
+            logger.warning(f"Rate limit store busy, request allowed: {str(e)}")
+            return 0.0
+        try:
+            row = self._conn.execute("SELECT tat FROM buckets WHERE key = ?", (identity,)).fetchone()
+            tat = max(row[0], now) if row else now
+            if tat - now > tolerance:
+                self._conn.execute("COMMIT")
+                return tat - now - tolerance
+            self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?)", (identity, tat + interval))
+            self._conn.execute("COMMIT")
+            return 0.0
+        except sqlite3.OperationalError as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.warning(f"Rate limit store failed, request allowed: {str(e)}")
+            return 0.0
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _sweep(self, now: float) -> None:
+        try:
+            self._conn.execute("DELETE FROM buckets WHERE tat <= ?", (now,))
+        except sqlite3.OperationalError as e:
+            # Another worker holds the lock; the next sweep (any worker's) catches up
+            logger.warning(f"Rate limit sweep skipped: {str(e)}")
+
+    def _tracked(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM buckets WHERE tat > ?", (time.time(),)).fetchone()[0]
+
+
+def retry_after_seconds(wait: float) -> int:
+    """Retry-After header value for a wait returned by check()."""
+    return max(1, math.ceil(wait))
+
+
+# Singleton instance
+_rate_limiter_instance = None
+_rate_limiter_initialized = False
+
+
+def get_rate_limiter():
+    """
+    Get singleton rate limiter, or None if rate limiting is disabled.
+
+    Falls back to the per-worker limiter if the shared SQLite store cannot be
+    opened.
+    """
+    global _rate_limiter_instance, _rate_limiter_initialized
+
+    if not _rate_limiter_initialized:
+        _rate_limiter_initialized = True
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+
+        limits = (
+            settings.RATE_LIMIT_REQUESTS,
+            settings.RATE_LIMIT_BURST or settings.RATE_LIMIT_REQUESTS,
+            parse_client_limits(settings.RATE_LIMIT_CLIENT_LIMITS),
+            settings.RATE_LIMIT_SWEEP_SECONDS,
+        )
+        backend = settings.RATE_LIMIT_BACKEND
+
+        if backend == "sqlite":
+            try:
+                _rate_limiter_instance = SqliteRateLimiter(settings.RATE_LIMIT_PATH, *limits)
+            except Exception as e:
+                logger.error(f"Failed to open shared rate limit store at {settings.RATE_LIMIT_PATH}: {str(e)}")
+                logger.warning("Falling back to per-worker rate limiting")
+                backend = "memory"
+
+        if backend != "sqlite":
+            _rate_limiter_instance = MemoryRateLimiter(*limits)
+
+        logger.info(
+            f"Rate limiting: {_rate_limiter_instance.backend}, {limits[0]}/min (burst {limits[1]}), "
+            f"{len(limits[2])} client override(s)"
+        )
+
+    return _rate_limiter_instance
+
+
+def client_identity(peer: Optional[str], header_value: Optional[str]) -> str:
+    """Rate limit key: the forwarded client from a trusted proxy, else the peer address."""
+    trusted = {host.strip() for host in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",") if host.strip()}
+    if header_value and peer in trusted:
+        return header_value.strip()
+    return peer or "unknown"
@@ -0,0 +1,239 @@
+"""
+Scan Result Cache for Repeated Passport Images
+
+Agents often re-upload the same image (UI error, double-click). The result of
+a successful scan is cached under the SHA-256 of the uploaded bytes, so a
+repeat upload is answered without running PaddleOCR again.
+
+Only the parsed MRZ result is stored, never the image. Entries expire after a
+TTL and the least recently used entries are evicted once the cache is full.
+
+Backends (RESULT_CACHE_BACKEND):
+- memory: per-worker in-process LRU (default)
+- sqlite: SQLite file shared by all uvicorn workers on the host. The default
+  path is on /dev/shm (tmpfs), so passport data never reaches disk.
+- off:    caching disabled
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def image_hash(contents: bytes) -> str:
+    """Cache key for uploaded image bytes."""
+    return hashlib.sha256(contents).hexdigest()
+
+
+class MemoryResultCache:
+    """
+    In-process LRU cache with TTL.
+
+    Each uvicorn worker has its own copy.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached result for key, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store result for key, evicting least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.time(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """Remove one entry (or all entries if key is None). Returns count removed."""
+        with self._lock:
+            if key is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size."""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+class SqliteResultCache:
+    """
+    SQLite-backed LRU cache with TTL, shared across worker processes.
+
+    All workers open the same database file. Hit/miss counters are stored
+    in the database too, so stats() reports totals for the whole service.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        # Passport data: readable by the service user only
+        old_umask = os.umask(0o077)
+        try:
+            self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        finally:
+            os.umask(old_umask)
+
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached result for key, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND created > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+
+            if row is None:
+                self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                return None
+
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+            return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store result for key, dropping expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result), now, now)
+                )
+                self._conn.execute("DELETE FROM results WHERE created <= ?", (now - self.ttl,))
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """Remove one entry (or all entries if key is None). Returns count removed."""
+        with self._lock:
+            if key is None:
+                cursor = self._conn.execute("DELETE FROM results")
+            else:
+                cursor = self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size (totals across all workers)."""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM results WHERE created > ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+        return {
+            "backend": self.backend,
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+
+# Singleton instance
+_result_cache_instance = None
+_result_cache_initialized = False
+
+
+def get_result_cache():
+    """
+    Get singleton result cache, or None if caching is disabled.
+
+    Falls back to the in-memory cache if the shared SQLite store cannot be
+    opened.
+    """
+    global _result_cache_instance, _result_cache_initialized
+
+    if not _result_cache_initialized:
+        _result_cache_initialized = True
+        backend = settings.RESULT_CACHE_BACKEND
+
+        if backend == "sqlite":
+            try:
+                _result_cache_instance = SqliteResultCache(
+                    settings.RESULT_CACHE_PATH,
+                    settings.RESULT_CACHE_MAX_ENTRIES,
+                    settings.RESULT_CACHE_TTL
+                )
+            except Exception as e:
+                logger.error(f"Failed to open shared result cache at {settings.RESULT_CACHE_PATH}: {str(e)}")
+                logger.warning("Falling back to per-worker in-memory result cache")
+                backend = "memory"
+
+        if backend == "memory":
+            _result_cache_instance = MemoryResultCache(
+                settings.RESULT_CACHE_MAX_ENTRIES,
+                settings.RESULT_CACHE_TTL
+            )
+
+        if _result_cache_instance is not None:
+            logger.info(
+                f"Result cache enabled: {_result_cache_instance.backend} "
+                f"({settings.RESULT_CACHE_MAX_ENTRIES} entries, {settings.RESULT_CACHE_TTL}s TTL)"
+            )
+
+    return _result_cache_instance
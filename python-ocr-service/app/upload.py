@@ -0,0 +1,247 @@
+"""
+Streaming Image Uploads
+
+FastAPI's UploadFile only reaches the endpoint after the whole multipart body
+has been received and spooled, so a 200 MB upload used to be buffered before
+it was rejected for being larger than MAX_FILE_SIZE. Here the request body is
+parsed while it arrives (python-multipart, the parser Starlette uses):
+
+- A Content-Length that cannot fit the limits is rejected before reading.
+- The declared part content type must be image/*, checked at the part headers.
+- The first bytes must be a JPEG or PNG signature (magic-byte sniffing).
+- The size cap is enforced per chunk.
+
+For a single upload the first failure aborts the request, and the rest of
+the body is never read. In a batch, a failing file becomes a per-item error
+and its remaining bytes are skipped, not stored.
+
+The file bytes are written into one buffer (preallocated from
+Content-Length for single uploads) and handed out as a memoryview, which
+decode_image() and image_hash() read without copying.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from fastapi import Request
+from starlette.requests import ClientDisconnect
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+SNIFF_BYTES = len(PNG_MAGIC)
+MULTIPART_OVERHEAD = 16 * 1024  # Boundaries and part headers around each file
+
+
+class UploadRejected(Exception):
+    """The request body is not acceptable; maps to an HTTP error response."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadedImage(NamedTuple):
+    """One uploaded file. data is empty when error is set."""
+    filename: Optional[str]
+    content_type: Optional[str]
+    data: memoryview
+    error: Optional[str]
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type from the file signature, or None if not JPEG/PNG."""
+    if head.startswith(JPEG_MAGIC):
+        return "image/jpeg"
+    if head.startswith(PNG_MAGIC):
+        return "image/png"
+    return None
+
+
+def openapi_upload_body(field: str, multiple: bool = False) -> Dict[str, Any]:
+    """openapi_extra for an endpoint that reads its upload with read_image_uploads()."""
+    binary = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [field],
+                        "properties": {field: {"type": "array", "items": binary} if multiple else binary},
+                    }
+                }
+            },
+        }
+    }
+
+
+class _Part:
+    """Parse state of one multipart part."""
+
+    def __init__(self):
+        self.header_field = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.name: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.buffer: Optional[bytearray] = None
+        self.size = 0
+        self.sniffed = False
+        self.error: Optional[str] = None
+
+    def write(self, data: bytes) -> None:
+        end = self.size + len(data)
+        if end <= len(self.buffer):
+            self.buffer[self.size:end] = data
+        else:
+            del self.buffer[self.size:]
+            self.buffer += data
+        self.size = end
+
+    def result(self) -> UploadedImage:
+        data = memoryview(self.buffer)[:self.size] if self.buffer is not None and not self.error else memoryview(b"")
+        return UploadedImage(self.filename, self.content_type, data, self.error)
+
+
+async def read_image_uploads(
+    request: Request,
+    field: str,
+    max_size: int,
+    max_files: int = 1
+) -> List[UploadedImage]:
+    """
+    Stream the image files of a multipart/form-data request.
+
+    Args:
+        request: Incoming request (body not yet read)
+        field: Form field holding the file(s)
+        max_size: Largest accepted file in bytes
+        max_files: 1 for a single upload (any problem rejects the request);
+            more for a batch (problems become per-file errors)
+
+    Returns:
+        One UploadedImage per file in field, in upload order
+
+    Raises:
+        UploadRejected: not multipart, a malformed or truncated body, no
+            file, too many files, or (single upload) a file that is too
+            large or not a JPEG/PNG image
+    """
+    single = max_files == 1
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > max_files * (max_size + MULTIPART_OVERHEAD):
+        raise UploadRejected(
+            400, f"Upload ({content_length} bytes) exceeds maximum ({max_size} bytes per file)"
+        )
+
+    files: List[_Part] = []
+    rejection: List[UploadRejected] = []
+    current: List[Optional[_Part]] = [None]
+    complete: List[bool] = []
+
+    def fail(part: _Part, detail: str) -> None:
+        if single:
+            rejection.append(UploadRejected(400, detail))
+        part.error = detail
+        part.buffer = None
+
+    def on_part_begin():
+        current[0] = _Part()
+
+    def on_header_field(data, start, end):
+        current[0].header_field += data[start:end]
+
+    def on_header_value(data, start, end):
+        current[0].header_value += data[start:end]
+
+    def on_header_end():
+        part = current[0]
+        part.headers[part.header_field.lower()] = part.header_value
+        part.header_field = part.header_value = b""
+
+    def on_headers_finished():
+        part = current[0]
+        _, disposition = parse_options_header(part.headers.get(b"content-disposition", b""))
+        part.name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        if part.name != field:
+            return
+        filename = disposition.get(b"filename")
+        part.filename = filename.decode("utf-8", "replace") if filename is not None else None
+        part.content_type = part.headers.get(b"content-type", b"").decode("latin-1") or None
+
+        files.append(part)
+        if len(files) > max_files:
+            rejection.append(UploadRejected(400, f"Too many files (more than {max_files}), maximum is {max_files}"))
+            return
+        if not part.content_type or not part.content_type.startswith("image/"):
+            fail(part, f"Invalid file type: {part.content_type}. Only images allowed.")
+            return
+        # Single upload: Content-Length bounds the file, so one allocation holds it
+        capacity = min(max_size, content_length) if single else 0
+        part.buffer = bytearray(capacity)
+
+    def on_part_data(data, start, end):
+        part = current[0]
+        if part.name != field or part.buffer is None:
+            return
+        if part.size + (end - start) > max_size:
+            fail(part, f"File size exceeds maximum ({max_size} bytes)")
+            return
+        part.write(data[start:end])
+        if not part.sniffed and part.size >= SNIFF_BYTES:
+            _sniff(part)
+
+    def on_part_end():
+        part = current[0]
+        if part is not None and part.name == field and part.buffer is not None and not part.sniffed:
+            _sniff(part)
+
+    def _sniff(part: _Part) -> None:
+        part.sniffed = True
+        if sniff_image_type(bytes(part.buffer[:SNIFF_BYTES])) is None:
+            fail(part, "Invalid file content: not a JPEG or PNG image")
+
+    def on_end():
+        complete.append(True)
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_end": on_end,
+    })
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                parser.write(chunk)
+            if rejection:
+                raise rejection[0]
+        parser.finalize()
+        # finalize() does not check that the closing boundary arrived
+        if not complete:
+            raise MultipartParseError("Body ended before the closing boundary")
+    except (MultipartParseError, ClientDisconnect):
+        # Truncated or malformed body, or the client went away mid-upload
+        raise UploadRejected(400, "Malformed multipart body")
+
+    if not files:
+        raise UploadRejected(422, f"No file uploaded in field '{field}'")
+    return [part.result() for part in files]
@@ -0,0 +1,177 @@
+"""
+Model Warm-Up and Readiness
+
+Constructing PaddleOCR loads the weights, but the first inference still
+pays for graph optimisation, kernel selection and buffer allocation. Without
+a warm-up, the first real scan on every worker after a PM2 restart is the
+slow one.
+
+At startup each worker (and, in shared serving mode, each model process of
+the inference server) pushes WARMUP_SAMPLES synthetic passports
+(app/synthetic.py) through the full extract_mrz -> parse path. In the HTTP
+workers this runs as a job on the inference executor, so the event loop
+keeps answering /health while it runs and scans that arrive early queue
+behind it.
+
+GET /ready answers 503 until the warm-up has read an MRZ from at least one
+sample, then 200. Warm-up duration and the latency of the first real scan
+are reported there, under `warmup` in /health and as Prometheus gauges.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SEED = 20  # Same synthetic passports on every start
+
+STATUS_PENDING = "pending"   # Startup has not reached the warm-up yet
+STATUS_RUNNING = "running"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"     # No sample could be read; /ready stays 503
+STATUS_SKIPPED = "skipped"   # WARMUP_ENABLED=false: ready once the model is loaded
+
+
+def run_warmup(engine, parser, samples: int) -> Dict[str, Any]:
+    """
+    Run synthetic passports through extract_mrz and parse (blocking).
+
+    Args:
+        engine: OCREngine, or the shared-mode client with the same interface
+        parser: MRZParser
+        samples: Number of synthetic passports
+
+    Returns:
+        Summary: samples, read (MRZ text found), matched (parsed passport
+        number equals the rendered one), durationMs in total, renderMs of it
+        spent drawing the passports, and sampleMs (extract_mrz + parse) per sample
+
+    Raises:
+        RuntimeError: no sample yielded MRZ text, so the model is not usable
+    """
+    from app.synthetic import synthetic_sample
+
+    rng = random.Random(WARMUP_SEED)
+    start = time.perf_counter()
+    read = matched = 0
+    render_seconds = 0.0
+    sample_ms = []
+    for i in range(samples):
+        # A clean page first, then mildly degraded ones for the full-image and escalation paths
+        render_start = time.perf_counter()
+        image, label = synthetic_sample(rng, "clean" if i == 0 else "mild")
+        render_seconds += time.perf_counter() - render_start
+        sample_start = time.perf_counter()
+        mrz_text, _, _ = engine.extract_mrz(image)
+        parsed = parser.parse(mrz_text) if mrz_text else None
+        sample_ms.append(round((time.perf_counter() - sample_start) * 1000, 1))
+
+        read += bool(mrz_text)
+        matched += bool(parsed) and parsed.get("passportNumber") == label["passportNumber"]
+
+    summary = {
+        "samples": samples,
+        "read": read,
+        "matched": matched,
+        "durationMs": round((time.perf_counter() - start) * 1000, 1),
+        "renderMs": round(render_seconds * 1000, 1),
+        "sampleMs": sample_ms,
+    }
+    if samples and not read:
+        raise RuntimeError(f"No MRZ read from {samples} synthetic passport(s)")
+    return summary
+
+
+class Warmup:
+    """Warm-up status of this process."""
+
+    def __init__(self):
+        self.status = STATUS_PENDING
+        self.summary: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.first_scan_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in (STATUS_READY, STATUS_SKIPPED)
+
+    def start(self, executor, engine, parser) -> None:
+        """Schedule the warm-up on the inference executor (call from the running event loop)."""
+        if not settings.WARMUP_ENABLED:
+            self._finish(STATUS_SKIPPED)
+            return
+        self.status = STATUS_RUNNING
+        self._task = asyncio.get_running_loop().create_task(self._run(executor, engine, parser))
+
+    async def _run(self, executor, engine, parser) -> None:
+        try:
+            summary = await executor.run(run_warmup, engine, parser, settings.WARMUP_SAMPLES)
+        except Exception as e:
+            self.fail(str(e))
+            return
+        self.summary = summary
+        log_warmup(summary)
+        self._finish(STATUS_READY)
+
+    def fail(self, error: str) -> None:
+        """Mark the warm-up failed (the model could not be loaded or run)."""
+        self.error = error
+        logger.error(f"Warm-up failed, worker stays not ready: {error}")
+        self._finish(STATUS_FAILED)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        if self.summary:
+            metrics.WARMUP_SECONDS.set(self.summary["durationMs"] / 1000)
+        if self.ready:
+            metrics.WORKERS_READY.set(1)
+
+    def record_scan(self, seconds: float) -> None:
+        """Latency of a scan that ran OCR; the first one after startup is kept."""
+        if self.first_scan_ms is None:
+            self.first_scan_ms = round(seconds * 1000, 1)
+            metrics.FIRST_SCAN_SECONDS.set(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Status, warm-up summary, first scan latency and (multi-worker) ready worker count."""
+        return {
+            "status": self.status,
+            "warmup": self.summary,
+            "error": self.error,
+            "firstScanMs": self.first_scan_ms,
+            "workersReady": metrics.workers_ready(),
+        }
+
+
+def log_warmup(summary: Dict[str, Any]) -> None:
+    """One INFO line per warm-up; the first vs last sample time shows what it saved."""
+    times = summary["sampleMs"]
+    logger.info(
+        f"Warm-up done in {summary['durationMs']:.0f}ms: {summary['read']}/{summary['samples']} MRZ read, "
+        f"{summary['matched']} matched, first sample {times[0]:.0f}ms, last {times[-1]:.0f}ms"
+        if times else "Warm-up skipped (WARMUP_SAMPLES=0)"
+    )
+    if summary["read"] and not summary["matched"]:
+        logger.warning("Warm-up read MRZ text but never the rendered passport number")
+
+
+# Singleton instance
+_warmup_instance: Optional[Warmup] = None
+
+
+def get_warmup() -> Warmup:
+    """
+    Get singleton Warmup status for this process.
+    """
+    global _warmup_instance
+
+    if _warmup_instance is None:
+        _warmup_instance = Warmup()
+
+    return _warmup_instance
@@ -0,0 +1,90 @@
+"""
+Batch vs Sequential MRZ Extraction Benchmark
+
+Runs the same passport images through OCREngine.extract_mrz one at a time
+(what N calls to /scan-mrz do) and through OCREngine.extract_mrz_batch
+(what one call to /scan-mrz/batch does), then reports wall-clock and
+per-core throughput for both.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_batch path/to/images/ [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ocr_engine import get_ocr_engine  # noqa: E402
+
+
+def load_images(directory: str) -> list:
+    """Load all JPG/PNG images in a directory as BGR arrays."""
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+    images = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+    return [img for img in images if img is not None]
+
+
+def run(label: str, fn, images: list, repeat: int) -> dict:
+    """Time fn(images) and return throughput figures."""
+    wall = []
+    cpu = []
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        results = fn(images)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+
+    found = sum(1 for text, _, _ in results if text)
+    best_wall = min(wall)
+    best_cpu = min(cpu)
+    report = {
+        "label": label,
+        "images": len(images),
+        "mrzFound": found,
+        "wallSeconds": best_wall,
+        "cpuSeconds": best_cpu,
+        "imagesPerSecond": len(images) / best_wall,
+        "imagesPerCpuSecond": len(images) / best_cpu,
+    }
+    print(
+        f"{label:<12} {len(images)} images, {found} MRZ found | "
+        f"wall {best_wall:.2f}s ({report['imagesPerSecond']:.2f} img/s) | "
+        f"cpu {best_cpu:.2f}s ({report['imagesPerCpuSecond']:.2f} img/cpu-s)"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", help="Directory of passport images (JPG/PNG)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print(f"No images found in {args.images}")
+        sys.exit(1)
+
+    engine = get_ocr_engine()
+
+    # Warm up both paths so model initialisation is not measured
+    engine.extract_mrz(images[0])
+    engine.extract_mrz_batch(images[:1])
+
+    sequential = run("sequential", lambda imgs: [engine.extract_mrz(img) for img in imgs], images, args.repeat)
+    batched = run("batch", engine.extract_mrz_batch, images, args.repeat)
+
+    speedup = batched["imagesPerCpuSecond"] / sequential["imagesPerCpuSecond"]
+    print(f"Batch throughput per core: {speedup:.2f}x sequential")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+MRZ Candidate Scoring Microbenchmark (no OCR needed)
+
+Builds dense-text pages of 100+ detected lines (printed labels, names,
+dates, addresses, stamps, a few MRZ-like noise lines) around the two MRZ
+lines of a synthetic TD3 passport (app/synthetic.py), and runs candidate
+filtering + line combination on each page with:
+
+- legacy:  the previous OCREngine scoring (re-imported re, findall,
+           several passes per line, linear country list scan), kept here
+           as the baseline
+- current: app.mrz_candidates via OCREngine._filter_mrz_candidates and
+           _combine_mrz_lines
+
+Reports time per page and per line, and how often each picks the printed
+MRZ. The same pages are then built around ID card (TD1, TD2) and visa
+(MRV-A, MRV-B) MRZs, which the legacy scoring cannot read, for the current
+scoring alone. Exits with status 1 if the current scoring is slower than
+the legacy one, picks the printed passport MRZ less often, or picks the
+printed MRZ of any other layout on less than --min-other of the pages.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_candidates [--pages 300] [--lines 150] [--seed 21]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from icao_mrz import FORMATS, TD3  # noqa: E402
+
+from app import ocr_engine as engine_module  # noqa: E402
+from app.synthetic import COUNTRIES, GIVEN_NAMES, SURNAMES, mrz_lines, random_identity, td3_lines  # noqa: E402
+
+WORDS = [
+    "PASSPORT", "PASSEPORT", "PASAPORTE", "Type", "Code", "Surname", "Nom", "Given", "names", "Prenoms",
+    "Nationality", "Date", "of", "birth", "Sex", "Place", "issue", "expiry", "Authority", "Signature",
+    "REPUBLIC", "KINGDOM", "MINISTRY", "FOREIGN", "AFFAIRS", "holder", "VALID", "FOR", "ALL", "COUNTRIES",
+    "Street", "Avenue", "Road", "City", "Province", "Visa", "Entry", "Exit", "Immigration", "Officer",
+]
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+def text_line(rng: random.Random) -> str:
+    """One line of printed (non-MRZ) page text."""
+    kind = rng.random()
+    if kind < 0.35:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+    if kind < 0.5:
+        return f"{rng.randint(1, 28):02d} {rng.choice(MONTHS)} {rng.randint(1950, 2035)}"
+    if kind < 0.65:
+        return f"{rng.choice(SURNAMES)} {rng.choice(GIVEN_NAMES)}"
+    if kind < 0.8:
+        return (f"{rng.randint(1, 999)} {rng.choice(WORDS)} Street, {rng.choice(WORDS)} City, "
+                f"{rng.choice(COUNTRIES)} {rng.randint(10000, 99999)}")
+    if kind < 0.95:
+        return "".join(rng.choice("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(4, 12)))
+    # MRZ-like noise: visa foil text, security print
+    return "".join(rng.choice("<<<<ABCDEFGHIJKLMNOPRSTUVWXYZ0123456789") for _ in range(rng.randint(30, 48)))
+
+
+def make_pages(count: int, lines: int, rng: random.Random) -> List[Tuple[str, List[Tuple[str, float]]]]:
+    pages = []
+    for _ in range(count):
+        line1, line2 = td3_lines(random_identity(rng))
+        if rng.random() < 0.2:
+            line1 = "P" + line1[2:] + "<"  # P<BGR read as PBGR
+        page = [(text_line(rng), rng.uniform(0.6, 0.99)) for _ in range(lines - 2)]
+        page += [(line1, rng.uniform(0.8, 0.99)), (line2, rng.uniform(0.8, 0.99))]
+        rng.shuffle(page)
+        pages.append(((line1 if line1.startswith("P<") else "P<" + line1[1:-1]) + line2, page))
+    return pages
+
+
+def make_layout_pages(fmt, count: int, lines: int, rng: random.Random) -> List[Tuple[str, List[Tuple[str, float]]]]:
+    """make_pages for any layout: its 2 or 3 MRZ lines among ordinary page text."""
+    pages = []
+    for _ in range(count):
+        mrz = mrz_lines(random_identity(rng), fmt)
+        truth = "".join(mrz)
+        if rng.random() < 0.2:
+            mrz[0] = mrz[0][0] + mrz[0][2:] + "<"  # I<BGR read as IBGR
+        page = [(text_line(rng), rng.uniform(0.6, 0.99)) for _ in range(lines - len(mrz))]
+        page += [(line, rng.uniform(0.8, 0.99)) for line in mrz]
+        rng.shuffle(page)
+        pages.append((truth, page))
+    return pages
+
+
+def legacy_filter(detected_lines: list) -> list:
+    """The previous OCREngine._filter_mrz_candidates, without its logging."""
+    candidates = []
+    for text, confidence in detected_lines:
+        cleaned = text.replace(" ", "").replace(",", "").upper()
+        is_reasonable_length = 30 <= len(cleaned) <= 50
+        is_alphanumeric = all(c.isalnum() or c == "<" for c in cleaned)
+        has_separator = "<" in cleaned
+        if not (is_reasonable_length and is_alphanumeric and has_separator):
+            continue
+        score = 0
+        if cleaned.startswith("P<"):
+            score += 50
+        elif cleaned.startswith("P") and len(cleaned) >= 4 and cleaned[1:4].isalpha():
+            score += 45
+        if len(cleaned) >= 5 and cleaned[2:5].isalpha():
+            score += 20
+        if "<<" in cleaned:
+            score += 15
+        digit_count = sum(1 for c in cleaned if c.isdigit())
+        if digit_count >= 15:
+            score += 40
+        elif digit_count >= 8:
+            score += 20
+        import re
+        date_patterns = re.findall(r'\d{6}', cleaned)
+        if len(date_patterns) >= 2:
+            score += 30
+        common_countries = ['BGR', 'USA', 'GBR', 'DEU', 'FRA', 'ITA', 'ESP', 'AUS', 'CAN', 'JPN', 'CHN', 'IND']
+        for country in common_countries:
+            if country in cleaned:
+                score += 25
+                break
+        if score < 30:
+            continue
+        candidates.append((cleaned, confidence, score))
+    candidates = sorted(candidates, key=lambda x: (x[2], x[1]), reverse=True)
+    return [(text, conf) for text, conf, score in candidates]
+
+
+def legacy_combine(engine, candidates: list) -> Tuple[str, float]:
+    """The previous _combine_mrz_lines line split (digits recounted), without its logging."""
+    line1_candidates, line2_candidates = [], []
+    for text, conf in candidates:
+        if text.startswith("P<") or (text.startswith("P") and len(text) >= 4 and text[1:4].isalpha()):
+            line1_candidates.append((text, conf))
+        elif sum(1 for c in text if c.isdigit()) >= 8:
+            line2_candidates.append((text, conf))
+    if line1_candidates and line2_candidates:
+        (line1, conf1), (line2, conf2) = line1_candidates[0], line2_candidates[0]
+        return engine._normalize_mrz_line(line1) + engine._normalize_mrz_line(line2), (conf1 + conf2) / 2
+    return "", 0.0
+
+
+def run(pages, select) -> Tuple[float, int]:
+    correct = 0
+    start = time.perf_counter()
+    for truth, lines in pages:
+        mrz_text, _ = select(lines)
+        correct += mrz_text == truth
+    return time.perf_counter() - start, correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300, help="Pages per run")
+    parser.add_argument("--lines", type=int, default=150, help="Detected lines per page")
+    parser.add_argument("--seed", type=int, default=21, help="Random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best is reported)")
+    parser.add_argument("--min-other", type=float, default=0.98,
+                        help="Fail if an ID card or visa layout is picked on fewer pages than this")
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.lines, random.Random(args.seed))
+    engine = engine_module.OCREngine.__new__(engine_module.OCREngine)  # Scoring needs no PaddleOCR
+
+    implementations = {
+        "legacy": lambda lines: legacy_combine(engine, legacy_filter(lines)),
+        "current": lambda lines: engine._combine_mrz_lines(engine._filter_mrz_candidates(lines)),
+    }
+    results = {}
+    for name, select in implementations.items():
+        runs = [run(pages, select) for _ in range(args.repeat)]
+        results[name] = (min(elapsed for elapsed, _ in runs), runs[0][1])
+
+    line_count = args.pages * args.lines
+    print(f"{args.pages} pages x {args.lines} lines")
+    print(f"{'':>8} | {'per page':>9} {'per line':>9} | {'printed MRZ picked':>18}")
+    print("-" * 54)
+    for name, (elapsed, correct) in results.items():
+        print(f"{name:>8} | {elapsed / args.pages * 1e6:7.0f}us {elapsed / line_count * 1e9:7.0f}ns | "
+              f"{correct / args.pages:18.1%}")
+    speedup = results["legacy"][0] / results["current"][0]
+    print(f"speedup: {speedup:.2f}x")
+
+    print()
+    print(f"{'layout':>8} | {'per page':>9} | {'printed MRZ picked':>18}  (current)")
+    print("-" * 54)
+    other_picked = {}
+    for name, fmt in FORMATS.items():
+        if fmt is TD3:
+            continue
+        layout_pages = make_layout_pages(fmt, args.pages, args.lines, random.Random(args.seed))
+        elapsed, correct = run(layout_pages, implementations["current"])
+        other_picked[name] = correct / args.pages
+        print(f"{name:>8} | {elapsed / args.pages * 1e6:7.0f}us | {other_picked[name]:18.1%}")
+
+    failures = []
+    if not (speedup > 1.0 and results["current"][1] >= results["legacy"][1]):
+        failures.append("current scoring is slower or picks the printed MRZ less often")
+    failures += [f"{name} picked on {picked:.1%} of pages" for name, picked in other_picked.items()
+                 if picked < args.min_other]
+    print("PASS" if not failures else "FAIL: " + "; ".join(failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
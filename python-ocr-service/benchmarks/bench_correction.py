@@ -0,0 +1,112 @@
+"""
+MRZ Correction Benchmark (no OCR needed)
+
+Takes synthetic TD3 MRZs with correct check digits (app/synthetic.py),
+injects the misreads PaddleOCR typically makes (look-alike letter/digit
+swaps such as O/0, B/8, S/5 and digit confusions such as 3/8), runs
+app.mrz_correction.correct_td3 and reports per number of injected errors:
+
+- recovered:    corrected MRZ equals the printed one
+- unresolved:   still inconsistent, flagged with validCheckDigits=false
+                (agent rescans, as before)
+- undetected:   consistent but still wrong, and every character the
+                check-digit search changed is right: the remaining misread
+                is invisible to check digits (names, or a 6/G swap whose
+                values are equal modulo 10)
+- miscorrected: the check-digit search changed a character to something
+                that was not printed (the risk of correcting; must stay rare)
+
+plus candidates evaluated and time per MRZ. Exits with status 1 if the
+miscorrection rate with one or two misreads exceeds --max-miscorrected
+(three misreads in one MRZ is reported as a stress case only).
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_correction [--count 2000] [--seed 15] [--max-candidates 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.mrz_correction import (  # noqa: E402
+    DIGIT_CONFUSIONS, DIGIT_TO_LETTER, LETTER_TO_DIGIT, REASON_CHECK_DIGIT, correct_td3
+)
+from app.synthetic import random_identity, td3_lines  # noqa: E402
+
+GATED_ERRORS = 2  # Misreads per MRZ the miscorrection limit applies to
+
+
+def misread(mrz: str, errors: int, rng: random.Random) -> str:
+    """Inject OCR-style errors at random positions that have a plausible misreading."""
+    chars = list(mrz)
+    positions = [i for i, c in enumerate(mrz) if c in LETTER_TO_DIGIT or c in DIGIT_TO_LETTER or c in DIGIT_CONFUSIONS]
+    for position in rng.sample(positions, errors):
+        char = chars[position]
+        options = [o for o in (LETTER_TO_DIGIT.get(char), DIGIT_TO_LETTER.get(char)) if o]
+        if char in DIGIT_CONFUSIONS and (not options or rng.random() < 0.3):
+            options = list(DIGIT_CONFUSIONS[char])
+        chars[position] = rng.choice(options)
+    return "".join(chars)
+
+
+def run(count: int, errors: int, rng: random.Random, max_candidates: int) -> Tuple[dict, float]:
+    stats = {"recovered": 0, "unresolved": 0, "undetected": 0, "miscorrected": 0, "candidates": 0}
+    elapsed = 0.0
+    for _ in range(count):
+        truth = "".join(td3_lines(random_identity(rng)))
+        read = misread(truth, errors, rng)
+
+        start = time.perf_counter()
+        corrected, result = correct_td3(read, max_candidates)
+        elapsed += time.perf_counter() - start
+
+        stats["candidates"] += result["candidates"]
+        wrong_fix = any(
+            c["reason"] == REASON_CHECK_DIGIT and c["corrected"] != truth[c["position"]] for c in result["corrections"]
+        )
+        if corrected == truth:
+            stats["recovered"] += 1
+        elif wrong_fix:
+            stats["miscorrected"] += 1
+        elif not result["valid"]:
+            stats["unresolved"] += 1
+        else:
+            stats["undetected"] += 1
+    return stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="MRZs per error count")
+    parser.add_argument("--seed", type=int, default=15, help="Random seed")
+    parser.add_argument("--max-candidates", type=int, default=2000, help="Candidate cap per MRZ")
+    parser.add_argument("--max-miscorrected", type=float, default=0.02,
+                        help="Fail if more than this share of MRZs is corrected to a wrong but consistent MRZ")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ok = True
+    print(f"{'errors':>6} | {'recovered':>9} {'unresolved':>10} {'undetected':>10} {'miscorrected':>12} | "
+          f"{'candidates':>10} {'time':>8}")
+    print("-" * 79)
+    for errors in (0, 1, 2, 3):
+        stats, elapsed = run(args.count, errors, rng, args.max_candidates)
+        n = args.count
+        print(
+            f"{errors:>6} | {stats['recovered'] / n:9.1%} {stats['unresolved'] / n:10.1%} "
+            f"{stats['undetected'] / n:10.1%} {stats['miscorrected'] / n:12.1%} | "
+            f"{stats['candidates'] / n:10.1f} {elapsed / n * 1e6:6.0f}us"
+        )
+        if errors <= GATED_ERRORS and stats["miscorrected"] / n > args.max_miscorrected:
+            ok = False
+
+    print("PASS" if ok else f"FAIL: miscorrection rate above {args.max_miscorrected:.1%}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
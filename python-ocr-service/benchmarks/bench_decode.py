@@ -0,0 +1,107 @@
+"""
+Image Decode Benchmark: legacy PIL path vs cv2.imdecode reduced-resolution path
+
+Legacy path (before app/image_decode.py):
+    Image.open(BytesIO(contents)) -> np.array(image) -> cv2.cvtColor(RGB2BGR)
+
+New path:
+    cv2.imdecode(np.frombuffer(contents), IMREAD_REDUCED_COLOR_*)
+
+Each path runs in a fresh subprocess, so peak RSS growth can be measured
+without interference.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_decode path/to/passport.jpg [--repeat 20]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_decode(contents: bytes):
+    """The original scan_mrz decode path."""
+    from io import BytesIO
+
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    image = Image.open(BytesIO(contents))
+    image_np = np.array(image)
+    if len(image_np.shape) == 3 and image_np.shape[2] == 3:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+    elif len(image_np.shape) == 2:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_GRAY2BGR)
+    return image_np
+
+
+def new_decode(contents: bytes):
+    """app.image_decode path."""
+    from app.image_decode import decode_image
+    return decode_image(contents)[0]
+
+
+def child(mode: str, path: str, repeat: int) -> None:
+    """Decode repeatedly in this process and print JSON results."""
+    import cv2  # noqa: F401  (import cost excluded from RSS baseline)
+    import numpy as np  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import app.image_decode  # noqa: F401
+
+    decode = legacy_decode if mode == "legacy" else new_decode
+    with open(path, "rb") as f:
+        contents = f.read()
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    shape = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = decode(contents)
+        times.append(time.perf_counter() - start)
+        shape = image.shape
+        del image
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    times.sort()
+    print(json.dumps({
+        "mode": mode,
+        "shape": shape,
+        "medianDecodeMs": times[len(times) // 2] * 1000,
+        "peakRssGrowthMb": (peak_kb - baseline_kb) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", help="Passport image (JPG/PNG)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", choices=["legacy", "new"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.image, args.repeat)
+        return
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode in ("legacy", "new"):
+        output = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.bench_decode", args.image,
+             "--repeat", str(args.repeat), "--child", mode],
+            cwd=cwd, text=True
+        )
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<7} shape {tuple(result['shape'])}: median {result['medianDecodeMs']:.1f} ms, "
+            f"peak RSS growth {result['peakRssGrowthMb']:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
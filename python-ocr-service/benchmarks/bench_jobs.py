@@ -0,0 +1,159 @@
+"""
+Scan Job Priority and Abandonment Check (no OCR needed)
+
+Drives app.jobs.JobDispatcher with a simulated engine: every scan holds the
+inference executor's only thread for --scan-ms. Corporate-voucher batches
+(bulk) are queued first, then counter scans arrive one every --arrival-ms
+while the bulk backlog drains. Reports how long the counter scans wait:
+
+- priority: counter and bulk jobs as submitted
+- fifo:     every job submitted as bulk (one queue, in arrival order)
+
+Then queues jobs that nobody polls and checks that they are cancelled
+before they reach the engine, while the jobs that are polled still run.
+
+Exits with status 1 if counter scans do not wait less with priorities, wait
+longer than two scans on average, or an abandoned job reaches the engine.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_jobs [--bulk 20] [--counter 10] [--scan-ms 50] [--arrival-ms 80]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.inference import InferenceExecutor  # noqa: E402
+from app.jobs import (  # noqa: E402
+    KIND_SCAN, PRIORITY_BULK, PRIORITY_COUNTER, STATUS_CANCELLED, STATUS_DONE,
+    JobDispatcher, MemoryJobStore,
+)
+
+
+def engine(scan_seconds: float, scanned: List[str], job_id: List[str]) -> None:
+    """Stand-in for extract_mrz: holds the inference thread."""
+    scanned.append(job_id[0])
+    time.sleep(scan_seconds)
+
+
+def scan_work(executor: InferenceExecutor, scan_seconds: float, scanned: List[str],
+              started: Optional[Dict[str, float]] = None):
+    """Job work running the simulated engine, and the list its job ID goes into once submitted."""
+    job_id: List[str] = []
+
+    async def work(fields: Dict) -> Dict:
+        if started is not None:
+            started[job_id[0]] = time.perf_counter()
+        await executor.run(engine, scan_seconds, scanned, job_id)
+        return {"success": True}
+
+    return work, job_id
+
+
+async def wait_done(store, job_ids: List[str]) -> None:
+    """Poll until every job is finished (polling keeps them from being abandoned)."""
+    while any(store.get(job_id)["status"] not in (STATUS_DONE, STATUS_CANCELLED) for job_id in job_ids):
+        await asyncio.sleep(0.01)
+
+
+async def counter_waits(args, prioritise: bool) -> List[float]:
+    """Seconds each counter scan waited from submission to start."""
+    executor = InferenceExecutor(workers=1, max_queue=4)
+    store = MemoryJobStore(max_jobs=1000, ttl=300, abandon_after=300)
+    dispatcher = JobDispatcher(store, concurrency=1, max_pending_bytes=1 << 30)
+    scanned: List[str] = []
+    started: Dict[str, float] = {}
+
+    def submit(priority: str) -> str:
+        work, job_id = scan_work(executor, args.scan_ms / 1000, scanned, started)
+        job_id.append(dispatcher.submit(KIND_SCAN, priority if prioritise else PRIORITY_BULK, work, 0))
+        return job_id[0]
+
+    bulk = [submit(PRIORITY_BULK) for _ in range(args.bulk)]
+    counter, submitted = [], {}
+    for _ in range(args.counter):
+        await asyncio.sleep(args.arrival_ms / 1000)
+        job_id = submit(PRIORITY_COUNTER)
+        counter.append(job_id)
+        submitted[job_id] = time.perf_counter()
+
+    await wait_done(store, bulk + counter)
+    await dispatcher.stop()
+    executor.shutdown()
+    return [started[job_id] - submitted[job_id] for job_id in counter]
+
+
+async def abandonment(args) -> List[str]:
+    """Queue polled and unpolled jobs; return the failures."""
+    executor = InferenceExecutor(workers=1, max_queue=4)
+    store = MemoryJobStore(max_jobs=1000, ttl=300, abandon_after=args.scan_ms / 1000)
+    dispatcher = JobDispatcher(store, concurrency=1, max_pending_bytes=1 << 30)
+    scanned: List[str] = []
+
+    job_ids = []
+    for _ in range(10):
+        work, job_id = scan_work(executor, args.scan_ms / 1000, scanned)
+        job_id.append(dispatcher.submit(KIND_SCAN, PRIORITY_COUNTER, work, 0))
+        job_ids.append(job_id[0])
+
+    polled = set(job_ids[::2])  # Every other phone stays on the page
+    while any(store.get(job_id, seen=False)["status"] in ("queued", "running") for job_id in job_ids):
+        for job_id in polled:
+            store.get(job_id)
+        await asyncio.sleep(args.scan_ms / 4000)
+    await dispatcher.stop()
+    executor.shutdown()
+
+    statuses = {job_id: store.get(job_id, seen=False)["status"] for job_id in job_ids}
+    abandoned = [job_id for job_id in job_ids if statuses[job_id] == STATUS_CANCELLED]
+    print(f"Abandonment: {len(scanned)} of {len(job_ids)} jobs reached the engine, "
+          f"{len(abandoned)} cancelled unscanned ({len(polled)} polled)")
+
+    failures = []
+    if any(job_id in scanned for job_id in abandoned):
+        failures.append("an abandoned job reached the engine")
+    if any(statuses[job_id] != STATUS_DONE for job_id in polled):
+        failures.append("a polled job did not run")
+    if not abandoned:
+        failures.append("no unpolled job was cancelled")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=20, help="Bulk jobs queued first")
+    parser.add_argument("--counter", type=int, default=10, help="Counter scans arriving afterwards")
+    parser.add_argument("--scan-ms", type=float, default=50, help="Simulated scan time")
+    parser.add_argument("--arrival-ms", type=float, default=80, help="Time between counter scans")
+    args = parser.parse_args()
+
+    waits = {
+        "priority": asyncio.run(counter_waits(args, prioritise=True)),
+        "fifo": asyncio.run(counter_waits(args, prioritise=False)),
+    }
+
+    print(f"{args.bulk} bulk jobs, then {args.counter} counter scans every {args.arrival_ms:.0f}ms "
+          f"({args.scan_ms:.0f}ms per scan, 1 inference thread)")
+    print(f"{'':>9} | {'counter wait mean':>17} {'max':>8}")
+    print("-" * 40)
+    for name, seconds in waits.items():
+        print(f"{name:>9} | {statistics.mean(seconds) * 1000:15.0f}ms {max(seconds) * 1000:6.0f}ms")
+
+    failures = asyncio.run(abandonment(args))
+    mean_wait = statistics.mean(waits["priority"])
+    if mean_wait >= statistics.mean(waits["fifo"]):
+        failures.append("counter scans do not wait less with priorities")
+    if mean_wait > 2 * args.scan_ms / 1000:
+        failures.append(f"counter scans wait {mean_wait * 1000:.0f}ms on average (over two scans)")
+
+    print("PASS" if not failures else "FAIL: " + "; ".join(failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
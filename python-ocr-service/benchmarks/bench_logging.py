@@ -0,0 +1,147 @@
+"""
+Logging Overhead Benchmark (no OCR needed)
+
+Runs the CPU-only part of a scan, MRZ candidate filtering, line combination
+and MRZParser.parse, on synthetic OCR output (app/synthetic.py), plus the
+per-request summary record, with the real log configuration
+(app.log.configure_logging) writing to memory. Three modes:
+
+- off:    logging disabled (the floor)
+- info:   LOG_LEVEL=INFO, the production default: one summary record per scan
+- traced: every scan traced at INFO (LOG_DETAIL_SAMPLE_RATE=1), roughly
+          the volume every scan used to log
+
+Reports time, records and bytes per scan and the overhead over "off", and
+checks the logged text for the synthetic passport numbers, surnames and
+MRZ lines. Exits with status 1 if any of them appears (PII leak) or if the
+INFO overhead exceeds --max-info-overhead-us.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_logging [--count 2000] [--seed 19] [--json]
+"""
+import argparse
+import io
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import mrz_parser as parser_module, ocr_engine as engine_module  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.log import configure_logging, event  # noqa: E402
+from app.synthetic import random_identity, td3_lines  # noqa: E402
+
+# Printed text above the MRZ that OCR also returns
+VIZ_LINES = ["PASSPORT", "PASSEPORT", "Type/Type P", "Surname/Nom", "Given names/Prenoms", "Date of expiry"]
+
+
+class _CountingStream(io.StringIO):
+    """Log sink that keeps the text (for the PII check) and counts records."""
+
+    records = 0
+
+    def write(self, text: str) -> int:
+        self.records += text.count("\n")
+        return super().write(text)
+
+
+def make_scans(count: int, rng: random.Random) -> List[Tuple[Dict[str, Any], List[Tuple[str, float]]]]:
+    scans = []
+    for _ in range(count):
+        identity = random_identity(rng)
+        line1, line2 = td3_lines(identity)
+        lines = [(text, rng.uniform(0.8, 0.99)) for text in rng.sample(VIZ_LINES, 3)]
+        lines += [(line1, rng.uniform(0.85, 0.99)), (line2, rng.uniform(0.85, 0.99))]
+        scans.append(({**identity, "line2": line2}, lines))
+    return scans
+
+
+def run(mode: str, scans, engine, parser) -> Tuple[float, _CountingStream]:
+    settings.LOG_DETAIL_SAMPLE_RATE = 1.0 if mode == "traced" else 0.0
+    configure_logging("CRITICAL" if mode == "off" else "INFO")
+    stream = _CountingStream()
+    logging.getLogger().handlers[0].setStream(stream)
+    logger = logging.getLogger("app.main")
+
+    start = time.perf_counter()
+    for _, lines in scans:
+        engine_module.detail.begin()  # As extract_mrz does
+        mrz_text, confidence = engine._combine_mrz_lines(engine._filter_mrz_candidates(lines))
+        data = parser.parse(mrz_text) or {}
+        event(
+            logger, "request", method="POST", path="/scan-mrz", status=200, durationMs=123.4,
+            success=bool(data), confidence=round(confidence, 4), detectionPath="band", cached=False,
+            passportNumber=data.get("passportNumber"), validCheckDigits=data.get("validCheckDigits"),
+            corrections=len(data.get("corrections") or ())
+        )
+    return time.perf_counter() - start, stream
+
+
+def leaks(scans, text: str) -> int:
+    """Scans whose passport number, surname (5+ letters) or MRZ line 2 appears in the log."""
+    found = 0
+    for identity, _ in scans:
+        secrets = [identity["passportNumber"].replace("<", ""), identity["line2"]]
+        if len(identity["surname"]) >= 5:
+            secrets.append(identity["surname"])
+        if any(secret and secret in text for secret in secrets):
+            found += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="Scans per mode")
+    parser.add_argument("--seed", type=int, default=19, help="Random seed")
+    parser.add_argument("--max-info-overhead-us", type=float, default=100.0,
+                        help="Fail if logging at INFO adds more than this per scan")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    scans = make_scans(args.count, random.Random(args.seed))
+    engine = engine_module.OCREngine.__new__(engine_module.OCREngine)  # Filtering needs no PaddleOCR
+    mrz = parser_module.MRZParser()
+
+    results = {}
+    for mode in ("off", "info", "traced"):
+        run(mode, scans[:50], engine, mrz)  # Warm up
+        elapsed, stream = run(mode, scans, engine, mrz)
+        text = stream.getvalue()
+        results[mode] = {
+            "usPerScan": elapsed / args.count * 1e6,
+            "recordsPerScan": stream.records / args.count,
+            "bytesPerScan": len(text) / args.count,
+            "leakedScans": leaks(scans, text) if mode != "off" else 0,
+        }
+    configure_logging()
+
+    for mode in ("info", "traced"):
+        results[mode]["overheadUs"] = results[mode]["usPerScan"] - results["off"]["usPerScan"]
+
+    failures = []
+    if results["info"]["overheadUs"] > args.max_info_overhead_us:
+        failures.append(f"INFO overhead {results['info']['overheadUs']:.1f}us > {args.max_info_overhead_us:.0f}us")
+    for mode in ("info", "traced"):
+        if results[mode]["leakedScans"]:
+            failures.append(f"{results[mode]['leakedScans']} scan(s) leaked passport data at {mode}")
+
+    if args.json:
+        import json
+        print(json.dumps({"results": results, "pass": not failures}, indent=2))
+    else:
+        print(f"{'mode':>7} | {'us/scan':>8} {'overhead':>9} | {'records':>7} {'bytes':>7} | {'leaked':>6}")
+        print("-" * 58)
+        for mode, r in results.items():
+            overhead = f"{r['overheadUs']:7.1f}us" if "overheadUs" in r else f"{'-':>9}"
+            print(f"{mode:>7} | {r['usPerScan']:8.1f} {overhead} | {r['recordsPerScan']:7.1f} "
+                  f"{r['bytesPerScan']:7.0f} | {r['leakedScans']:6d}")
+        print("PASS" if not failures else "FAIL: " + "; ".join(failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+MRZ Parse Throughput and Parser Agreement Check (no OCR needed)
+
+The OCR service (MRZParser) and the COM bridge (com_bridge.parse_mrz) both
+extract fields with icao_mrz.parse. This script:
+
+1. measures icao_mrz.parse on synthetic MRZs of every layout (one core),
+   and for reference the two entry points around it
+2. feeds random MRZs to both entry points and requires the same fields
+   from each. The cases are synthetic documents of every layout with
+   birth and expiry years over the whole two-digit range (every side of
+   the date pivot), Germany's one-letter code D, unspecified sex, lost
+   fillers and merged given names in the names field, OCR-style misreads
+   in the dates and empty document numbers. Every case is compared after
+   the OCR service's corrections (the bridge parses the MRZ as the OCR
+   service returns it).
+
+The bridge presents some fields differently. The nationality is a name
+with the code in nationalityCode, and sex is Male/Female/Other. Those
+fields are compared through that mapping. The OCR service rejects an MRZ
+with no document number, so for those cases only the bridge's empty
+document number is checked.
+
+Exits with status 1 if icao_mrz.parse is slower than --min-rate MRZs per
+second or the entry points disagree on any case. The agreement check is
+skipped (and says so) when ../python-com-bridge or its dependencies are
+not installed.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_parse [--count 20000] [--cases 20000] [--seed 23] [--min-rate 100000]
+"""
+import argparse
+import importlib
+import importlib.util
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from icao_mrz import FORMATS, NATIONALITIES  # noqa: E402
+from icao_mrz import parse as parse_fields  # noqa: E402
+
+from app.mrz_parser import MRZParser  # noqa: E402
+from app.synthetic import GIVEN_NAMES, mrz_lines, random_identity  # noqa: E402
+
+BRIDGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "python-com-bridge")
+
+# Fields both entry points return unchanged
+SHARED_FIELDS = ("documentType", "documentCode", "passportNumber", "surname", "givenName", "dateOfBirth",
+                 "dateOfExpiry", "issuingCountry", "personalNumber", "optionalData")
+BRIDGE_SEX = {"M": "Male", "F": "Female", "X": "Other"}
+
+
+def load_bridge() -> Tuple[Optional[Any], str]:
+    """com_bridge module, or None and why it cannot be imported here."""
+    if not os.path.exists(os.path.join(BRIDGE_DIR, "com_bridge.py")):
+        return None, "../python-com-bridge not found"
+    missing = [name for name in ("serial", "websockets") if importlib.util.find_spec(name) is None]
+    if missing:
+        return None, f"bridge dependencies not installed: {', '.join(missing)}"
+    sys.path.insert(0, BRIDGE_DIR)
+    return importlib.import_module("com_bridge"), ""
+
+
+def random_mrz(rng: random.Random) -> str:
+    """One MRZ of a random layout, with the edge cases the parsers must agree on."""
+    fmt = rng.choice(list(FORMATS.values()))
+    identity = random_identity(rng)
+    # Any two-digit year, so both sides of the date pivot come up
+    identity["dateOfBirth"] = f"{rng.randint(1900, 2099)}{identity['dateOfBirth'][4:]}"
+    identity["dateOfExpiry"] = f"{rng.randint(1900, 2099)}{identity['dateOfExpiry'][4:]}"
+    identity["sex"] = rng.choice("MFMF<X")
+    if rng.random() < 0.1:
+        identity["issuingCountry"] = identity["nationality"] = "D"
+    if rng.random() < 0.15:
+        identity["givenName"] = "".join(rng.sample(GIVEN_NAMES, 2))  # Merged given names
+    if rng.random() < 0.05:
+        identity["passportNumber"] = ""
+
+    chars = list("".join(mrz_lines(identity, fmt)))
+    names = fmt.field("names")
+    if rng.random() < 0.15:
+        # Reader lost a filler of the << separator
+        text = "".join(chars[names.start:names.end]).replace("<<", "<", 1)
+        chars[names.start:names.end] = text.ljust(names.end - names.start, "<")
+    if rng.random() < 0.1:
+        # OCR misread in a date (0 -> O), usually undone by the correction search
+        date = fmt.field(rng.choice(("dateOfBirth", "dateOfExpiry")))
+        position = rng.randrange(date.start, date.end)
+        chars[position] = "O" if chars[position] == "0" else chars[position]
+    return "".join(chars)
+
+
+def rate(parse, mrzs: List[str], repeat: int = 3) -> float:
+    """Best MRZs per second of parse over mrzs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for mrz in mrzs:
+            parse(mrz)
+        best = min(best, time.perf_counter() - start)
+    return len(mrzs) / best
+
+
+def disagreements(ocr: Optional[Dict[str, Any]], bridge: Optional[Dict[str, Any]]) -> List[str]:
+    """Fields the two entry points read differently (empty if they agree)."""
+    if bridge is None:
+        return ["bridge rejected the MRZ"]
+    if ocr is None:
+        return [] if bridge["passportNumber"] == "" else ["OCR service rejected the MRZ"]
+
+    differ = [name for name in SHARED_FIELDS if ocr[name] != bridge[name]]
+    if ocr["nationality"] != bridge["nationalityCode"]:
+        differ.append("nationalityCode")
+    if NATIONALITIES.get(ocr["nationality"], ocr["nationality"]) != bridge["nationality"]:
+        differ.append("nationality")
+    if BRIDGE_SEX[ocr["sex"]] != bridge["sex"]:
+        differ.append("sex")
+    return differ
+
+
+def agree(bridge_module, cases: int, rng: random.Random) -> bool:
+    parser = MRZParser()
+    failures = 0
+    for _ in range(cases):
+        mrz = random_mrz(rng)
+        ocr = parser.parse(mrz)
+        bridge = bridge_module.parse_mrz(ocr["rawMrz"] if ocr else mrz)
+        differ = disagreements(ocr, bridge)
+        if differ:
+            failures += 1
+            if failures <= 5:
+                print(f"  {mrz}: {', '.join(differ)}")
+    print(f"Agreement: {cases - failures}/{cases} random MRZs read the same by both entry points")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="MRZs per throughput run")
+    parser.add_argument("--cases", type=int, default=20000, help="Random MRZs for the agreement check")
+    parser.add_argument("--seed", type=int, default=23, help="Random seed")
+    parser.add_argument("--min-rate", type=float, default=100000, help="Fail if icao_mrz.parse is slower (MRZs/s)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mrzs = ["".join(mrz_lines(random_identity(rng), rng.choice(list(FORMATS.values())))) for _ in range(args.count)]
+    bridge_module, reason = load_bridge()
+
+    ocr_parser = MRZParser()
+    rates = {"icao_mrz.parse": rate(parse_fields, mrzs)}
+    rates["MRZParser.parse"] = rate(ocr_parser.parse, mrzs[:args.count // 10])
+    if bridge_module:
+        rates["com_bridge.parse_mrz"] = rate(bridge_module.parse_mrz, mrzs[:args.count // 10])
+
+    print(f"{args.count} MRZs (TD1, TD2, TD3, MRV-A, MRV-B)")
+    print(f"{'':>22} | {'MRZs/s':>9} {'per MRZ':>9}")
+    print("-" * 45)
+    for name, per_second in rates.items():
+        print(f"{name:>22} | {per_second:9.0f} {1e6 / per_second:7.1f}us")
+    print("(MRZParser.parse also validates check digits; com_bridge.parse_mrz also detects the layout)")
+
+    failures = []
+    if rates["icao_mrz.parse"] < args.min_rate:
+        failures.append(f"icao_mrz.parse below {args.min_rate:.0f} MRZs/s")
+    if bridge_module:
+        if not agree(bridge_module, args.cases, rng):
+            failures.append("entry points disagree")
+    else:
+        print(f"Agreement: SKIPPED ({reason})")
+
+    print("PASS" if not failures else "FAIL: " + "; ".join(failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
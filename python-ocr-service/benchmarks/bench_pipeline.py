@@ -0,0 +1,325 @@
+"""
+End-to-End MRZ Pipeline Benchmark (speed + accuracy)
+
+Runs every image of a labelled corpus (see benchmarks.make_corpus) through
+the same steps as /scan-mrz, offline: decode_image -> OCREngine.extract_mrz
+-> MRZParser.parse. Reports:
+
+- throughput (images/s) and p50/p95/p99 latency, total and per step
+- peak RSS of the benchmark process
+- MRZ exact-match rate and field-level accuracy against labels.json,
+  overall and per degradation level
+- first-scan rate (accepted with all check digits correct, so the agent
+  does not rescan) and how many of those needed app.mrz_correction
+
+Save a report with --output and compare a later run against it with
+--baseline. Changes beyond the tolerances are flagged as regressions
+(--fail-on-regression makes them fail the run, e.g. in CI).
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.make_corpus corpus/
+    python -m benchmarks.bench_pipeline corpus/ --output baseline.json
+    # ... change OCREngine heuristics or PaddleOCR settings ...
+    python -m benchmarks.bench_pipeline corpus/ --baseline baseline.json --output candidate.json
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings  # noqa: E402
+from app.image_decode import decode_image  # noqa: E402
+from app.mrz_parser import get_mrz_parser  # noqa: E402
+from app.ocr_engine import get_ocr_engine  # noqa: E402
+
+LABELS_FILE = "labels.json"
+
+# Fields compared against ground truth
+FIELDS = [
+    "passportNumber", "surname", "givenName", "nationality", "dateOfBirth",
+    "sex", "dateOfExpiry", "issuingCountry", "personalNumber",
+]
+
+# Regression tolerances for --baseline
+LATENCY_TOLERANCE = 0.10   # Relative increase of p50/p95 latency
+ACCURACY_TOLERANCE = 0.01  # Absolute drop of an accuracy rate
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (values need not be sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_corpus(directory: str, limit: Optional[int]) -> tuple:
+    """Return (labels document, [(filename, label), ...])."""
+    with open(os.path.join(directory, LABELS_FILE)) as f:
+        document = json.load(f)
+    items = sorted(document["images"].items())
+    if limit:
+        items = items[:limit]
+    return document, items
+
+
+def scan_one(engine, parser, data: bytes) -> Dict[str, Any]:
+    """Run one image through decode -> OCR -> parse, timing each step."""
+    t0 = time.perf_counter()
+    image, _ = decode_image(data)
+    t1 = time.perf_counter()
+    mrz_text, confidence, detection_path = engine.extract_mrz(image)
+    t2 = time.perf_counter()
+    parsed = parser.parse(mrz_text) if mrz_text else None
+    t3 = time.perf_counter()
+
+    return {
+        "mrzText": mrz_text,
+        "confidence": confidence,
+        "detectionPath": detection_path,
+        "parsed": parsed,
+        "timing": {"decode": t1 - t0, "ocr": t2 - t1, "parse": t3 - t2, "total": t3 - t0},
+    }
+
+
+def score(label: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare one scan result with its ground truth."""
+    parsed = result["parsed"] or {}
+    fields = {field: parsed.get(field) == label.get(field) for field in FIELDS}
+    return {
+        "mrzExact": result["mrzText"] == label["mrzText"],
+        "parsed": result["parsed"] is not None,
+        "accepted": result["parsed"] is not None and result["confidence"] >= settings.OCR_CONFIDENCE_THRESHOLD,
+        "allFields": all(fields.values()),
+        "fields": fields,
+        "firstScan": bool(parsed.get("validCheckDigits")) and result["confidence"] >= settings.OCR_CONFIDENCE_THRESHOLD,
+        "corrected": bool(parsed.get("corrections")),
+    }
+
+
+def accuracy_summary(scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+    n = len(scores) or 1
+    return {
+        "images": len(scores),
+        "mrzExactRate": sum(s["mrzExact"] for s in scores) / n,
+        "parseRate": sum(s["parsed"] for s in scores) / n,
+        "acceptedRate": sum(s["accepted"] for s in scores) / n,
+        "allFieldsRate": sum(s["allFields"] for s in scores) / n,
+        "firstScanRate": sum(s.get("firstScan", False) for s in scores) / n,
+        "rescansAvoidedRate": sum(s.get("firstScan", False) and s.get("corrected", False) for s in scores) / n,
+        "fieldAccuracy": {field: sum(s["fields"][field] for s in scores) / n for field in FIELDS},
+    }
+
+
+def run_benchmark(directory: str, limit: Optional[int], warmup: int) -> Dict[str, Any]:
+    document, items = load_corpus(directory, limit)
+    engine = get_ocr_engine()
+    parser = get_mrz_parser()
+
+    blobs = []
+    for filename, _ in items:
+        with open(os.path.join(directory, filename), "rb") as f:
+            blobs.append(f.read())
+
+    # Warm up so model initialisation and first-inference costs are not measured
+    for data in blobs[:warmup]:
+        scan_one(engine, parser, data)
+
+    records = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for (filename, label), data in zip(items, blobs):
+        result = scan_one(engine, parser, data)
+        records.append({
+            "image": filename,
+            "level": label.get("degradation", {}).get("level", "real"),
+            "detectionPath": result["detectionPath"],
+            "confidence": result["confidence"],
+            "timing": result["timing"],
+            "score": score(label, result),
+        })
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    corpus_fingerprint = hashlib.sha256(
+        "".join(label.get("sha256", filename) for filename, label in items).encode()
+    ).hexdigest()
+
+    levels = sorted({r["level"] for r in records})
+    steps = ("decode", "ocr", "parse", "total")
+
+    return {
+        "meta": {
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "gitRevision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "corpus": os.path.abspath(directory),
+            "corpusFingerprint": corpus_fingerprint,
+            "generator": document.get("generator"),
+            "settings": {
+                "OCR_LANG": settings.OCR_LANG,
+                "OCR_CONFIDENCE_THRESHOLD": settings.OCR_CONFIDENCE_THRESHOLD,
+                "MRZ_LOCATOR_ENABLED": settings.MRZ_LOCATOR_ENABLED,
+                "DECODE_MAX_SIDE": settings.DECODE_MAX_SIDE,
+            },
+        },
+        "summary": {
+            "images": len(records),
+            "wallSeconds": wall,
+            "cpuSeconds": cpu,
+            "imagesPerSecond": len(records) / wall if wall else 0.0,
+            "peakRssMb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "bandPathRate": sum(r["detectionPath"] == "band" for r in records) / (len(records) or 1),
+            "latency": {step: latency_summary([r["timing"][step] for r in records]) for step in steps},
+            "accuracy": accuracy_summary([r["score"] for r in records]),
+            "accuracyByLevel": {
+                level: accuracy_summary([r["score"] for r in records if r["level"] == level])
+                for level in levels
+            },
+        },
+        "images": records,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    summary = report["summary"]
+    accuracy = summary["accuracy"]
+    total = summary["latency"]["total"]
+
+    print(f"\n=== Pipeline benchmark ({summary['images']} images, rev {report['meta']['gitRevision']}) ===")
+    print(
+        f"Throughput: {summary['imagesPerSecond']:.2f} img/s  |  "
+        f"latency p50 {total['p50'] * 1000:.0f}ms  p95 {total['p95'] * 1000:.0f}ms  "
+        f"p99 {total['p99'] * 1000:.0f}ms  |  peak RSS {summary['peakRssMb']:.0f} MB"
+    )
+    for step in ("decode", "ocr", "parse"):
+        stats = summary["latency"][step]
+        print(f"  {step:<6} p50 {stats['p50'] * 1000:8.1f}ms  p95 {stats['p95'] * 1000:8.1f}ms")
+    print(
+        f"MRZ exact {accuracy['mrzExactRate']:.1%}  |  all fields {accuracy['allFieldsRate']:.1%}  |  "
+        f"parsed {accuracy['parseRate']:.1%}  |  accepted {accuracy['acceptedRate']:.1%}  |  "
+        f"band path {summary['bandPathRate']:.1%}"
+    )
+    print(
+        f"First scan (check digits valid) {accuracy['firstScanRate']:.1%}  |  "
+        f"rescans avoided by correction {accuracy['rescansAvoidedRate']:.1%}"
+    )
+    for field, rate in accuracy["fieldAccuracy"].items():
+        print(f"  {field:<16} {rate:.1%}")
+    for level, level_accuracy in summary["accuracyByLevel"].items():
+        print(f"  [{level}] {level_accuracy['images']} images, all fields {level_accuracy['allFieldsRate']:.1%}")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Print the diff against a baseline report; return regression messages."""
+    regressions = []
+
+    if report["meta"]["corpusFingerprint"] != baseline["meta"]["corpusFingerprint"]:
+        print("\nWARNING: corpus differs from the baseline corpus, numbers are not comparable")
+
+    print(f"\n=== Diff vs baseline (rev {baseline['meta']['gitRevision']}) ===")
+
+    new, old = report["summary"], baseline["summary"]
+    rows = [("imagesPerSecond", new["imagesPerSecond"], old["imagesPerSecond"], "higher")]
+    for step in ("total", "decode", "ocr", "parse"):
+        for pct in ("p50", "p95", "p99"):
+            rows.append((f"latency.{step}.{pct}", new["latency"][step][pct], old["latency"][step][pct], "lower"))
+    rows.append(("peakRssMb", new["peakRssMb"], old["peakRssMb"], "lower"))
+    for key in ("mrzExactRate", "allFieldsRate", "parseRate", "acceptedRate", "firstScanRate"):
+        rows.append((f"accuracy.{key}", new["accuracy"][key], old["accuracy"].get(key, 0.0), "accuracy"))
+    for field in FIELDS:
+        rows.append((
+            f"field.{field}",
+            new["accuracy"]["fieldAccuracy"][field],
+            old["accuracy"]["fieldAccuracy"].get(field, 0.0),
+            "accuracy"
+        ))
+
+    for name, value, previous, better in rows:
+        delta = value - previous
+        relative = delta / previous if previous else 0.0
+        flag = ""
+        if better == "accuracy" and delta < -ACCURACY_TOLERANCE:
+            flag = "REGRESSION"
+        elif better == "lower" and name.startswith("latency.total") and relative > LATENCY_TOLERANCE:
+            flag = "REGRESSION"
+        elif better == "higher" and relative < -LATENCY_TOLERANCE:
+            flag = "REGRESSION"
+        if flag:
+            regressions.append(f"{name}: {previous:.4g} -> {value:.4g}")
+        print(f"  {name:<28} {previous:10.4g} -> {value:10.4g}  ({relative:+.1%}) {flag}")
+
+    # Images that were read correctly before and are not anymore
+    before = {r["image"]: r["score"]["allFields"] for r in baseline.get("images", [])}
+    broken = [r["image"] for r in report["images"] if before.get(r["image"]) and not r["score"]["allFields"]]
+    if broken:
+        print(f"  Newly failing images ({len(broken)}): {', '.join(broken[:20])}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Corpus directory with labels.json (see benchmarks.make_corpus)")
+    parser.add_argument("--limit", type=int, help="Only the first N images")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured warm-up scans")
+    parser.add_argument("--output", help="Write JSON report (use as a later --baseline)")
+    parser.add_argument("--baseline", help="Compare against this earlier JSON report")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if a regression is flagged")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus, LABELS_FILE)):
+        print(f"No {LABELS_FILE} in {args.corpus}; create a corpus with python -m benchmarks.make_corpus")
+        sys.exit(1)
+
+    report = run_benchmark(args.corpus, args.limit, args.warmup)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond tolerance")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
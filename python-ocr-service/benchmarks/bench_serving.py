@@ -0,0 +1,243 @@
+"""
+Serving Mode Benchmark: local (model per worker) vs shared (one inference server)
+
+Starts the service in each serving mode and reports:
+- startup time (until every uvicorn worker finished its startup event)
+- RSS and PSS per process (PSS splits shared copy-on-write pages fairly)
+- scan throughput under concurrent load
+
+Usage (from python-ocr-service/, Linux only):
+    python -m benchmarks.bench_serving path/to/images/ [--workers 4] [--concurrency 8] [--duration 30]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb(pid: int) -> dict:
+    """RSS and PSS of a process in kB (from /proc/<pid>/smaps_rollup)."""
+    values = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    values["rss"] = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    values["pss"] = int(line.split()[1])
+    except OSError:
+        pass
+    return values
+
+
+def process_tree(root: int) -> list:
+    """PIDs of a process and all its descendants."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            parents.setdefault(ppid, []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(parents.get(pid, []))
+    return tree
+
+
+def wait_for_lines(proc: subprocess.Popen, marker: str, count: int, timeout: float) -> bool:
+    """Wait until a log marker appeared count times in the process output."""
+    seen = 0
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        line = proc.stdout.readline()
+        if not line:
+            if proc.poll() is not None:
+                return False
+            continue
+        if marker in line:
+            seen += 1
+            if seen >= count:
+                # Keep draining output so the process never blocks on a full pipe
+                threading.Thread(target=lambda: [None for _ in proc.stdout], daemon=True).start()
+                return True
+    return False
+
+
+def multipart_body(image: bytes) -> tuple:
+    """Encode one image as multipart/form-data (unique bytes so caching never hits)."""
+    boundary = uuid.uuid4().hex
+    payload = image + uuid.uuid4().bytes  # Trailing bytes are ignored by JPEG/PNG decoders
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="passport.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def load_test(port: int, images: list, concurrency: int, duration: float) -> dict:
+    """Send scans from concurrency threads for duration seconds."""
+    url = f"http://127.0.0.1:{port}/scan-mrz"
+    counts = {"ok": 0, "failed": 0, "rejected": 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def worker(offset: int):
+        i = offset
+        while time.time() < deadline:
+            body, content_type = multipart_body(images[i % len(images)])
+            i += concurrency
+            request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    result = json.loads(response.read())
+                key = "ok" if result.get("success") else "failed"
+            except urllib.error.HTTPError as e:
+                key = "rejected" if e.code in (429, 503) else "failed"
+            except Exception:
+                key = "failed"
+            with lock:
+                counts[key] += 1
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        **counts,
+        "scansPerSecond": counts["ok"] / elapsed,
+        "p50Latency": latencies[len(latencies) // 2] if latencies else None,
+    }
+
+
+def run_mode(mode: str, args, images: list) -> dict:
+    """Start the service in one serving mode, measure it, stop it."""
+    env = dict(
+        os.environ,
+        OCR_SERVING_MODE=mode,
+        OCR_INFERENCE_SOCKET=f"/tmp/greenpay-ocr-bench-{os.getpid()}.sock",
+        OCR_MODEL_PROCESSES=str(args.model_processes),
+        OCR_INFERENCE_AUTHKEY=os.environ.get("OCR_INFERENCE_AUTHKEY") or uuid.uuid4().hex,
+        RESULT_CACHE_BACKEND="off",
+        RATE_LIMIT_ENABLED="false",
+        PYTHONUNBUFFERED="1",
+    )
+    procs = []
+    start = time.perf_counter()
+
+    try:
+        if mode == "shared":
+            server = subprocess.Popen(
+                [sys.executable, "-m", "app.inference_server"],
+                cwd=SERVICE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            )
+            procs.append(server)
+            if not wait_for_lines(server, "accepting requests", args.model_processes, args.timeout):
+                raise RuntimeError("Inference server did not start")
+
+        uvicorn = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers)],
+            cwd=SERVICE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        procs.append(uvicorn)
+        if not wait_for_lines(uvicorn, "Application startup complete", args.workers, args.timeout):
+            raise RuntimeError("uvicorn workers did not start")
+
+        startup = time.perf_counter() - start
+
+        throughput = load_test(args.port, images, args.concurrency, args.duration)
+
+        memory = []
+        for proc in procs:
+            for pid in process_tree(proc.pid):
+                memory.append({"pid": pid, **memory_kb(pid)})
+
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    report = {
+        "mode": mode,
+        "workers": args.workers,
+        "startupSeconds": startup,
+        "processes": memory,
+        "totalRssMb": sum(m["rss"] for m in memory) / 1024,
+        "totalPssMb": sum(m["pss"] for m in memory) / 1024,
+        **throughput,
+    }
+
+    print(f"\n=== {mode} mode ({args.workers} HTTP workers) ===")
+    print(f"Startup: {startup:.1f}s")
+    for m in memory:
+        print(f"  pid {m['pid']:>7}: RSS {m['rss'] / 1024:7.1f} MB  PSS {m['pss'] / 1024:7.1f} MB")
+    print(f"Total: RSS {report['totalRssMb']:.0f} MB, PSS {report['totalPssMb']:.0f} MB")
+    print(
+        f"Throughput: {report['scansPerSecond']:.2f} scans/s "
+        f"(ok {report['ok']}, failed {report['failed']}, rejected {report['rejected']}, "
+        f"p50 {report['p50Latency'] or 0:.2f}s)"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", help="Directory of passport images (JPG/PNG)")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn workers")
+    parser.add_argument("--model-processes", type=int, default=1, help="Model processes in shared mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="Load test seconds per mode")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--timeout", type=float, default=300, help="Startup timeout")
+    parser.add_argument("--output", help="Write JSON report to this file")
+    args = parser.parse_args()
+
+    paths = sorted(
+        p for p in glob.glob(os.path.join(args.images, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+    images = [open(p, "rb").read() for p in paths]
+    if not images:
+        print(f"No images found in {args.images}")
+        sys.exit(1)
+
+    reports = [run_mode(mode, args, images) for mode in ("local", "shared")]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Live Scan Frame Gating and Backpressure Check (no OCR needed)
+
+Drives app.live_scan.LiveScan with a simulated camera feed of synthetic
+passport frames (app/synthetic.py) at --width x 9/16 pixels, sent as JPEG:
+
+1. --empty frames of the desk without a passport (no MRZ band)
+2. --blurry frames of the passport in motion (Gaussian blur sigma 3-5)
+3. --sharp frames of the passport held still (blur sigma 0-1), repeated
+   until the session ends
+
+Recognition is simulated: it takes --scan-ms, the first read fails the check
+digits and the second one validates. Two runs:
+
+- camera: frames at --fps, the rate of a phone preview
+- flood:  frames as fast as the sender can encode them, faster than they
+          can be assessed, so the session has to drop frames
+
+Reports the assessment cost per frame, how many frames were recognised,
+and the lag from a frame being sent to its "frame" message.
+
+Exits with status 1 if a frame without a sharp MRZ band reaches recognition,
+an empty or blurry frame is classed usable, a session does not end with a
+valid result, the flood run drops no frames, or the lag exceeds --max-lag-ms
+in either run.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.bench_stream [--fps 15] [--width 960] [--scan-ms 400] [--max-lag-ms 150]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings  # noqa: E402
+from app.live_scan import FRAME_USABLE, LiveScan, assess_frame  # noqa: E402
+from app.synthetic import random_identity, render_passport, td3_lines  # noqa: E402
+
+
+def camera_frame(page: np.ndarray, width: int, rng: random.Random) -> np.ndarray:
+    """The passport page held in front of the camera, somewhere near the centre."""
+    height = width * 9 // 16
+    frame = np.full((height, width, 3), rng.randint(50, 110), dtype=np.uint8)
+    page_h = int(height * rng.uniform(0.75, 0.9))
+    page_w = page.shape[1] * page_h // page.shape[0]
+    x = (width - page_w) // 2 + rng.randint(-width // 40, width // 40)
+    y = (height - page_h) // 2 + rng.randint(-height // 40, height // 40)
+    frame[y:y + page_h, x:x + page_w] = cv2.resize(page, (page_w, page_h), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def feed(args, rng: random.Random) -> List[Tuple[str, bytes]]:
+    """(kind, JPEG) frames: empty desk, passport in motion, then held still."""
+    identity = random_identity(rng)
+    page = render_passport(*td3_lines(identity), identity, rng)
+    height = args.width * 9 // 16
+
+    frames = []
+    for _ in range(args.empty):
+        frames.append(("empty", np.full((height, args.width, 3), rng.randint(50, 110), dtype=np.uint8)))
+    for _ in range(args.blurry):
+        frames.append(("blurry", cv2.GaussianBlur(camera_frame(page, args.width, rng), (0, 0), rng.uniform(3, 5))))
+    for _ in range(args.sharp):
+        sigma = rng.uniform(0, 1)
+        frame = camera_frame(page, args.width, rng)
+        frames.append(("sharp", cv2.GaussianBlur(frame, (0, 0), sigma) if sigma > 0.3 else frame))
+
+    return [(kind, cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+            for kind, frame in frames]
+
+
+async def session(args, frames: List[Tuple[str, bytes]], interval: float) -> Dict[str, Any]:
+    """One live scan over frames, sent every interval seconds (0: as fast as possible)."""
+    incoming: asyncio.Queue = asyncio.Queue()
+    sent: Dict[int, float] = {}
+    lags: List[float] = []
+    recognised: List[str] = []
+
+    async def camera():
+        # The passport stays in view until the session ends
+        held = [data for kind, data in frames if kind == "sharp"]
+        for number, data in enumerate(itertools.chain((data for _, data in frames), itertools.cycle(held)), 1):
+            sent[number] = time.perf_counter()
+            await incoming.put(data)
+            await asyncio.sleep(interval)
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "frame":
+            lags.append(time.perf_counter() - sent[message["frame"]])
+
+    async def recognize(image: np.ndarray) -> Dict[str, Any]:
+        recognised.append(assess_frame(image, args.min_sharpness).result)
+        await asyncio.sleep(args.scan_ms / 1000)
+        return {"success": True, "validCheckDigits": len(recognised) >= 2}
+
+    scan = LiveScan(
+        incoming.get, send, recognize,
+        window_frames=settings.STREAM_WINDOW_FRAMES,
+        window_seconds=settings.STREAM_WINDOW_MS / 1000,
+        min_sharpness=args.min_sharpness,
+        max_frame_bytes=settings.STREAM_MAX_FRAME_BYTES,
+        max_seconds=60
+    )
+    sender = asyncio.ensure_future(camera())
+    summary = await scan.run()
+    sender.cancel()
+    return {"summary": summary, "lags": lags, "recognised": recognised}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, default=15, help="Frame rate of the camera run")
+    parser.add_argument("--width", type=int, default=960, help="Frame width (16:9)")
+    parser.add_argument("--empty", type=int, default=10, help="Frames without a passport")
+    parser.add_argument("--blurry", type=int, default=10, help="Frames of the passport in motion")
+    parser.add_argument("--sharp", type=int, default=60, help="Frames of the passport held still")
+    parser.add_argument("--scan-ms", type=float, default=400, help="Simulated recognition time")
+    parser.add_argument("--min-sharpness", type=float, default=settings.STREAM_MIN_SHARPNESS,
+                        help="STREAM_MIN_SHARPNESS")
+    parser.add_argument("--max-lag-ms", type=float, default=150, help="Fail if a frame message lags more")
+    parser.add_argument("--seed", type=int, default=25, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    frames = feed(args, rng)
+
+    # Assessment cost and classification, one frame at a time
+    times, failures = [], []
+    for kind, data in frames:
+        start = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        result = assess_frame(image, args.min_sharpness).result
+        times.append(time.perf_counter() - start)
+        if kind != "sharp" and result == FRAME_USABLE:
+            failures.append(f"an {kind} frame was classed usable")
+    width_height = f"{args.width}x{args.width * 9 // 16}"
+    print(f"{len(frames)} frames at {width_height}: decode + assess {statistics.mean(times) * 1000:.1f}ms mean, "
+          f"{max(times) * 1000:.1f}ms max (full recognition: {args.scan_ms:.0f}ms simulated)")
+
+    runs: Dict[str, Dict[str, Any]] = {
+        "camera": asyncio.run(session(args, frames, 1 / args.fps)),
+        "flood": asyncio.run(session(args, frames, 0)),
+    }
+
+    print(f"{'':>7} | {'sent':>5} {'usable':>6} {'blurry':>6} {'no MRZ':>6} {'dropped':>7} "
+          f"{'OCR runs':>8} {'lag mean':>9} {'max':>7} {'ended':>7}")
+    print("-" * 85)
+    for name, run in runs.items():
+        summary, lags = run["summary"], run["lags"]
+        print(f"{name:>7} | {summary['frames']:5d} {summary['usable']:6d} {summary['blurry']:6d} "
+              f"{summary['noMrz']:6d} {summary['dropped']:7d} {summary['recognitions']:8d} "
+              f"{statistics.mean(lags) * 1000:7.1f}ms {max(lags) * 1000:5.1f}ms {summary['reason']:>7}")
+
+        if any(result != FRAME_USABLE for result in run["recognised"]):
+            failures.append(f"{name}: a frame without a sharp MRZ band reached recognition")
+        if summary["reason"] != "done":
+            failures.append(f"{name}: session ended '{summary['reason']}' without a valid result")
+        if max(lags) * 1000 > args.max_lag_ms:
+            failures.append(f"{name}: frame lag {max(lags) * 1000:.0f}ms over {args.max_lag_ms:.0f}ms")
+    if runs["flood"]["summary"]["dropped"] == 0:
+        failures.append("flood: no frames dropped")
+
+    print("PASS" if not failures else "FAIL: " + "; ".join(dict.fromkeys(failures)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
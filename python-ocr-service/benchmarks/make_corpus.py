@@ -0,0 +1,75 @@
+"""
+Synthetic Golden Corpus Generator
+
+Writes N synthetic TD3 passport images (see app/synthetic.py) plus a
+labels.json ground-truth file for benchmarks.bench_pipeline. The same seed
+always produces the same identities and degradations, so the corpus does
+not need to be committed: regenerate it anywhere with the same command.
+
+labels.json also records the SHA-256 of every image. bench_pipeline copies
+the corpus fingerprint into its report, so a diff against a baseline built
+from a different corpus (other seed, other OpenCV/libjpeg) is flagged.
+
+Real passport images can be added to a corpus directory by hand: put the
+image next to the synthetic ones and add a labels.json entry with the
+expected fields. Never commit real images.
+
+Usage (from python-ocr-service/):
+    python -m benchmarks.make_corpus corpus/ [--count 200] [--seed 9303] [--level mixed]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.synthetic import synthetic_sample  # noqa: E402
+
+LABELS_FILE = "labels.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="Corpus directory (created if missing)")
+    parser.add_argument("--count", type=int, default=200, help="Number of images")
+    parser.add_argument("--seed", type=int, default=9303, help="Random seed")
+    parser.add_argument("--level", default="mixed", choices=("clean", "mild", "hard", "mixed"),
+                        help="Degradation level")
+    parser.add_argument("--width", type=int, default=1600, help="Page width in pixels before skew")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    rng = random.Random(args.seed)
+
+    labels = {}
+    for i in range(args.count):
+        image, label = synthetic_sample(rng, args.level, width=args.width)
+        filename = f"synthetic_{i:04d}.jpg"
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        if not ok:
+            raise RuntimeError(f"JPEG encoding failed for {filename}")
+
+        data = encoded.tobytes()
+        with open(os.path.join(args.output, filename), "wb") as f:
+            f.write(data)
+
+        label["sha256"] = hashlib.sha256(data).hexdigest()
+        labels[filename] = label
+
+    with open(os.path.join(args.output, LABELS_FILE), "w") as f:
+        json.dump(
+            {"generator": {"seed": args.seed, "count": args.count, "level": args.level, "width": args.width},
+             "images": labels},
+            f, indent=2, sort_keys=True
+        )
+
+    print(f"Wrote {args.count} images and {LABELS_FILE} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
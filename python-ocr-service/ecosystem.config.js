@@ -34,6 +34,12 @@ module.exports = {
       OCR_PORT: '5000',
       OCR_WORKERS: '4',          // 4 workers for 8-core server
       OCR_USE_GPU: 'false',      // Set to 'true' if GPU available
+      OCR_INFERENCE_THREADS: '1',     // Inference threads per worker
+      OCR_INFERENCE_QUEUE_SIZE: '4',  // Waiting scans per worker before 503
+      RESULT_CACHE_BACKEND: 'sqlite', // Share cached scan results between the 4 workers
+      RATE_LIMIT_BACKEND: 'sqlite',   // One rate limit per client across the 4 workers
+      JOB_STORE_BACKEND: 'sqlite',    // Scan jobs can be polled through any of the 4 workers
+      PROMETHEUS_MULTIPROC_DIR: '/dev/shm/greenpay-ocr-metrics', // /metrics aggregated over the 4 workers
       LOG_LEVEL: 'INFO',
       CORS_ENABLED: 'false'      // Only Node.js backend can access
     },
@@ -0,0 +1,96 @@
+/**
+ * PM2 Ecosystem Configuration for GreenPay OCR Service - Shared-Model Mode
+ *
+ * One inference server owns the PaddleOCR model; the uvicorn HTTP workers load
+ * no model and forward inference to it over a local Unix socket. Memory per
+ * added HTTP worker stays near-flat and workers start in about a second.
+ *
+ * Both apps read OCR_INFERENCE_AUTHKEY from .env (not committed). Shared mode
+ * refuses to start without it.
+ *
+ * Use this instead of ecosystem.config.js (not alongside it):
+ *   pm2 start ecosystem.shared.config.js
+ *   pm2 logs greenpay-ocr-inference
+ *   pm2 logs greenpay-ocr
+ */
+
+const cwd = '/home/eywademo-greenpay/htdocs/greenpay.eywademo.cloud/python-ocr-service';
+
+const sharedEnv = {
+  OCR_SERVING_MODE: 'shared',
+  OCR_INFERENCE_SOCKET: '/tmp/greenpay-ocr-inference.sock',
+  OCR_USE_GPU: 'false',
+  PROMETHEUS_MULTIPROC_DIR: '/dev/shm/greenpay-ocr-metrics',  // Stage metrics of both apps in one /metrics
+  LOG_LEVEL: 'INFO'
+};
+
+module.exports = {
+  apps: [
+    {
+      // Model-owning inference server (start first)
+      name: 'greenpay-ocr-inference',
+      script: 'venv/bin/python',
+      args: '-m app.inference_server',
+      cwd: cwd,
+      interpreter: 'none',
+
+      env: {
+        ...sharedEnv,
+        OCR_MODEL_PROCESSES: '2'   // Forked after model load, weights shared copy-on-write, re-forked on exit
+      },
+
+      autorestart: true,
+      watch: false,
+      max_restarts: 10,
+      min_uptime: '10s',
+      max_memory_restart: '2G',    // Covers all model processes
+
+      error_file: '/var/log/greenpay-ocr-inference-error.log',
+      out_file: '/var/log/greenpay-ocr-inference-out.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      merge_logs: true,
+
+      kill_timeout: 5000,
+      restart_delay: 2000,
+      instances: 1,
+      exec_mode: 'fork'
+    },
+    {
+      // Lightweight HTTP workers (no model loaded)
+      name: 'greenpay-ocr',
+      script: 'venv/bin/uvicorn',
+      args: 'app.main:app --host 127.0.0.1 --port 5000 --workers 4',
+      cwd: cwd,
+      interpreter: 'none',
+
+      env: {
+        ...sharedEnv,
+        OCR_HOST: '127.0.0.1',
+        OCR_PORT: '5000',
+        OCR_WORKERS: '4',
+        OCR_INFERENCE_QUEUE_SIZE: '4',
+        RESULT_CACHE_BACKEND: 'sqlite',
+        RATE_LIMIT_BACKEND: 'sqlite',
+        JOB_STORE_BACKEND: 'sqlite',
+        CORS_ENABLED: 'false'
+      },
+
+      autorestart: true,
+      watch: false,
+      max_restarts: 10,
+      min_uptime: '10s',
+      max_memory_restart: '1G',
+
+      error_file: '/var/log/greenpay-ocr-error.log',
+      out_file: '/var/log/greenpay-ocr-out.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      merge_logs: true,
+
+      kill_timeout: 5000,
+      listen_timeout: 10000,
+      restart_delay: 2000,
+      instances: 1,
+      exec_mode: 'fork'
+    }
+  ]
+};
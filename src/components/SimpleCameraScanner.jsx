@@ -1129,6 +1129,65 @@ const SimpleCameraScanner = ({
     }
   };
 
+  // Wait for a server OCR job to finish: its event stream, or polling if the stream drops
+  const waitForOcrJob = (jobId, timeoutMs = 60000) => new Promise((resolve, reject) => {
+    const finished = ['done', 'failed', 'cancelled'];
+    const jobUrl = `/api/ocr/jobs/${encodeURIComponent(jobId)}`;
+    const source = new EventSource(`${jobUrl}/events`);
+    let pollTimer = null;
+    let settled = false;
+
+    const settle = () => {
+      settled = true;
+      source.close();
+      clearTimeout(pollTimer);
+      clearTimeout(deadline);
+    };
+
+    const deadline = setTimeout(() => {
+      if (settled) return;
+      settle();
+      // Nobody waits for the result any more: free the queue slot
+      fetch(jobUrl, { method: 'DELETE' }).catch(() => {});
+      reject(new Error('Server OCR timed out'));
+    }, timeoutMs);
+
+    const poll = async () => {
+      try {
+        const response = await fetch(jobUrl);
+        const job = await response.json();
+        if (settled) return;
+        if (response.status === 404) {
+          settle();
+          reject(new Error(job.error || 'Server OCR job expired'));
+          return;
+        }
+        if (finished.includes(job.status)) {
+          settle();
+          resolve(job);
+          return;
+        }
+      } catch (error) {
+        console.warn('Polling OCR job failed, retrying:', error.message);
+      }
+      if (!settled) pollTimer = setTimeout(poll, 1000);
+    };
+
+    source.addEventListener('status', (event) => {
+      const job = JSON.parse(event.data);
+      if (!settled && finished.includes(job.status)) {
+        settle();
+        resolve(job);
+      }
+    });
+
+    source.onerror = () => {
+      // Stream dropped (proxy, network): fall back to polling
+      source.close();
+      if (!settled && !pollTimer) poll();
+    };
+  });
+
   const processImageWithOCR = async (rawImageDataUrl, processedImageDataUrl = rawImageDataUrl) => {
     console.log('=== STARTING OCR PROCESSING ===');
     setIsProcessing(true);
@@ -1153,13 +1212,29 @@ const SimpleCameraScanner = ({
         const formData = new FormData();
         formData.append('file', blob, 'passport.jpg');
 
-        // Call backend OCR endpoint
-        const ocrResponse = await fetch('/api/ocr/scan-mrz', {
+        // Queue the scan; the backend answers with a job ID straight away
+        const submitResponse = await fetch('/api/ocr/scan-mrz/jobs', {
           method: 'POST',
           body: formData,
         });
+        const submitted = await submitResponse.json();
 
-        const result = await ocrResponse.json();
+        if (!submitResponse.ok) {
+          throw new Error(submitted.error || 'Server OCR failed');
+        }
+
+        const job = await waitForOcrJob(submitted.jobId);
+        if (job.status !== 'done') {
+          throw new Error(job.error || `Server OCR job ${job.status}`);
+        }
+
+        // Same shape as the /api/ocr/scan-mrz response
+        const result = {
+          success: job.result.success,
+          error: job.result.error,
+          data: job.result,
+          processingTime: Math.round((job.updatedAt - job.createdAt) * 1000),
+        };
 
         // Debug: Log complete server response
         console.log('=== FULL SERVER OCR RESPONSE ===');